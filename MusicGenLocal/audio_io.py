@@ -0,0 +1,712 @@
+"""
+MusicGen Local - Audio I/O
+===========================
+Small helpers for writing generated audio to disk and reading it back.
+
+Output encoders all share one interface (write(frames) / close() /
+frames_written, usable as a context manager) and are picked by codec
+name with open_writer():
+
+  float32       32-bit IEEE float WAV (no conversion)
+  pcm16, pcm24  integer WAV, clipped and TPDF-dithered
+  flac          lossless 16-bit FLAC (needs the optional soundfile package)
+  opus, mp3     lossy, encoded by a local ffmpeg binary if one is on PATH
+
+Frames are converted block by block (ENCODE_BLOCK_FRAMES at a time), so
+encoding never makes a full-length copy of the waveform. Each writer
+keeps encode_s (sample conversion) and write_s (file / pipe I/O) so the
+two can be reported separately.
+
+Readers go the other way: open_reader() memory-maps a WAV file (float32,
+8/16/24/32-bit PCM) or decodes anything else through ffmpeg, and
+blocks() yields float32 frames of shape (n, channels) a block at a time,
+so long files can be analysed without loading them whole.
+
+Post-processing works on the memory map too, so peak memory stays at one
+block however long the track is:
+
+  normalize(path, -1.0)              # in place: peak to -1 dBFS
+  fade(path, fade_in_s=0.5, fade_out_s=2.0)
+  transform_wav(src, dst, fn, start_s=5, end_s=35, codec="pcm24")
+  concat_wavs([a, b, c], dst)
+
+New WAV files of a known length are preallocated at full size and filled
+in chunks (PreallocatedWavWriter, used by open_writer(frames=...)).
+"""
+
+import os
+import mmap
+import time
+import json
+import shutil
+import struct
+import subprocess
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+ENCODE_BLOCK_FRAMES = 65536
+LOSSY_BITRATE_KBPS = 96
+
+WAV_SAMPLE_FORMATS = {"float32": 32, "pcm16": 16, "pcm24": 24}  # codec -> bits per sample
+FFMPEG_CODECS = {"opus": "libopus", "mp3": "libmp3lame"}
+CODECS = (*WAV_SAMPLE_FORMATS, "flac", *FFMPEG_CODECS)
+
+
+def _blocks(frames: np.ndarray):
+    for start in range(0, len(frames), ENCODE_BLOCK_FRAMES):
+        yield frames[start:start + ENCODE_BLOCK_FRAMES]
+
+
+def quantize(block: np.ndarray, bits: int, rng: np.random.Generator) -> np.ndarray:
+    """Clip float audio to [-1, 1) and convert to int32 holding `bits`-bit samples, with TPDF dither."""
+    scale = float(2 ** (bits - 1))
+    dither = rng.random(block.shape, dtype=np.float32) - rng.random(block.shape, dtype=np.float32)
+    scaled = block * np.float32(scale) + dither
+    np.clip(np.rint(scaled, out=scaled), -scale, scale - 1, out=scaled)
+    return scaled.astype(np.int32)
+
+
+def encode_samples(block: np.ndarray, bits: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Float frames -> WAV sample layout for `bits` (32 = float32, 16, 24):
+    float32, dithered int16, or (..., 3) little-endian bytes for 24-bit.
+    """
+    block = block.astype(np.float32, copy=False)
+    if bits == 32:
+        return block
+    if bits == 16:
+        return quantize(block, 16, rng).astype("<i2")
+    # Little-endian int32 -> keep the low three bytes of each sample
+    packed = quantize(block, 24, rng).astype("<i4").view(np.uint8)
+    return packed.reshape(*block.shape, 4)[..., :3]
+
+
+def wav_header(sample_rate: int, channels: int, sample_format: str, data_bytes: int) -> bytes:
+    """44-byte WAV header for `data_bytes` of float32 / pcm16 / pcm24 samples."""
+    bits = WAV_SAMPLE_FORMATS[sample_format]
+    block_align = channels * bits // 8
+    format_tag = WAVE_FORMAT_IEEE_FLOAT if sample_format == "float32" else WAVE_FORMAT_PCM
+    return b"".join([
+        b"RIFF", struct.pack("<I", 36 + data_bytes), b"WAVE",
+        b"fmt ", struct.pack("<IHHIIHH", 16, format_tag, channels, sample_rate,
+                             sample_rate * block_align, block_align, bits),
+        b"data", struct.pack("<I", data_bytes),
+    ])
+
+
+class StreamingWavWriter:
+    """
+    Append mono/multichannel frames to a WAV file incrementally.
+
+    The header is written up front with placeholder sizes and patched on
+    close(), so the whole waveform never has to be held in memory.
+    sample_format is "float32" (stored as is) or "pcm16"/"pcm24" (clipped
+    and dithered integer PCM). Pass `seed` to make the dither, and so the
+    file, reproducible.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: int,
+        channels: int = 1,
+        sample_format: str = "float32",
+        seed: int | None = None,
+    ):
+        if sample_format not in WAV_SAMPLE_FORMATS:
+            raise ValueError(
+                f"sample_format must be one of {', '.join(WAV_SAMPLE_FORMATS)} (got {sample_format!r})."
+            )
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_format = sample_format
+        self.bits = WAV_SAMPLE_FORMATS[sample_format]
+        self.frames_written = 0
+        self.encode_s = 0.0
+        self.write_s = 0.0
+        self._rng = np.random.default_rng(seed)
+        self._file = open(path, "wb")
+        self._write_header(0)
+
+    def _write_header(self, data_bytes: int) -> None:
+        self._file.write(wav_header(self.sample_rate, self.channels, self.sample_format, data_bytes))
+
+    def write(self, frames: np.ndarray) -> None:
+        """Append frames (shape (n,) or (n, channels)) of float audio in [-1, 1]."""
+        frames = np.asarray(frames)
+        for block in _blocks(frames):
+            start = time.perf_counter()
+            data = encode_samples(block, self.bits, self._rng).tobytes()
+            encoded = time.perf_counter()
+            self._file.write(data)
+            self.encode_s += encoded - start
+            self.write_s += time.perf_counter() - encoded
+        self.frames_written += len(frames)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        start = time.perf_counter()
+        self._file.seek(0)
+        self._write_header(self.frames_written * self.channels * self.bits // 8)
+        self._file.close()
+        self.write_s += time.perf_counter() - start
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FlacWriter:
+    """Append frames to a 16-bit FLAC file (dithered) using the soundfile package."""
+
+    def __init__(self, path: str, sample_rate: int, channels: int = 1, seed: int | None = None):
+        try:
+            import soundfile
+        except ImportError:
+            raise RuntimeError(
+                "FLAC output needs the soundfile package (pip install soundfile)."
+            ) from None
+        self.path = path
+        self.frames_written = 0
+        self.encode_s = 0.0
+        self.write_s = 0.0
+        self._rng = np.random.default_rng(seed)
+        self._file = soundfile.SoundFile(
+            path, "w", samplerate=sample_rate, channels=channels, format="FLAC", subtype="PCM_16",
+        )
+
+    def write(self, frames: np.ndarray) -> None:
+        frames = np.asarray(frames)
+        for block in _blocks(frames):
+            start = time.perf_counter()
+            samples = quantize(block.astype(np.float32, copy=False), 16, self._rng).astype(np.int16)
+            encoded = time.perf_counter()
+            self._file.write(samples)  # FLAC compression happens here, so it counts as write time
+            self.encode_s += encoded - start
+            self.write_s += time.perf_counter() - encoded
+        self.frames_written += len(frames)
+
+    def close(self) -> None:
+        if not self._file.closed:
+            start = time.perf_counter()
+            self._file.close()
+            self.write_s += time.perf_counter() - start
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FfmpegWriter:
+    """Pipe dithered 16-bit PCM into a local ffmpeg to encode Opus or MP3."""
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: int,
+        channels: int = 1,
+        codec: str = "opus",
+        bitrate_kbps: int = LOSSY_BITRATE_KBPS,
+        seed: int | None = None,
+    ):
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError(f"{codec} output needs an ffmpeg binary on PATH.")
+        self.path = path
+        self.frames_written = 0
+        self.encode_s = 0.0
+        self.write_s = 0.0
+        self._rng = np.random.default_rng(seed)
+        self._process = subprocess.Popen(
+            [
+                ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+                "-f", "s16le", "-ar", str(sample_rate), "-ac", str(channels), "-i", "-",
+                "-c:a", FFMPEG_CODECS[codec], "-b:a", f"{bitrate_kbps}k", path,
+            ],
+            stdin=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+    def write(self, frames: np.ndarray) -> None:
+        frames = np.asarray(frames)
+        for block in _blocks(frames):
+            start = time.perf_counter()
+            samples = quantize(block.astype(np.float32, copy=False), 16, self._rng).astype("<i2").tobytes()
+            encoded = time.perf_counter()
+            self._process.stdin.write(samples)  # blocks while ffmpeg encodes, so counts as write time
+            self.encode_s += encoded - start
+            self.write_s += time.perf_counter() - encoded
+        self.frames_written += len(frames)
+
+    def close(self) -> None:
+        if self._process.stdin.closed:
+            return
+        start = time.perf_counter()
+        self._process.stdin.close()
+        stderr = self._process.stderr.read().decode("utf-8", "replace").strip()
+        returncode = self._process.wait()
+        self.write_s += time.perf_counter() - start
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to encode {self.path}: {stderr}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PreallocatedWavWriter:
+    """
+    WAV writer for a length known up front.
+
+    The header is written with its final sizes and the file is extended to
+    full length at once; frames are then encoded into a memory map of it,
+    in order with write() or anywhere with write_at(). Frames that are
+    never written read back as silence.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: int,
+        frames: int,
+        channels: int = 1,
+        sample_format: str = "float32",
+        seed: int | None = None,
+    ):
+        if sample_format not in WAV_SAMPLE_FORMATS:
+            raise ValueError(
+                f"sample_format must be one of {', '.join(WAV_SAMPLE_FORMATS)} (got {sample_format!r})."
+            )
+        self.path = path
+        self.frames = frames
+        self.channels = channels
+        self.bits = WAV_SAMPLE_FORMATS[sample_format]
+        self.frames_written = 0
+        self.encode_s = 0.0
+        start = time.perf_counter()
+        header = wav_header(sample_rate, channels, sample_format, frames * channels * self.bits // 8)
+        with open(path, "wb") as f:
+            f.write(header)
+            f.truncate(len(header) + frames * channels * self.bits // 8)
+        self._wav = WavReader(path, mode="r+")
+        self._rng = np.random.default_rng(seed)
+        self.write_s = time.perf_counter() - start
+
+    def write(self, frames: np.ndarray) -> None:
+        """Append frames after the last ones written."""
+        self.write_at(self.frames_written, frames)
+
+    def write_at(self, start: int, frames: np.ndarray) -> None:
+        """Fill frames from `start` (shape (n,) or (n, channels), float audio in [-1, 1])."""
+        frames = np.asarray(frames)
+        if start < 0 or start + len(frames) > self.frames:
+            raise ValueError(
+                f"Frames {start}..{start + len(frames)} are outside the {self.frames} preallocated in {self.path}."
+            )
+        position = start
+        for block in _blocks(frames):
+            begin = time.perf_counter()
+            samples = encode_samples(block.reshape(len(block), self.channels), self.bits, self._rng)
+            encoded = time.perf_counter()
+            self._wav.data[position:position + len(block)] = samples
+            self._wav.release(position, position + len(block))
+            self.encode_s += encoded - begin
+            self.write_s += time.perf_counter() - encoded
+            position += len(block)
+        self.frames_written = max(self.frames_written, position)
+
+    def close(self) -> None:
+        if self._wav.data is None:
+            return
+        start = time.perf_counter()
+        self._wav.close()
+        self.write_s += time.perf_counter() - start
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_writer(
+    path: str,
+    sample_rate: int,
+    codec: str = "float32",
+    channels: int = 1,
+    seed: int | None = None,
+    frames: int | None = None,
+):
+    """
+    Return an incremental writer for `codec` (see CODECS); `seed` fixes the
+    dither. When the total number of frames is known, WAV output is
+    preallocated (PreallocatedWavWriter) instead of streamed.
+    """
+    if codec in WAV_SAMPLE_FORMATS and frames is not None:
+        return PreallocatedWavWriter(path, sample_rate, frames, channels, sample_format=codec, seed=seed)
+    if codec in WAV_SAMPLE_FORMATS:
+        return StreamingWavWriter(path, sample_rate, channels, sample_format=codec, seed=seed)
+    if codec == "flac":
+        return FlacWriter(path, sample_rate, channels, seed=seed)
+    if codec in FFMPEG_CODECS:
+        return FfmpegWriter(path, sample_rate, channels, codec=codec, seed=seed)
+    raise ValueError(f"codec must be one of {', '.join(CODECS)} (got {codec!r}).")
+
+
+def encode_audio(
+    path: str,
+    audio: np.ndarray,
+    sample_rate: int,
+    codec: str = "float32",
+    seed: int | None = None,
+    timings: dict | None = None,
+) -> int:
+    """
+    Write a whole waveform with the given codec; returns the number of
+    frames written. If `timings` is given, "encode_s" and "write_s" are
+    stored in it.
+    """
+    channels = 1 if audio.ndim == 1 else audio.shape[1]
+    with open_writer(path, sample_rate, codec, channels=channels, seed=seed, frames=len(audio)) as writer:
+        writer.write(audio)
+    if timings is not None:
+        timings.update(encode_s=writer.encode_s, write_s=writer.write_s)
+    return writer.frames_written
+
+
+def crossfade(tail: np.ndarray, head: np.ndarray) -> np.ndarray:
+    """Equal-power crossfade from `tail` into `head` (same length)."""
+    t = np.linspace(0.0, 1.0, len(tail), dtype=np.float32)
+    return tail * np.cos(t * np.pi / 2) + head * np.sin(t * np.pi / 2)
+
+
+class WavReader:
+    """
+    Memory-mapped WAV reader.
+
+    Only the header is parsed up front; samples are paged in by the OS as
+    read() / blocks() touch them. `data` is the raw memmap of the data
+    chunk, shape (frames, channels) (or (frames, channels, 3) bytes for
+    24-bit PCM).
+
+    With mode="r+", write() and transform() change float32, 16- and
+    24-bit files in place (integer samples are re-dithered, see `seed`).
+    """
+
+    def __init__(self, path: str, mode: str = "r", seed: int | None = None):
+        if mode not in ("r", "r+"):
+            raise ValueError(f"mode must be 'r' or 'r+' (got {mode!r}).")
+        self.path = path
+        self.mode = mode
+        self._rng = np.random.default_rng(seed)
+        with open(path, "rb") as f:
+            riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+            if riff != b"RIFF" or wave != b"WAVE":
+                raise ValueError(f"{path} is not a RIFF/WAVE file.")
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ValueError(f"{path} has no data chunk.")
+                chunk_id, size = struct.unpack("<4sI", header)
+                if chunk_id == b"fmt ":
+                    fmt = f.read(size)
+                    f.seek(size % 2, 1)
+                elif chunk_id == b"data":
+                    offset = f.tell()
+                    break
+                else:
+                    f.seek(size + size % 2, 1)
+        if fmt is None:
+            raise ValueError(f"{path} has no fmt chunk.")
+
+        format_tag, self.channels, self.sample_rate, _, _, self.bits = struct.unpack("<HHIIHH", fmt[:16])
+        if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            format_tag = struct.unpack("<H", fmt[24:26])[0]  # first two bytes of the SubFormat GUID
+        if format_tag == WAVE_FORMAT_IEEE_FLOAT and self.bits == 32:
+            dtype, self._scale = np.dtype("<f4"), None
+        elif format_tag == WAVE_FORMAT_PCM and self.bits in (8, 16, 24, 32):
+            dtype = {8: np.dtype("u1"), 16: np.dtype("<i2"), 24: np.dtype("u1"), 32: np.dtype("<i4")}[self.bits]
+            self._scale = np.float32(1.0 / 2 ** (self.bits - 1))
+        else:
+            raise ValueError(f"{path}: unsupported WAV format {format_tag} with {self.bits} bits per sample.")
+        self.sample_format = next(
+            (name for name, bits in WAV_SAMPLE_FORMATS.items()
+             if bits == self.bits and (format_tag == WAVE_FORMAT_IEEE_FLOAT) == (name == "float32")),
+            None,
+        )
+
+        # A writer that crashed leaves size 0 in the header; trust the file length instead
+        frame_bytes = self.channels * self.bits // 8
+        available = os.path.getsize(path) - offset
+        if size == 0 or size > available:
+            size = available
+        self.frames = size // frame_bytes
+        shape = (self.frames, self.channels, 3) if self.bits == 24 else (self.frames, self.channels)
+        self.data = np.memmap(path, dtype=dtype, mode=mode, offset=offset, shape=shape) if self.frames else \
+            np.zeros(shape, dtype=dtype)
+        self._frame_bytes = frame_bytes
+        self._map_offset = offset % mmap.ALLOCATIONGRANULARITY  # where the data starts inside the mapping
+
+    @property
+    def duration_s(self) -> float:
+        return self.frames / self.sample_rate
+
+    def read(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        """Frames [start, stop) as float32 in [-1, 1], shape (n, channels)."""
+        raw = self.data[start:stop]
+        if self._scale is None:
+            return np.array(raw, dtype=np.float32)
+        if self.bits == 24:
+            # Assemble little-endian 3-byte samples; the int8 top byte carries the sign
+            samples = raw[..., 0].astype(np.int32)
+            samples |= raw[..., 1].astype(np.int32) << 8
+            samples |= raw[..., 2].view(np.int8).astype(np.int32) << 16
+        elif self.bits == 8:
+            samples = raw.astype(np.int32) - 128  # 8-bit WAV is unsigned
+        else:
+            samples = raw
+        block = samples.astype(np.float32)
+        block *= self._scale
+        return block
+
+    def blocks(self, block_frames: int = ENCODE_BLOCK_FRAMES):
+        for start in range(0, self.frames, block_frames):
+            yield self.read(start, start + block_frames)
+            self.release(start, start + block_frames)
+
+    def release(self, start: int, stop: int) -> None:
+        """
+        Drop frames [start, stop) from this process's resident memory once
+        they have been processed. The file (and any changes written to the
+        shared mapping) is not affected; pages are read back on next access.
+        """
+        mapping = getattr(self.data, "_mmap", None)
+        if mapping is None or not hasattr(mapping, "madvise"):
+            return
+        begin = self._map_offset + start * self._frame_bytes
+        end = self._map_offset + min(stop, self.frames) * self._frame_bytes
+        begin -= begin % mmap.PAGESIZE
+        if end > begin:
+            mapping.madvise(mmap.MADV_DONTNEED, begin, end - begin)
+
+    def write(self, start: int, frames: np.ndarray) -> None:
+        """Overwrite frames from `start` with float audio in [-1, 1] (mode "r+" only)."""
+        if self.mode != "r+":
+            raise RuntimeError(f"{self.path} is opened read-only; use mode='r+' to change it in place.")
+        if self.sample_format is None:
+            raise ValueError(f"{self.path}: in-place writes support {', '.join(WAV_SAMPLE_FORMATS)} files only.")
+        frames = np.asarray(frames).reshape(-1, self.channels)
+        if start < 0 or start + len(frames) > self.frames:
+            raise ValueError(f"Frames {start}..{start + len(frames)} are outside {self.path} ({self.frames} frames).")
+        self.data[start:start + len(frames)] = encode_samples(frames, self.bits, self._rng)
+
+    def transform(self, fn, start: int = 0, stop: int | None = None, block_frames: int = ENCODE_BLOCK_FRAMES) -> None:
+        """Replace frames [start, stop) block by block with fn(block, block_start) (mode "r+" only)."""
+        stop = self.frames if stop is None else min(stop, self.frames)
+        for block_start in range(start, stop, block_frames):
+            block_stop = min(block_start + block_frames, stop)
+            self.write(block_start, fn(self.read(block_start, block_stop), block_start))
+            self.release(block_start, block_stop)
+
+    def flush(self) -> None:
+        if isinstance(self.data, np.memmap) and self.mode == "r+":
+            self.data.flush()
+
+    def close(self) -> None:
+        if self.data is not None:
+            self.flush()
+        self.data = None  # the mapping is released once no block still refers to it
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FfmpegReader:
+    """
+    Decode any file ffmpeg understands (MP3, Opus, ...) to float32 frames
+    through a pipe. The sample rate and channel count come from ffprobe
+    unless given. frames is unknown (None) until the stream has been read.
+    """
+
+    def __init__(self, path: str, sample_rate: int | None = None, channels: int | None = None):
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError(f"Reading {os.path.splitext(path)[1] or path} files needs an ffmpeg binary on PATH.")
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self._ffmpeg = ffmpeg
+        if sample_rate is None or channels is None:
+            probed_rate, probed_channels = self._probe()
+            sample_rate = sample_rate or probed_rate
+            channels = channels or probed_channels
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames = None
+
+    def _probe(self) -> tuple[int, int]:
+        ffprobe = shutil.which("ffprobe")
+        if ffprobe is None:
+            raise RuntimeError("Pass sample_rate and channels, or put ffprobe on PATH.")
+        output = subprocess.run(
+            [ffprobe, "-v", "error", "-select_streams", "a:0",
+             "-show_entries", "stream=sample_rate,channels", "-of", "json", self.path],
+            capture_output=True, check=True,
+        ).stdout
+        stream = json.loads(output)["streams"][0]
+        return int(stream["sample_rate"]), int(stream["channels"])
+
+    @property
+    def duration_s(self) -> float | None:
+        return None if self.frames is None else self.frames / self.sample_rate
+
+    def blocks(self, block_frames: int = ENCODE_BLOCK_FRAMES):
+        process = subprocess.Popen(
+            [
+                self._ffmpeg, "-hide_banner", "-loglevel", "error", "-i", self.path,
+                "-f", "f32le", "-ar", str(self.sample_rate), "-ac", str(self.channels), "-",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        frame_bytes = 4 * self.channels
+        frames = 0
+        try:
+            while True:
+                data = process.stdout.read(block_frames * frame_bytes)
+                usable = len(data) - len(data) % frame_bytes
+                if usable:
+                    frames += usable // frame_bytes
+                    yield np.frombuffer(data[:usable], dtype="<f4").reshape(-1, self.channels)
+                if len(data) < block_frames * frame_bytes:
+                    break
+        finally:
+            process.stdout.close()
+            stderr = process.stderr.read().decode("utf-8", "replace").strip()
+            returncode = process.wait()
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to decode {self.path}: {stderr}")
+        self.frames = frames
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_reader(path: str):
+    """Return a block reader for `path`: memory-mapped for WAV, ffmpeg-decoded otherwise."""
+    if path.lower().endswith((".wav", ".wave")):
+        return WavReader(path)
+    return FfmpegReader(path)
+
+
+def peak(path: str, block_frames: int = ENCODE_BLOCK_FRAMES) -> float:
+    """Largest absolute sample value of a WAV file."""
+    with WavReader(path) as wav:
+        return max((float(np.abs(block).max()) for block in wav.blocks(block_frames)), default=0.0)
+
+
+def normalize(path: str, peak_dbfs: float = -1.0, seed: int | None = None) -> float:
+    """Scale a WAV file in place so its peak is `peak_dbfs`; returns the gain applied."""
+    current = peak(path)
+    if current == 0:
+        return 1.0
+    gain = np.float32(10 ** (peak_dbfs / 20) / current)
+    with WavReader(path, mode="r+", seed=seed) as wav:
+        wav.transform(lambda block, _: block * gain)
+    return float(gain)
+
+
+def fade(path: str, fade_in_s: float = 0.0, fade_out_s: float = 0.0, seed: int | None = None) -> None:
+    """Apply equal-power fades to the start and end of a WAV file in place; the middle is not touched."""
+    with WavReader(path, mode="r+", seed=seed) as wav:
+        fade_in = min(int(fade_in_s * wav.sample_rate), wav.frames)
+        fade_out = min(int(fade_out_s * wav.sample_rate), wav.frames)
+        begin = wav.frames - fade_out
+
+        def fade_in_curve(block, start):
+            phase = (np.arange(start, start + len(block)) + 0.5) / fade_in * np.pi / 2
+            return block * np.sin(phase).astype(np.float32)[:, None]
+
+        def fade_out_curve(block, start):
+            phase = (np.arange(start - begin, start - begin + len(block)) + 0.5) / fade_out * np.pi / 2
+            return block * np.cos(phase).astype(np.float32)[:, None]
+
+        if fade_in:
+            wav.transform(fade_in_curve, 0, fade_in)
+        if fade_out:
+            wav.transform(fade_out_curve, begin)
+
+
+def transform_wav(
+    src: str,
+    dst: str,
+    fn=None,
+    start_s: float = 0.0,
+    end_s: float | None = None,
+    codec: str | None = None,
+    seed: int | None = None,
+) -> int:
+    """
+    Write [start_s, end_s) of the WAV file `src` to `dst`, block by block
+    through fn(block, block_start) if given (block_start counts from the
+    start of the output). `codec` defaults to the format of `src`. Returns
+    the number of frames written.
+    """
+    with WavReader(src) as wav:
+        start = min(int(start_s * wav.sample_rate), wav.frames)
+        stop = wav.frames if end_s is None else min(int(end_s * wav.sample_rate), wav.frames)
+        stop = max(start, stop)
+        codec = codec or wav.sample_format or "float32"
+        with open_writer(dst, wav.sample_rate, codec, wav.channels, seed=seed, frames=stop - start) as writer:
+            for block_start in range(start, stop, ENCODE_BLOCK_FRAMES):
+                block_stop = min(block_start + ENCODE_BLOCK_FRAMES, stop)
+                block = wav.read(block_start, block_stop)
+                writer.write(block if fn is None else fn(block, block_start - start))
+                wav.release(block_start, block_stop)
+    return writer.frames_written
+
+
+def concat_wavs(paths: list[str], dst: str, codec: str = "float32", seed: int | None = None) -> int:
+    """Join WAV files with the same sample rate and channel count into `dst`; returns the frames written."""
+    if not paths:
+        raise ValueError("concat_wavs needs at least one input file.")
+    readers = [WavReader(path) for path in paths]
+    try:
+        first = readers[0]
+        for wav in readers[1:]:
+            if (wav.sample_rate, wav.channels) != (first.sample_rate, first.channels):
+                raise ValueError(
+                    f"{wav.path} is {wav.sample_rate} Hz x {wav.channels}, "
+                    f"expected {first.sample_rate} Hz x {first.channels} like {first.path}."
+                )
+        total = sum(wav.frames for wav in readers)
+        with open_writer(dst, first.sample_rate, codec, first.channels, seed=seed, frames=total) as writer:
+            for wav in readers:
+                for block in wav.blocks():
+                    writer.write(block)
+    finally:
+        for wav in readers:
+            wav.close()
+    return writer.frames_written
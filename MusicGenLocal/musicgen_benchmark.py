@@ -0,0 +1,325 @@
+"""
+MusicGen Local - Benchmark Suite
+=================================
+Sweeps model size, duration, batch size, thread count and precision,
+running every configuration in a fresh subprocess so that cold-load time
+and peak RSS are measured in isolation. Each worker loads the model with
+_load_model() and times one seeded generate_music_batch() call.
+
+Reported per configuration:
+  - cold_load_s        _load_model() wall time (hub or snapshot)
+  - generation_s       model time for the batch (result generation_time_s)
+  - tokens_per_s       generated tokens per second, summed over the batch
+  - real_time_factor   seconds of audio produced per wall-clock second
+  - peak_rss_mb        peak resident memory of the worker process
+  - spectral_cosine    similarity of the average magnitude spectrum to the
+                       fp32 run of the same configuration (precision check)
+
+Results are written as JSON. Pass --baseline to compare against a saved
+run; the process exits with status 1 if any configuration regressed by
+more than REGRESSION_TOLERANCE, so it can gate CI.
+
+Usage:
+  python musicgen_benchmark.py                                  # precision comparison
+  python musicgen_benchmark.py --sizes small medium --durations 10 30 \\
+      --batch-sizes 1 4 --threads 4 8 --precisions fp32 int8
+  python musicgen_benchmark.py --output bench.json --baseline baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import itertools
+import tempfile
+import subprocess
+import numpy as np
+
+from musicgen_utils import MODEL_SIZE, MODEL_SIZES, PRECISIONS, SAMPLE_RATE, TOKENS_PER_SECOND, snapshot_dir
+from audio_io import WavReader
+
+BENCHMARK_PROMPTS = [
+    "A relaxing lo-fi beat with soft piano and vinyl crackle",
+    "An upbeat pop song with bright guitars and punchy drums",
+    "An epic orchestral piece with rising strings and brass",
+    "A slow acoustic folk tune with fingerpicked guitar",
+]
+BENCHMARK_DURATION_S = 10
+BENCHMARK_SEED = 0
+BENCHMARK_FILE = "benchmark_results.json"
+SPECTRUM_FFT_SIZE = 2048
+
+# Relative change that counts as a regression against the baseline
+REGRESSION_TOLERANCE = 0.10
+# metric -> True if higher is better
+COMPARED_METRICS = {
+    "real_time_factor": True,
+    "tokens_per_s": True,
+    "peak_rss_mb": False,
+    "cold_load_s": False,
+}
+CONFIG_FIELDS = ("model_size", "precision", "duration_s", "batch_size", "threads")
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+
+
+def _run_worker(duration_s: int, batch_size: int, threads: int, seed: int, audio_path: str) -> dict:
+    """Load the model (size/precision from the environment) and time one batch."""
+    import torch
+
+    torch.set_num_threads(threads)
+
+    from musicgen_utils import MODEL_SIZE, PRECISION, DEVICE
+    from musicgen_generate import _load_model, generate_music_batch
+
+    load_start = time.time()
+    _load_model()
+    cold_load = round(time.time() - load_start, 3)
+
+    prompts = [BENCHMARK_PROMPTS[i % len(BENCHMARK_PROMPTS)] for i in range(batch_size)]
+    start_time = time.time()
+    results = generate_music_batch(prompts, duration_s, seed=seed, use_cache=False)
+    wall = time.time() - start_time
+
+    generation_s = max(r["generation_time_s"] for r in results)
+    audio_s = sum(r["duration_actual_s"] for r in results)
+    with WavReader(results[0]["output_file"]) as wav:
+        np.save(audio_path, wav.read().reshape(-1))
+
+    return {
+        "model_size": MODEL_SIZE,
+        "precision": PRECISION,
+        "device": DEVICE,
+        "duration_s": duration_s,
+        "batch_size": batch_size,
+        "threads": threads,
+        "cold_load_s": cold_load,
+        "generation_s": generation_s,
+        "tokens_per_s": round(batch_size * duration_s * TOKENS_PER_SECOND / generation_s, 1),
+        "real_time_factor": round(audio_s / wall, 3),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> float:
+    n = min(len(a), len(b))
+    a, b = a[:n].astype(np.float64), b[:n].astype(np.float64)
+    denom = np.linalg.norm(a) * np.linalg.norm(b)
+    return round(float(a @ b / denom), 4) if denom else 0.0
+
+
+def _average_spectrum(audio: np.ndarray) -> np.ndarray:
+    frames = len(audio) // SPECTRUM_FFT_SIZE
+    if frames == 0:
+        return np.abs(np.fft.rfft(audio, SPECTRUM_FFT_SIZE))
+    blocks = audio[:frames * SPECTRUM_FFT_SIZE].reshape(frames, SPECTRUM_FFT_SIZE)
+    return np.abs(np.fft.rfft(blocks * np.hanning(SPECTRUM_FFT_SIZE), axis=1)).mean(axis=0)
+
+
+def config_key(result: dict) -> tuple:
+    return tuple(result[field] for field in CONFIG_FIELDS)
+
+
+def sweep_configs(
+    sizes=(MODEL_SIZE,),
+    durations=(BENCHMARK_DURATION_S,),
+    batch_sizes=(1,),
+    threads=(None,),
+    precisions=PRECISIONS,
+) -> list[dict]:
+    """Cartesian product of the sweep axes (threads=None means all cores)."""
+    default_threads = os.cpu_count() or 1
+    return [
+        {"model_size": size, "precision": precision, "duration_s": duration,
+         "batch_size": batch, "threads": n_threads or default_threads}
+        for size, duration, batch, n_threads, precision
+        in itertools.product(sizes, durations, batch_sizes, threads, precisions)
+    ]
+
+
+def run_sweep(configs: list[dict], seed: int = BENCHMARK_SEED) -> list[dict]:
+    """Run every configuration in its own subprocess and collect the results."""
+    results = []
+    audio = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n, config in enumerate(configs, 1):
+            label = ", ".join(f"{field}={config[field]}" for field in CONFIG_FIELDS)
+            print(f"[MusicGen] Benchmark {n}/{len(configs)}: {label}")
+            audio_path = os.path.join(tmp_dir, f"{n}.npy")
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker",
+                 "--durations", str(config["duration_s"]),
+                 "--batch-sizes", str(config["batch_size"]),
+                 "--threads", str(config["threads"]),
+                 "--seed", str(seed), "--audio-path", audio_path],
+                env={
+                    **os.environ,
+                    "PYTHONPATH": os.pathsep.join(
+                        filter(None, [os.path.dirname(os.path.abspath(__file__)), os.environ.get("PYTHONPATH")])
+                    ),
+                    "MUSICGEN_MODEL_SIZE": config["model_size"],
+                    "MUSICGEN_PRECISION": config["precision"],
+                    # Workers run in tmp_dir, so a relative snapshot path would never be found
+                    "MUSICGEN_SNAPSHOT_DIR": os.path.abspath(snapshot_dir(config["model_size"], config["precision"])),
+                    "MUSICGEN_CODEC": "float32",
+                    "OMP_NUM_THREADS": str(config["threads"]),
+                },
+                cwd=tmp_dir,
+                capture_output=True,
+                text=True,
+            )
+            if proc.returncode != 0:
+                error = (proc.stderr.strip().splitlines() or ["worker failed"])[-1]
+                print(f"[MusicGen]  failed: {error}")
+                results.append({**config, "error": error})
+                continue
+
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            audio[config_key(result)] = np.load(audio_path)
+            results.append(result)
+
+    for result in results:
+        if "error" in result:
+            continue
+        reference = audio.get(config_key({**result, "precision": "fp32"}))
+        if reference is not None:
+            result["spectral_cosine"] = _cosine(
+                _average_spectrum(reference), _average_spectrum(audio[config_key(result)])
+            )
+    return results
+
+
+def compare_to_baseline(
+    results: list[dict],
+    baseline: list[dict],
+    tolerance: float = REGRESSION_TOLERANCE,
+) -> list[dict]:
+    """
+    Pair results with baseline entries of the same configuration and flag
+    metrics that got worse by more than `tolerance` (relative).
+    """
+    baseline_by_key = {config_key(r): r for r in baseline if "error" not in r}
+    comparisons = []
+    for result in results:
+        if "error" in result:
+            continue
+        base = baseline_by_key.get(config_key(result))
+        if base is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = change < -tolerance if higher_is_better else change > tolerance
+            comparisons.append({
+                "config": dict(zip(CONFIG_FIELDS, config_key(result))),
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change_pct": round(change * 100, 1),
+                "regressed": regressed,
+            })
+    return comparisons
+
+
+def print_benchmark(results: list[dict]):
+    print()
+    print("=" * 100)
+    print(f"  {'Size':<7s} {'Prec':<5s} {'Dur':>4s} {'Batch':>5s} {'Thr':>4s} {'Load':>8s} "
+          f"{'Gen':>8s} {'Tok/s':>8s} {'RTF':>7s} {'Peak RSS':>10s} {'Spec cos':>9s}")
+    print(f"  {'─' * 7} {'─' * 5} {'─' * 4} {'─' * 5} {'─' * 4} {'─' * 8} {'─' * 8} {'─' * 8} "
+          f"{'─' * 7} {'─' * 10} {'─' * 9}")
+    for r in results:
+        head = f"  {r['model_size']:<7s} {r['precision']:<5s} {r['duration_s']:>4d} {r['batch_size']:>5d} {r['threads']:>4d}"
+        if "error" in r:
+            print(f"{head} FAILED: {r['error'][:50]}")
+            continue
+        print(f"{head} {r['cold_load_s']:>7.2f}s {r['generation_s']:>7.2f}s {r['tokens_per_s']:>8.1f} "
+              f"{r['real_time_factor']:>6.2f}x {r['peak_rss_mb']:>7.0f} MB "
+              f"{r.get('spectral_cosine', float('nan')):>9.4f}")
+    print("=" * 100)
+
+
+def print_comparison(comparisons: list[dict]):
+    print()
+    print(f"  Baseline comparison (tolerance {REGRESSION_TOLERANCE:.0%})")
+    print(f"  {'Configuration':<42s} {'Metric':<17s} {'Baseline':>10s} {'Current':>10s} {'Change':>8s}")
+    print(f"  {'─' * 42} {'─' * 17} {'─' * 10} {'─' * 10} {'─' * 8}")
+    for c in comparisons:
+        cfg = c["config"]
+        label = f"{cfg['model_size']}/{cfg['precision']} {cfg['duration_s']}s x{cfg['batch_size']} t{cfg['threads']}"
+        flag = "  REGRESSED" if c["regressed"] else ""
+        print(f"  {label:<42s} {c['metric']:<17s} {c['baseline']:>10} {c['current']:>10} "
+              f"{c['change_pct']:>+7.1f}%{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark MusicGen across sizes, durations, batches, threads and precisions")
+    parser.add_argument("--sizes", nargs="+", default=[MODEL_SIZE], choices=MODEL_SIZES)
+    parser.add_argument("--durations", nargs="+", type=int, default=[BENCHMARK_DURATION_S])
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1])
+    parser.add_argument("--threads", nargs="+", type=int, default=[None])
+    parser.add_argument("--precisions", nargs="+", default=list(PRECISIONS), choices=PRECISIONS)
+    parser.add_argument("--seed", type=int, default=BENCHMARK_SEED)
+    parser.add_argument("--output", default=BENCHMARK_FILE)
+    parser.add_argument("--baseline", default=None, help="earlier benchmark JSON to compare against")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--audio-path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = _run_worker(args.durations[0], args.batch_sizes[0], args.threads[0], args.seed, args.audio_path)
+        print(json.dumps(result))
+        sys.exit(0)
+
+    configs = sweep_configs(args.sizes, args.durations, args.batch_sizes, args.threads, args.precisions)
+
+    print("=" * 100)
+    print("  MusicGen Local - Benchmark Suite")
+    print(f"  {len(configs)} configuration(s) | Seed: {args.seed} | "
+          f"{platform.processor() or platform.machine()} x{os.cpu_count()}")
+    print("=" * 100)
+
+    results = run_sweep(configs, args.seed)
+    print_benchmark(results)
+
+    output = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "sample_rate": SAMPLE_RATE,
+        "results": results,
+    }
+
+    regressed = False
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        comparisons = compare_to_baseline(results, baseline)
+        print_comparison(comparisons)
+        output["baseline"] = args.baseline
+        output["comparison"] = comparisons
+        regressed = any(c["regressed"] for c in comparisons)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"[MusicGen] Benchmark saved to: {args.output}")
+
+    if regressed:
+        print("[MusicGen] Performance regression against baseline")
+        sys.exit(1)
+    if any("error" in r for r in results):
+        sys.exit(1)
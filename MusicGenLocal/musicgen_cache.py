@@ -0,0 +1,207 @@
+"""
+MusicGen Local - Generation Cache
+==================================
+Content-addressed on-disk cache in front of generate_music().
+
+Each entry is stored as <key>.wav + <key>.json, where the key is a
+SHA-256 of everything that determines the output: model, precision,
+prompt, duration, sampling parameters, seed and output codec (the audio
+file keeps the .wav suffix whatever the codec). Entries are evicted
+least recently used first (by file mtime, refreshed on every hit) once
+the cache grows beyond CACHE_MAX_BYTES.
+
+Every cached prompt is also added to a prompt similarity index
+(aimusic.prompt_index), under a namespace that hashes everything but the
+prompt and seed, so a miss can be served from the track of a
+near-duplicate prompt instead.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+
+import numpy as np
+
+from musicgen_utils import (
+    MODEL_NAME,
+    MODEL_SIZE,
+    PRECISION,
+    OUTPUT_CODEC,
+    SAMPLING_PARAMS,
+    CACHE_DIR,
+    CACHE_MAX_BYTES,
+    PROMPT_EMBEDDER,
+    PROMPT_EMBEDDERS,
+)
+from aimusic.prompt_index import INDEX_DIM, get_index
+
+# Fixed seed of the random projection from text-encoder width to INDEX_DIM,
+# so every process (and every run) maps prompts to the same vectors
+PROJECTION_SEED = 1770
+
+
+def cache_key(
+    prompt: str,
+    duration_s: int,
+    seed: int | None = None,
+    model_name: str = MODEL_NAME,
+    sampling_params: dict | None = None,
+    precision: str = PRECISION,
+    codec: str = OUTPUT_CODEC,
+) -> str:
+    """Hash the generation inputs into a stable cache key."""
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "precision": precision,
+            "prompt": prompt,
+            "duration_s": duration_s,
+            "sampling": sampling_params if sampling_params is not None else SAMPLING_PARAMS,
+            "seed": seed,
+            "codec": codec,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def reuse_namespace(
+    duration_s: int,
+    model_name: str = MODEL_NAME,
+    sampling_params: dict | None = None,
+    precision: str = PRECISION,
+    codec: str = OUTPUT_CODEC,
+) -> str:
+    """Prompt index namespace: the cache key inputs except the prompt and seed."""
+    key = cache_key("", duration_s, None, model_name, sampling_params, precision, codec)
+    return f"musicgen:{key[:16]}"
+
+
+class TextEncoderEmbedder:
+    """
+    Prompt vectors from MusicGen's own text encoder (T5): hidden states
+    mean-pooled over the prompt tokens, then randomly projected down to
+    INDEX_DIM (which preserves cosine similarity closely). Loads the model.
+    """
+
+    name = f"text-encoder-{MODEL_SIZE}"
+    uses_idf = False
+
+    def __init__(self, dim: int = INDEX_DIM):
+        self.dim = dim
+        self._projection = None
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        import torch
+        from musicgen_generate import _load_model
+
+        model, processor = _load_model()
+        inputs = processor(text=texts, padding=True, return_tensors="pt").to(model.device)
+        with torch.inference_mode():
+            hidden = model.text_encoder(
+                input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"],
+            ).last_hidden_state.float()
+        mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = ((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)).cpu().numpy()
+
+        if self._projection is None:
+            rng = np.random.default_rng(PROJECTION_SEED)
+            self._projection = (rng.standard_normal((pooled.shape[1], self.dim)) / np.sqrt(self.dim)).astype(np.float32)
+        return pooled @ self._projection
+
+
+def get_prompt_index():
+    """Return the process-wide prompt index for PROMPT_EMBEDDER."""
+    if PROMPT_EMBEDDER not in PROMPT_EMBEDDERS:
+        raise ValueError(f"MUSICGEN_PROMPT_EMBEDDER must be one of {', '.join(PROMPT_EMBEDDERS)} "
+                         f"(got {PROMPT_EMBEDDER!r}).")
+    return get_index(TextEncoderEmbedder() if PROMPT_EMBEDDER == "text-encoder" else None)
+
+
+class GenerationCache:
+    """On-disk WAV + metadata store with a size cap and LRU eviction."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.wav", f"{base}.json"
+
+    def get(self, key: str) -> dict | None:
+        """Return the stored result (with 'cached_file') or None on a miss."""
+        wav_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(wav_path)
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            return None
+
+        result["cached_file"] = wav_path
+        return result
+
+    def put(self, key: str, audio_path: str, result: dict) -> None:
+        """Store a freshly generated WAV and its result dict, then evict if needed."""
+        wav_path, meta_path = self._paths(key)
+
+        # A copy, not a hard link: the output file is rewritten in place later
+        # (re-encoded to the same name, normalize(), fade()), and a shared
+        # inode would change the cached audio under its old key
+        tmp_wav = f"{wav_path}.tmp"
+        shutil.copyfile(audio_path, tmp_wav)
+        os.replace(tmp_wav, wav_path)
+
+        tmp_meta = f"{meta_path}.tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_meta, meta_path)
+
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop least recently used entries until under max_bytes. Returns entries removed."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".wav"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name[:-len(".wav")]))
+            total += stat.st_size
+
+        removed = 0
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            removed += 1
+
+        if removed:
+            print(f"[MusicGen] Cache: evicted {removed} entr{'y' if removed == 1 else 'ies'}")
+        return removed
+
+
+_cache = None
+
+
+def get_cache() -> GenerationCache:
+    """Return the process-wide cache instance."""
+    global _cache
+    if _cache is None:
+        _cache = GenerationCache()
+    return _cache
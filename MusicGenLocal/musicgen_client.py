@@ -0,0 +1,82 @@
+"""
+MusicGen Local - Inference Server Client
+=========================================
+Minimal stdlib client for musicgen_server.py.
+
+Usage:
+  python musicgen_client.py "A calm piano piece" [--duration 10]
+  python musicgen_client.py --metrics
+"""
+
+import json
+import argparse
+import urllib.error
+import urllib.request
+
+# Mirrors musicgen_utils; duplicated so the client never imports torch
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+CLIENT_TIMEOUT = 3600            # seconds; a request waits for its whole decode
+
+
+def _request(method: str, path: str, body: dict | None, host: str, port: int) -> dict:
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(
+        f"http://{host}:{port}{path}",
+        data=data,
+        method=method,
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=CLIENT_TIMEOUT) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        detail = json.loads(e.read() or b"{}").get("error", e.reason)
+        raise RuntimeError(f"[MusicGen Client] Server error {e.code}: {detail}") from None
+
+
+def generate(
+    prompt: str,
+    duration_s: int | None = None,
+    output_filename: str | None = None,
+    host: str = SERVER_HOST,
+    port: int = SERVER_PORT,
+    seed: int | None = None,
+) -> dict:
+    """Submit a generation request and block until its result is ready."""
+    body = {"prompt": prompt}
+    if duration_s is not None:
+        body["duration_s"] = duration_s
+    if output_filename:
+        body["output_filename"] = output_filename
+    if seed is not None:
+        body["seed"] = seed
+    return _request("POST", "/generate", body, host, port)
+
+
+def get_metrics(host: str = SERVER_HOST, port: int = SERVER_PORT) -> dict:
+    """Fetch the server's latency and queue-depth metrics."""
+    return _request("GET", "/metrics", None, host, port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MusicGen inference server client")
+    parser.add_argument("prompt", nargs="?")
+    parser.add_argument("--duration", type=int, default=None)
+    parser.add_argument("--output-filename", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--metrics", action="store_true", help="print server metrics and exit")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+
+    if args.metrics:
+        print(json.dumps(get_metrics(args.host, args.port), indent=2))
+    elif args.prompt:
+        print(json.dumps(
+            generate(args.prompt, args.duration, args.output_filename, args.host, args.port, args.seed),
+            indent=2,
+            ensure_ascii=False,
+        ))
+    else:
+        parser.error("a prompt is required unless --metrics is given")
@@ -0,0 +1,398 @@
+"""
+MusicGen Local - CPU Execution Profile
+=======================================
+Controls how MusicGen uses the cores of a CPU host:
+
+  - apply_cpu_profile() pins the process to a set of cores and sets
+    torch's intra-op (per-operator) and inter-op thread counts.
+    _load_model() applies the profile from musicgen_utils (the
+    MUSICGEN_INTRA_OP_THREADS / MUSICGEN_INTER_OP_THREADS /
+    MUSICGEN_CPU_AFFINITY variables) unless the process already set one.
+  - plan_workers() picks the "N workers x M threads" split that finishes a
+    batch of jobs soonest, i.e. with the highest aggregate throughput,
+    with no more workers than available memory can hold.
+  - autotune runs every split on this host, measures its throughput and
+    saves the result to CPU_TUNING_FILE, which plan_workers() then uses
+    instead of its built-in scaling estimate.
+
+Usage:
+  python musicgen_cpu.py autotune [--duration 5] [--threads 1 2 4 8]
+  python musicgen_cpu.py plan --jobs 6
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import datetime
+import tempfile
+import subprocess
+
+from musicgen_utils import (
+    MODEL_NAME,
+    PRECISION,
+    CPU_INTRA_OP_THREADS,
+    CPU_INTER_OP_THREADS,
+    CPU_AFFINITY,
+    CPU_TUNING_FILE,
+    WORKER_MEMORY_GB,
+    SNAPSHOT_DIR,
+)
+
+AUTOTUNE_PROMPT = "An upbeat pop song with bright guitars and punchy drums"
+AUTOTUNE_DURATION_S = 5
+AUTOTUNE_SEED = 0
+
+# Parallel fraction assumed for one generation (Amdahl's law) when there is
+# no tuning file; token-by-token decoding keeps it well below 1.
+DEFAULT_PARALLEL_FRACTION = 0.85
+# Inter-op threads per worker in a plan: generate() runs one operator at a
+# time, so extra inter-op threads only compete with the intra-op pool.
+PLAN_INTER_OP_THREADS = 1
+
+_applied = None
+
+
+def parse_cores(spec: str) -> list[int]:
+    """Parse a core list such as "0-3,8,10-11"."""
+    cores = set()
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                first, last = part.split("-")
+                cores.update(range(int(first), int(last) + 1))
+            else:
+                cores.add(int(part))
+        except ValueError:
+            raise ValueError(f"Invalid core list {spec!r} (expected e.g. \"0-3,8\").") from None
+    return sorted(cores)
+
+
+def available_cores() -> list[int]:
+    """Cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cores(cores: list[int], workers: int) -> list[list[int]]:
+    """Split `cores` into `workers` contiguous, near-equal groups."""
+    workers = max(1, min(workers, len(cores)))
+    size, extra = divmod(len(cores), workers)
+    groups, start = [], 0
+    for w in range(workers):
+        end = start + size + (1 if w < extra else 0)
+        groups.append(cores[start:end])
+        start = end
+    return groups
+
+
+def apply_cpu_profile(
+    intra_op_threads: int = 0,
+    inter_op_threads: int = 0,
+    cores: list[int] | None = None,
+) -> dict:
+    """
+    Pin this process to `cores` and set torch's thread pools.
+
+    intra_op_threads defaults to the number of pinned cores (or torch's
+    own default without pinning); 0 leaves a setting unchanged. Inter-op
+    threads can only be set before torch runs parallel work, so a late
+    call keeps the current value. Returns the profile now in effect.
+    """
+    global _applied
+    import torch
+
+    if cores:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores)
+        else:
+            print("[MusicGen] CPU affinity is not supported on this platform; ignoring it")
+            cores = None
+
+    if intra_op_threads or cores:
+        torch.set_num_threads(intra_op_threads or len(cores))
+    if inter_op_threads:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError:
+            print(f"[MusicGen] Inter-op threads already fixed at {torch.get_num_interop_threads()} "
+                  "in this process; keeping them")
+
+    _applied = {
+        "intra_op_threads": torch.get_num_threads(),
+        "inter_op_threads": torch.get_num_interop_threads(),
+        "cores": sorted(cores) if cores else None,
+    }
+    return _applied
+
+
+def ensure_cpu_profile() -> dict:
+    """Apply the configured profile unless one was already applied in this process."""
+    if _applied is None:
+        cores = parse_cores(CPU_AFFINITY) if CPU_AFFINITY else None
+        apply_cpu_profile(CPU_INTRA_OP_THREADS, CPU_INTER_OP_THREADS, cores)
+    return _applied
+
+
+def available_memory_gb() -> float | None:
+    """Memory available to new processes (MemAvailable), or None if unknown."""
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024 ** 2
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES") / 1024 ** 3
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def load_tuning(path: str = CPU_TUNING_FILE) -> dict | None:
+    """Read an autotune result, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def thread_candidates(num_cores: int) -> list[int]:
+    """Powers of two up to the core count, plus the core count itself."""
+    return sorted({2 ** i for i in range(int(math.log2(num_cores)) + 1)} | {num_cores})
+
+
+def _thread_rates(tuning: dict | None, num_cores: int) -> tuple[dict[int, float], str]:
+    """Per-worker speed (audio seconds per second) by thread count, and where it came from."""
+    if tuning and tuning.get("num_cores") == num_cores and tuning.get("model") == MODEL_NAME:
+        rates = {m["threads"]: m["per_worker_rtf"] for m in tuning["measurements"] if m.get("per_worker_rtf")}
+        if rates:
+            return rates, "autotune"
+
+    p = DEFAULT_PARALLEL_FRACTION
+    return {m: 1 / ((1 - p) + p / m) for m in thread_candidates(num_cores)}, "estimate"
+
+
+def plan_workers(
+    num_jobs: int,
+    cores: list[int] | None = None,
+    tuning: dict | None = None,
+    max_workers: int | None = None,
+    memory_gb: float | None = None,
+    worker_memory_gb: float = WORKER_MEMORY_GB,
+) -> dict:
+    """
+    Choose workers x threads for `num_jobs` similar-length jobs.
+
+    Every worker loads its own model, so at most memory_gb (default: the
+    memory available now) // worker_memory_gb workers are planned.
+    For each thread count M, N = cores // M workers (capped by num_jobs,
+    max_workers and memory) run the jobs in ceil(num_jobs / N) rounds; the split with
+    the shortest total time wins, ties going to fewer workers (each one
+    holds its own copy of the model). Per-worker speeds come from `tuning`
+    when it was measured on this many cores, else from Amdahl's law.
+    """
+    cores = cores or available_cores()
+    rates, source = _thread_rates(tuning, len(cores))
+    num_jobs = max(1, num_jobs)
+    if memory_gb is None:
+        memory_gb = available_memory_gb()
+    memory_cap = max(1, int(memory_gb // worker_memory_gb)) if memory_gb is not None else None
+    limit = min(num_jobs, max_workers or num_jobs, memory_cap or num_jobs)
+
+    best = None
+    for threads, rate in sorted(rates.items(), reverse=True):
+        workers = min(len(cores) // threads, limit)
+        if workers < 1:
+            continue
+        makespan = math.ceil(num_jobs / workers) / rate
+        if best is None or makespan < best[0] - 1e-9:
+            best = (makespan, workers, threads)
+
+    if best is None:
+        best = (num_jobs, 1, len(cores))
+    makespan, workers, threads = best
+    return {
+        "workers": workers,
+        "threads": threads,
+        "inter_op_threads": PLAN_INTER_OP_THREADS,
+        "core_groups": split_cores(cores[:workers * threads], workers),
+        "relative_throughput": round(num_jobs / makespan, 3),
+        "source": source,
+        "memory_cap": memory_cap,
+        "available_memory_gb": round(memory_gb, 1) if memory_gb is not None else None,
+        "worker_memory_gb": worker_memory_gb,
+    }
+
+
+def _run_worker(cores: list[int], threads: int, duration_s: int) -> dict:
+    """Autotune worker: load, warm up, wait for "go" on stdin, then time one clip."""
+    apply_cpu_profile(threads, PLAN_INTER_OP_THREADS, cores)
+
+    from musicgen_generate import generate_music
+
+    generate_music(AUTOTUNE_PROMPT, 1, "warmup.wav", seed=AUTOTUNE_SEED, use_cache=False)
+    print("READY", flush=True)
+    sys.stdin.readline()
+
+    start_time = time.time()
+    result = generate_music(
+        AUTOTUNE_PROMPT, duration_s, f"tune_{os.getpid()}.wav", seed=AUTOTUNE_SEED, use_cache=False,
+    )
+    return {"wall_s": round(time.time() - start_time, 3), "audio_s": result["duration_actual_s"]}
+
+
+def _measure_split(core_groups: list[list[int]], threads: int, duration_s: int) -> dict:
+    """Run one worker per core group at the same time and measure their throughput."""
+    script = os.path.abspath(__file__)
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [os.path.dirname(script), os.environ.get("PYTHONPATH")])),
+        "MUSICGEN_CODEC": "float32",
+        "MUSICGEN_SNAPSHOT_DIR": os.path.abspath(SNAPSHOT_DIR),  # workers run in tmp_dir
+        "OMP_NUM_THREADS": str(threads),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        procs = []
+        for n, group in enumerate(core_groups):
+            stderr = open(os.path.join(tmp_dir, f"worker{n}.err"), "w+")
+            proc = subprocess.Popen(
+                [sys.executable, script, "worker", "--cores", ",".join(map(str, group)),
+                 "--threads", str(threads), "--duration", str(duration_s)],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr,
+                cwd=tmp_dir, env=env, text=True,
+            )
+            procs.append((proc, stderr))
+
+        # Start timing only once every worker has loaded the model and warmed up
+        error = None
+        for proc, stderr in procs:
+            for line in proc.stdout:
+                if line.strip() == "READY":
+                    break
+            else:
+                stderr.seek(0)
+                error = (stderr.read().strip().splitlines() or ["worker exited"])[-1]
+        for proc, _ in procs:
+            if proc.poll() is None:
+                proc.stdin.write("go\n")
+                proc.stdin.flush()
+
+        runs = []
+        for proc, stderr in procs:
+            out, _ = proc.communicate()
+            stderr.close()
+            if proc.returncode == 0 and error is None:
+                runs.append(json.loads(out.strip().splitlines()[-1]))
+            elif error is None:
+                error = f"worker exited with status {proc.returncode}"
+
+    measurement = {"workers": len(core_groups), "threads": threads}
+    if error is not None:
+        return {**measurement, "error": error}
+    wall = max(r["wall_s"] for r in runs)
+    return {
+        **measurement,
+        "per_worker_rtf": round(sum(r["audio_s"] / r["wall_s"] for r in runs) / len(runs), 4),
+        "aggregate_rtf": round(sum(r["audio_s"] for r in runs) / wall, 4),
+        "wall_s": wall,
+    }
+
+
+def autotune(
+    duration_s: int = AUTOTUNE_DURATION_S,
+    thread_counts: list[int] | None = None,
+    output_path: str = CPU_TUNING_FILE,
+) -> dict:
+    """
+    Measure aggregate throughput of every workers x threads split that
+    fills the available cores, and save the result to `output_path`.
+    """
+    cores = available_cores()
+    thread_counts = sorted(t for t in (thread_counts or thread_candidates(len(cores))) if 1 <= t <= len(cores))
+
+    measurements = []
+    for threads in thread_counts:
+        workers = len(cores) // threads
+        print(f"[MusicGen] Autotune: {workers} worker(s) x {threads} thread(s) ...")
+        measurement = _measure_split(split_cores(cores[:workers * threads], workers), threads, duration_s)
+        if "error" in measurement:
+            print(f"[MusicGen]  failed: {measurement['error']}")
+        else:
+            print(f"[MusicGen]  aggregate {measurement['aggregate_rtf']}x real time "
+                  f"({measurement['per_worker_rtf']}x per worker)")
+        measurements.append(measurement)
+
+    ok = [m for m in measurements if "error" not in m]
+    if not ok:
+        raise RuntimeError("Autotune failed for every split; see the errors above.")
+    best = max(ok, key=lambda m: m["aggregate_rtf"])
+
+    tuning = {
+        "created_at": datetime.datetime.now().isoformat(),
+        "model": MODEL_NAME,
+        "precision": PRECISION,
+        "num_cores": len(cores),
+        "duration_s": duration_s,
+        "measurements": measurements,
+        "best": {"workers": best["workers"], "threads": best["threads"]},
+    }
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(tuning, f, indent=2)
+    print(f"[MusicGen] Best split: {best['workers']} worker(s) x {best['threads']} thread(s); "
+          f"saved to {output_path}")
+    return tuning
+
+
+def print_tuning(tuning: dict):
+    print()
+    print("=" * 60)
+    print(f"  {'Workers':>8s} {'Threads':>8s} {'Per worker':>12s} {'Aggregate':>11s} {'Wall':>8s}")
+    print(f"  {'─' * 8} {'─' * 8} {'─' * 12} {'─' * 11} {'─' * 8}")
+    for m in tuning["measurements"]:
+        if "error" in m:
+            print(f"  {m['workers']:>8d} {m['threads']:>8d}  FAILED: {m['error'][:30]}")
+            continue
+        marker = "  <- best" if (m["workers"], m["threads"]) == tuple(tuning["best"].values()) else ""
+        print(f"  {m['workers']:>8d} {m['threads']:>8d} {m['per_worker_rtf']:>11.2f}x "
+              f"{m['aggregate_rtf']:>10.2f}x {m['wall_s']:>7.1f}s{marker}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune MusicGen CPU threading")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="{autotune,plan}")
+
+    tune = commands.add_parser("autotune", help="measure throughput of each workers x threads split")
+    tune.add_argument("--duration", type=int, default=AUTOTUNE_DURATION_S)
+    tune.add_argument("--threads", type=int, nargs="+", default=None, help="thread counts to try")
+    tune.add_argument("--output", default=CPU_TUNING_FILE)
+
+    plan = commands.add_parser("plan", help="show the workers x threads plan for a number of jobs")
+    plan.add_argument("--jobs", type=int, required=True)
+    plan.add_argument("--max-workers", type=int, default=None)
+    plan.add_argument("--memory-gb", type=float, default=None, help="memory to plan for (default: available now)")
+    plan.add_argument("--tuning", default=CPU_TUNING_FILE)
+
+    worker = commands.add_parser("worker")
+    worker.add_argument("--cores", required=True)
+    worker.add_argument("--threads", type=int, required=True)
+    worker.add_argument("--duration", type=int, required=True)
+
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        print(json.dumps(_run_worker(parse_cores(args.cores), args.threads, args.duration)))
+    elif args.command == "autotune":
+        print_tuning(autotune(args.duration, args.threads, args.output))
+    else:
+        result = plan_workers(
+            args.jobs, tuning=load_tuning(args.tuning), max_workers=args.max_workers, memory_gb=args.memory_gb,
+        )
+        print(json.dumps(result, indent=2))
@@ -1,39 +1,108 @@
 import os
 import time
-import json
+import uuid
+import shutil
+import argparse
 import datetime
-import scipy.io.wavfile
+import torch
 
 from musicgen_utils import (
     MODEL_NAME,
     MODEL_SIZE,
     DEFAULT_DURATION_S,
     SAMPLE_RATE,
+    TOKENS_PER_SECOND,
+    SAMPLING_PARAMS,
     OUTPUT_DIR,
     OUTPUT_FORMAT,
+    OUTPUT_CODEC,
+    PRECISION,
     DEVICE,
+    PROMPT_REUSE_THRESHOLD,
     validate_params,
+    validate_precision,
+    resolve_seed,
+    bucket_by_duration,
 )
+from musicgen_cache import cache_key, get_cache, get_prompt_index, reuse_namespace
+from audio_io import encode_audio
+from musicgen_cpu import ensure_cpu_profile
+from aimusic import telemetry
+from aimusic.results_log import ResultsLog, build_document, compact, write_json
 
 _model = None
 _processor = None
 
+# Labels attached to every MusicGen telemetry span
+SPAN_LABELS = {"model": MODEL_SIZE, "precision": PRECISION}
+
+RESULTS_FILE = "results.json"
+RESULTS_LOG_FILE = "results.jsonl"  # one line per result as it is saved; compacted into RESULTS_FILE
+
+
+def _apply_precision(model, precision: str = PRECISION):
+    """Convert a loaded fp32 model to the requested inference precision."""
+    validate_precision(precision)
+
+    if precision == "bf16":
+        model = model.to(torch.bfloat16)
+    elif precision == "int8":
+        from torch.ao.quantization import quantize_dynamic
+
+        model.decoder = quantize_dynamic(model.decoder, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def _load_pretrained(precision: str = PRECISION):
+    """Load the model and processor from the HuggingFace hub (downloads on first run)."""
+    from transformers import AutoProcessor, MusicgenForConditionalGeneration
+
+    processor = AutoProcessor.from_pretrained(MODEL_NAME)
+    model = MusicgenForConditionalGeneration.from_pretrained(MODEL_NAME)
+    return _apply_precision(model.to(DEVICE), precision), processor
+
+
+def _instrument_codec(model):
+    """Time EnCodec decoding, which generate() runs after the last token, as its own span."""
+    decode = model.audio_encoder.decode
+
+    def timed_decode(*args, **kwargs):
+        with telemetry.span("musicgen.codec_decode", **SPAN_LABELS):
+            return decode(*args, **kwargs)
+
+    model.audio_encoder.decode = timed_decode
+    return model
+
 
 def _load_model():
-    """Load the MusicGen model (downloads on first run)."""
+    """
+    Load the MusicGen model once per process.
+
+    A snapshot exported by musicgen_snapshot.py for this model and
+    precision is preferred (memory-mapped, no conversion); otherwise the
+    model is loaded from the hub. The configured CPU profile (threads,
+    affinity) is applied first unless the process already set one.
+    """
     global _model, _processor
 
     if _model is not None:
         return _model, _processor
 
-    from transformers import AutoProcessor, MusicgenForConditionalGeneration
+    from musicgen_snapshot import find_snapshot, load_snapshot
 
-    print(f"[MusicGen] Loading model: {MODEL_NAME} (device={DEVICE})...")
+    validate_precision(PRECISION)
+    ensure_cpu_profile()
     load_start = time.time()
 
-    _processor = AutoProcessor.from_pretrained(MODEL_NAME)
-    _model = MusicgenForConditionalGeneration.from_pretrained(MODEL_NAME)
-    _model = _model.to(DEVICE)
+    snapshot_dir = find_snapshot()
+    with telemetry.span("musicgen.load", source="snapshot" if snapshot_dir else "hub", **SPAN_LABELS):
+        if snapshot_dir is not None:
+            print(f"[MusicGen] Loading snapshot: {snapshot_dir} (device={DEVICE}, precision={PRECISION})...")
+            model, _processor = load_snapshot(snapshot_dir)
+        else:
+            print(f"[MusicGen] Loading model: {MODEL_NAME} (device={DEVICE}, precision={PRECISION})...")
+            model, _processor = _load_pretrained(PRECISION)
+    _model = _instrument_codec(model)
 
     load_time = round(time.time() - load_start, 2)
     print(f"[MusicGen] Model loaded in {load_time}s")
@@ -41,76 +110,296 @@ def _load_model():
     return _model, _processor
 
 
+def _default_filename(prompt: str) -> str:
+    """Build a timestamped output filename from the prompt."""
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    safe_prompt = prompt[:40].replace(" ", "_").replace("/", "_").replace("\\", "_")
+    safe_prompt = "".join(c for c in safe_prompt if c.isalnum() or c == "_")
+    return f"{timestamp}_{safe_prompt}.{OUTPUT_FORMAT}"
+
+
+def _build_result(
+    prompt: str,
+    duration_s: int,
+    output_path: str,
+    num_samples: int,
+    generation_time: float,
+    seed: int | None = None,
+    codec: str = OUTPUT_CODEC,
+) -> dict:
+    """Build the result dict for a track already written to output_path."""
+    file_size = os.path.getsize(output_path)
+    actual_duration = round(num_samples / SAMPLE_RATE, 2)
+    bitrate_kbps = round(file_size * 8 / 1000 / (num_samples / SAMPLE_RATE), 1) if num_samples else None
+
+    print(f"[MusicGen] Saved to: {output_path} ({file_size / 1024:.1f} KB)")
+    print(f"[MusicGen] Actual duration: {actual_duration}s")
+
+    return {
+        "prompt": prompt,
+        "model": MODEL_NAME,
+        "model_size": MODEL_SIZE,
+        "device": DEVICE,
+        "precision": PRECISION,
+        "duration_requested_s": duration_s,
+        "duration_actual_s": actual_duration,
+        "seed": seed,
+        "output_file": output_path,
+        "codec": codec,
+        "bitrate_kbps": bitrate_kbps,
+        "file_size_bytes": file_size,
+        "generation_time_s": generation_time,
+        "created_at": datetime.datetime.now().isoformat(),
+    }
+
+
+def _save_track(
+    audio_data,
+    prompt: str,
+    duration_s: int,
+    output_path: str,
+    generation_time: float,
+    seed: int | None = None,
+) -> dict:
+    """Encode one decoded waveform to disk with OUTPUT_CODEC and build its result dict."""
+    timings = {}
+    num_samples = encode_audio(output_path, audio_data, SAMPLE_RATE, OUTPUT_CODEC, seed=seed, timings=timings)
+    telemetry.observe("musicgen.encode", timings["encode_s"], codec=OUTPUT_CODEC, **SPAN_LABELS)
+    telemetry.observe("musicgen.disk_write", timings["write_s"], codec=OUTPUT_CODEC, **SPAN_LABELS)
+    telemetry.count("musicgen.audio_seconds", num_samples / SAMPLE_RATE, **SPAN_LABELS)
+    return _build_result(prompt, duration_s, output_path, num_samples, generation_time, seed)
+
+
+def _cached_result(cache, key: str, output_path: str) -> dict | None:
+    """Serve a cache hit by copying the stored audio file to output_path."""
+    lookup_start = time.time()
+    cached = cache.get(key)
+    if cached is None:
+        return None
+
+    shutil.copyfile(cached.pop("cached_file"), output_path)
+    cached.update({
+        "output_file": output_path,
+        "generation_time_s": round(time.time() - lookup_start, 3),
+        "created_at": datetime.datetime.now().isoformat(),
+        "cache_hit": True,
+    })
+    print(f"[MusicGen] Cache hit: {output_path}")
+    return cached
+
+
+def _similar_result(cache, prompt: str, duration_s: int, output_path: str) -> dict | None:
+    """
+    Serve a cache miss from the cached track of a near-duplicate prompt
+    (similarity >= PROMPT_REUSE_THRESHOLD). The result keeps the prompt the
+    track was generated from and records the requested one.
+    """
+    if PROMPT_REUSE_THRESHOLD > 1:
+        return None
+    match = get_prompt_index().best(reuse_namespace(duration_s), prompt, PROMPT_REUSE_THRESHOLD)
+    if match is None:
+        return None
+    result = _cached_result(cache, match["payload"]["key"], output_path)
+    if result is None:
+        return None  # evicted from the cache since it was indexed
+    print(f"[MusicGen] Reused the track of a similar prompt (similarity {match['score']:.3f}): "
+          f"\"{match['text'][:60]}\"")
+    result.update({"requested_prompt": prompt, "prompt_similarity": match["score"]})
+    return result
+
+
+def _index_prompt(prompt: str, duration_s: int, key: str) -> None:
+    """Make a freshly cached track findable by near-duplicate prompts."""
+    if PROMPT_REUSE_THRESHOLD <= 1:
+        get_prompt_index().add(reuse_namespace(duration_s), prompt, {"key": key})
+
+
 def generate_music(
     prompt: str,
     duration_s: int = DEFAULT_DURATION_S,
     output_filename: str | None = None,
+    seed: int | None = None,
+    use_cache: bool = True,
 ) -> dict:
-
+    """
+    Generate one clip. Without a seed a random one is drawn; either way it
+    is recorded in the result so the clip can be regenerated exactly.
+
+    With use_cache, an identical earlier request is served from the cache
+    and, when no seed is given, so is a near-duplicate prompt (see
+    PROMPT_REUSE_THRESHOLD).
+    """
     validate_params(prompt, duration_s)
 
-    model, processor = _load_model()
-
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     if not output_filename:
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_prompt = prompt[:40].replace(" ", "_").replace("/", "_").replace("\\", "_")
-        safe_prompt = "".join(c for c in safe_prompt if c.isalnum() or c == "_")
-        output_filename = f"{timestamp}_{safe_prompt}.{OUTPUT_FORMAT}"
+        output_filename = _default_filename(prompt)
 
     output_path = os.path.join(OUTPUT_DIR, output_filename)
 
+    if use_cache:
+        cache = get_cache()
+        key = cache_key(prompt, duration_s, seed)
+        result = _cached_result(cache, key, output_path)
+        if result is None and seed is None:
+            result = _similar_result(cache, prompt, duration_s, output_path)
+        if result is not None:
+            return result
+
+    model, processor = _load_model()
+    seed = resolve_seed(seed)
+
     print(f"[MusicGen] Generating music (model={MODEL_SIZE}, "
-          f"duration={duration_s}s, device={DEVICE}) ...")
+          f"duration={duration_s}s, device={DEVICE}, seed={seed}) ...")
     print(f"[MusicGen] Prompt: \"{prompt[:80]}{'...' if len(prompt) > 80 else ''}\"")
 
     start_time = time.time()
 
     # Tokenize prompt
-    inputs = processor(
-        text=[prompt],
-        padding=True,
-        return_tensors="pt",
-    ).to(DEVICE)
+    with telemetry.span("musicgen.tokenize", **SPAN_LABELS):
+        inputs = processor(
+            text=[prompt],
+            padding=True,
+            return_tensors="pt",
+        ).to(DEVICE)
 
     # Calculate max new tokens based on desired duration
-    # MusicGen generates ~50 tokens per second of audio
-    max_new_tokens = int(duration_s * 50)
+    max_new_tokens = int(duration_s * TOKENS_PER_SECOND)
 
-    # Generate
-    audio_values = model.generate(
-        **inputs,
-        max_new_tokens=max_new_tokens,
-        do_sample=True,
-    )
+    # Generate (token sampling; includes the musicgen.codec_decode span)
+    torch.manual_seed(seed)
+    with telemetry.span("musicgen.decode", batch_size=1, **SPAN_LABELS):
+        audio_values = model.generate(
+            **inputs,
+            max_new_tokens=max_new_tokens,
+            **SAMPLING_PARAMS,
+        )
 
     generation_time = round(time.time() - start_time, 3)
+    print(f"[MusicGen] Generation complete! ({generation_time}s)")
 
-    # Save to WAV
-    audio_data = audio_values[0, 0].cpu().numpy()
-    scipy.io.wavfile.write(output_path, rate=SAMPLE_RATE, data=audio_data)
+    # Encode and save
+    with telemetry.span("musicgen.host_transfer", **SPAN_LABELS):
+        audio_data = audio_values[0, 0].float().cpu().numpy()
+    result = _save_track(audio_data, prompt, duration_s, output_path, generation_time, seed)
 
-    file_size = os.path.getsize(output_path)
-    actual_duration = round(len(audio_data) / SAMPLE_RATE, 2)
+    if use_cache:
+        cache.put(key, output_path, result)
+        _index_prompt(prompt, duration_s, key)
 
-    print(f"[MusicGen] Generation complete! ({generation_time}s)")
-    print(f"[MusicGen] Saved to: {output_path} ({file_size / 1024:.1f} KB)")
-    print(f"[MusicGen] Actual duration: {actual_duration}s")
+    return result
 
-    result = {
-        "prompt": prompt,
-        "model": MODEL_NAME,
-        "model_size": MODEL_SIZE,
-        "device": DEVICE,
-        "duration_requested_s": duration_s,
-        "duration_actual_s": actual_duration,
-        "output_file": output_path,
-        "file_size_bytes": file_size,
-        "generation_time_s": generation_time,
-        "created_at": datetime.datetime.now().isoformat(),
-    }
 
-    return result
+def generate_music_batch(
+    prompts: list[str],
+    durations: list[int] | int = DEFAULT_DURATION_S,
+    output_filenames: list[str | None] | None = None,
+    seed: int | None = None,
+    use_cache: bool = True,
+    on_result=None,
+) -> list[dict]:
+    """
+    Generate several prompts with as few generate() calls as possible.
+
+    Cached prompts (and, without a seed, near-duplicates of cached
+    prompts) are served first. The rest are grouped into buckets of
+    similar duration (see bucket_by_duration); each bucket is tokenized
+    with padding and decoded in a single generate() call sized for its
+    longest member. Every output is then trimmed to its own requested
+    duration and saved like generate_music() would. Results are returned
+    in input order.
+
+    Every bucket is sampled from the same seed (random if not given).
+    Since a row's output also depends on what it was batched with, each
+    result records seed, batch_id and batch_row; replaying all results
+    of one batch_id together reproduces them exactly.
+
+    If given, on_result(i, result) is called as soon as prompt i is saved,
+    so callers can record progress before the whole batch is done.
+    """
+    if isinstance(durations, int):
+        durations = [durations] * len(prompts)
+    if output_filenames is None:
+        output_filenames = [None] * len(prompts)
+    if not (len(prompts) == len(durations) == len(output_filenames)):
+        raise ValueError(
+            f"prompts, durations and output_filenames must have the same length "
+            f"(got {len(prompts)}, {len(durations)}, {len(output_filenames)})."
+        )
+
+    for prompt, duration_s in zip(prompts, durations):
+        validate_params(prompt, duration_s)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_paths = [
+        os.path.join(OUTPUT_DIR, filename or _default_filename(prompt))
+        for prompt, filename in zip(prompts, output_filenames)
+    ]
+
+    results = [None] * len(prompts)
+    keys = [None] * len(prompts)
+
+    if use_cache:
+        cache = get_cache()
+        for i, (prompt, duration_s) in enumerate(zip(prompts, durations)):
+            keys[i] = cache_key(prompt, duration_s, seed)
+            results[i] = _cached_result(cache, keys[i], output_paths[i])
+            if results[i] is None and seed is None:
+                results[i] = _similar_result(cache, prompt, duration_s, output_paths[i])
+            if results[i] is not None and on_result is not None:
+                on_result(i, results[i])
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+
+    model, processor = _load_model()
+    seed = resolve_seed(seed)
+
+    for bucket in bucket_by_duration([durations[i] for i in pending]):
+        bucket = [pending[j] for j in bucket]
+        batch_prompts = [prompts[i] for i in bucket]
+        max_duration = max(durations[i] for i in bucket)
+
+        print(f"[MusicGen] Generating batch of {len(bucket)} (model={MODEL_SIZE}, "
+              f"duration<={max_duration}s, device={DEVICE}, seed={seed}) ...")
+
+        start_time = time.time()
+
+        with telemetry.span("musicgen.tokenize", **SPAN_LABELS):
+            inputs = processor(
+                text=batch_prompts,
+                padding=True,
+                return_tensors="pt",
+            ).to(DEVICE)
+
+        torch.manual_seed(seed)
+        with telemetry.span("musicgen.decode", batch_size=len(bucket), **SPAN_LABELS):
+            audio_values = model.generate(
+                **inputs,
+                max_new_tokens=int(max_duration * TOKENS_PER_SECOND),
+                **SAMPLING_PARAMS,
+            )
+
+        generation_time = round(time.time() - start_time, 3)
+        print(f"[MusicGen] Batch complete! ({generation_time}s)")
+
+        with telemetry.span("musicgen.host_transfer", **SPAN_LABELS):
+            audio_batch = audio_values[:, 0].float().cpu().numpy()
+        batch_id = uuid.uuid4().hex[:12]
+
+        for row, i in enumerate(bucket):
+            audio_data = audio_batch[row, :int(durations[i] * SAMPLE_RATE)]
+            result = _save_track(audio_data, prompts[i], durations[i], output_paths[i], generation_time, seed)
+            result.update({"batch_size": len(bucket), "batch_id": batch_id, "batch_row": row})
+            if use_cache:
+                cache.put(keys[i], output_paths[i], result)
+                _index_prompt(prompts[i], durations[i], keys[i])
+            results[i] = result
+            if on_result is not None:
+                on_result(i, result)
+
+    return results
 
 
 def print_results(result: dict):
@@ -122,78 +411,102 @@ def print_results(result: dict):
     print(f"  ├── Prompt       : {result['prompt'][:70]}{'...' if len(result['prompt']) > 70 else ''}")
     print(f"  ├── Model        : {result['model']} ({result['model_size']})")
     print(f"  ├── Device       : {result['device']}")
+    print(f"  ├── Precision    : {result.get('precision', 'fp32')}")
     print(f"  ├── Duration     : {result['duration_actual_s']}s (requested {result['duration_requested_s']}s)")
+    print(f"  ├── Seed         : {result.get('seed')}")
     print(f"  ├── File         : {result['output_file']}")
-    print(f"  ├── File Size    : {result['file_size_bytes'] / 1024:.1f} KB")
+    print(f"  ├── File Size    : {result['file_size_bytes'] / 1024:.1f} KB "
+          f"({result.get('codec', 'float32')}, {result.get('bitrate_kbps')} kbps)")
     print(f"  ├── Gen Time     : {result['generation_time_s']}s")
     print(f"  └── Created      : {result['created_at']}")
     print()
 
 
-def save_results(results: list, filepath: str = "results.json"):
+def results_header() -> dict:
+    """Fields of a results.json besides the results."""
+    return {"model": MODEL_NAME, "device": DEVICE, "precision": PRECISION}
+
+
+def save_results(results: list, filepath: str = RESULTS_FILE):
     """Save all results to a JSON file."""
-    output = {
-        "api": "MusicGen (Local)",
-        "model": MODEL_NAME,
-        "device": DEVICE,
-        "total_generations": len(results),
-        "results": results,
-    }
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    write_json(build_document("musicgen", results_header(), results), filepath)
     print(f"[MusicGen] Results saved to: {filepath}")
 
 
+EXAMPLES = [
+    ("Lo-fi study beat (30s)",
+     "A relaxing lo-fi beat for studying late at night with soft piano and vinyl crackle", 30),
+    ("Cinematic orchestral (30s)",
+     "An epic cinematic orchestral piece with rising strings, powerful brass, and dramatic timpani", 30),
+    ("Upbeat pop (20s)",
+     "A catchy upbeat pop song with bright guitars, punchy drums, and a fun singalong melody", 20),
+    ("Acoustic folk (30s)",
+     "An intimate acoustic folk piece with fingerpicked guitar, warm and emotional, slow tempo", 30),
+]
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MusicGen local generation examples")
+    parser.add_argument("--no-cache", action="store_true", help="always decode, ignoring cached results")
+    parser.add_argument("--fresh", action="store_true", help="forget examples finished by earlier runs")
+    args = parser.parse_args()
+
+    from aimusic.jobstore import JobStore, DONE
+
+    # Finished examples are recorded as they are saved, so a rerun after a
+    # crash only generates the ones that are missing.
+    store = JobStore()
+    if args.fresh:
+        store.clear("musicgen_examples")
+    keys = [
+        store.add("musicgen_examples", "musicgen", {"prompt": prompt, "duration_s": duration})
+        for _, prompt, duration in EXAMPLES
+    ]
+    all_results = [job["result"] if job["state"] == DONE else None for job in map(store.get, keys)]
+    todo = [i for i, result in enumerate(all_results) if result is None]
+
     print("=" * 60)
     print("  MusicGen Local - Music Generation")
-    print(f"  Model: {MODEL_NAME} | Device: {DEVICE}")
+    print(f"  Model: {MODEL_NAME} | Device: {DEVICE} | Precision: {PRECISION}")
     print("=" * 60)
 
-    all_results = []
-
-    # Simple prompt (30s)
-    print("\n" + "─" * 60)
-    print("  EXAMPLE 1: Lo-fi study beat (30s)")
-    print("─" * 60)
-    result = generate_music(
-        prompt="A relaxing lo-fi beat for studying late at night with soft piano and vinyl crackle",
-        duration_s=30,
-    )
-    print_results(result)
-    all_results.append(result)
-
-    #Orchestral (30s)
-    print("\n" + "─" * 60)
-    print("  EXAMPLE 2: Cinematic orchestral (30s)")
-    print("─" * 60)
-    result = generate_music(
-        prompt="An epic cinematic orchestral piece with rising strings, powerful brass, and dramatic timpani",
-        duration_s=30,
-    )
-    print_results(result)
-    all_results.append(result)
-
-    # Pop (20s)
-    print("\n" + "─" * 60)
-    print("Upbeat pop (20s)")
-    print("─" * 60)
-    result = generate_music(
-        prompt="A catchy upbeat pop song with bright guitars, punchy drums, and a fun singalong melody",
-        duration_s=20,
-    )
-    print_results(result)
-    all_results.append(result)
-
-    #Acoustic guitar (30s)
-    print("\n" + "─" * 60)
-    print("  EXAMPLE 4: Acoustic folk (30s)")
-    print("─" * 60)
-    result = generate_music(
-        prompt="An intimate acoustic folk piece with fingerpicked guitar, warm and emotional, slow tempo",
-        duration_s=30,
-    )
-    print_results(result)
-    all_results.append(result)
-
-    save_results(all_results)
+    if len(todo) < len(EXAMPLES):
+        print(f"[MusicGen] Resuming: {len(EXAMPLES) - len(todo)} of {len(EXAMPLES)} examples already done")
+
+    # Results are appended to results.jsonl as they are saved and compacted
+    # into results.json at the end
+    results_log = ResultsLog(RESULTS_LOG_FILE)
+    results_log.start("musicgen", results_header())
+    for i, result in enumerate(all_results):
+        if result is not None:
+            results_log.append(result, key=i)
+
+    def record(j: int, result: dict):
+        all_results[todo[j]] = result
+        store.mark_done(keys[todo[j]], result)
+        results_log.append(result, key=todo[j])
+
+    # The remaining examples are decoded together, bucketed by duration
+    if todo:
+        try:
+            generate_music_batch(
+                prompts=[EXAMPLES[i][1] for i in todo],
+                durations=[EXAMPLES[i][2] for i in todo],
+                use_cache=not args.no_cache,
+                on_result=record,
+            )
+        except Exception as e:
+            for i in todo:
+                if all_results[i] is None:
+                    store.mark_failed(keys[i], str(e))
+            raise
+    results_log.close()
+
+    for i, ((label, _, _), result) in enumerate(zip(EXAMPLES, all_results), 1):
+        print("\n" + "─" * 60)
+        print(f"  EXAMPLE {i}: {label}")
+        print("─" * 60)
+        print_results(result)
+
+    compact(RESULTS_LOG_FILE, RESULTS_FILE, results_log.run_id)
+    print(f"[MusicGen] Results saved to: {RESULTS_FILE} (log: {RESULTS_LOG_FILE})")
@@ -0,0 +1,152 @@
+"""
+MusicGen Local - Replay
+========================
+Regenerate tracks from stored result JSON (a single result, a list of
+results, a results.json with a "results" list, or the last run of a
+results.jsonl log) using the recorded prompt, duration and seed.
+
+Batched results are replayed together with the other members of their
+batch_id, in their original batch_row order, because a row's audio also
+depends on what it was batched with. Streaming and long-form results are
+replayed through the same path that produced them. Replays bypass the
+cache and are written next to the originals as <name>_replay.<ext>.
+
+With --verify, each replayed file is compared with the original by
+SHA-256. Files are only expected to match when model, precision, codec
+and device are the same as when the original was generated.
+
+Usage:
+  python musicgen_replay.py results.json [--verify]
+"""
+
+import os
+import json
+import hashlib
+import argparse
+
+from musicgen_utils import MODEL_NAME, PRECISION, OUTPUT_CODEC
+
+
+def load_results(path: str) -> list[dict]:
+    """Read MusicGen result dicts from a result or results JSON file, or a results log."""
+    if path.endswith(".jsonl"):
+        from aimusic.results_log import last_run
+
+        data = last_run(path)[2]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("results", [data])
+    return [r for r in data if isinstance(r, dict) and r.get("prompt") and r.get("seed") is not None]
+
+
+def _file_sha256(path: str) -> str | None:
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _replay_filename(result: dict) -> str | None:
+    if not result.get("output_file"):
+        return None
+    stem, ext = os.path.splitext(os.path.basename(result["output_file"]))
+    return f"{stem}_replay{ext}"
+
+
+def _config_mismatches(result: dict) -> list[str]:
+    from musicgen_utils import DEVICE
+
+    current = {"model": MODEL_NAME, "precision": PRECISION, "codec": OUTPUT_CODEC, "device": DEVICE}
+    defaults = {"precision": "fp32", "codec": "float32"}  # results written before these were recorded
+    return [
+        f"{name}={result.get(name, defaults.get(name))} (now {value})"
+        for name, value in current.items()
+        if result.get(name, defaults.get(name)) != value
+    ]
+
+
+def _replay_group(group: list[dict]) -> list[dict]:
+    """Regenerate one batch (or one single result) and return the new results."""
+    from musicgen_generate import generate_music, generate_music_batch
+    from musicgen_stream import generate_long_music, stream_music_to_file
+
+    first = group[0]
+    mode = first.get("mode")
+    if mode == "long_form":
+        return [generate_long_music(
+            first["prompt"], first["duration_requested_s"], _replay_filename(first),
+            window_s=first["window_s"], context_s=first["context_s"], seed=first["seed"],
+        )]
+    if mode == "stream":
+        return [stream_music_to_file(
+            first["prompt"], first["duration_requested_s"], _replay_filename(first), seed=first["seed"],
+        )]
+    if "batch_id" in first:
+        return generate_music_batch(
+            prompts=[r["prompt"] for r in group],
+            durations=[r["duration_requested_s"] for r in group],
+            output_filenames=[_replay_filename(r) for r in group],
+            seed=first["seed"],
+            use_cache=False,
+        )
+    return [generate_music(
+        first["prompt"], first["duration_requested_s"], _replay_filename(first),
+        seed=first["seed"], use_cache=False,
+    )]
+
+
+def replay(results: list[dict], verify: bool = False) -> list[dict]:
+    """
+    Regenerate `results` and return the new result dicts, each with a
+    "replay_of" pointing at the original file (and "identical" if verify).
+    """
+    groups = {}
+    for i, result in enumerate(results):
+        key = result.get("batch_id") or f"single-{i}"
+        groups.setdefault(key, []).append(result)
+
+    replayed = []
+    for group in groups.values():
+        group.sort(key=lambda r: r.get("batch_row", 0))
+        mismatches = _config_mismatches(group[0])
+        if mismatches:
+            print(f"[MusicGen] Replay settings differ from the original ({', '.join(mismatches)}); "
+                  "output will not match exactly")
+
+        for original, new in zip(group, _replay_group(group)):
+            new["replay_of"] = original.get("output_file")
+            if verify:
+                original_hash = _file_sha256(original.get("output_file") or "")
+                new["identical"] = original_hash is not None and original_hash == _file_sha256(new["output_file"])
+                status = "identical" if new["identical"] else (
+                    "original missing" if original_hash is None else "DIFFERS"
+                )
+                print(f"[MusicGen] Replay {new['output_file']}: {status}")
+            replayed.append(new)
+    return replayed
+
+
+if __name__ == "__main__":
+    from musicgen_generate import save_results
+
+    parser = argparse.ArgumentParser(description="Regenerate MusicGen tracks from stored results")
+    parser.add_argument("results_file", help="result JSON, results.json or results.jsonl")
+    parser.add_argument("--verify", action="store_true", help="compare replayed files with the originals")
+    parser.add_argument("--output", default="replay_results.json")
+    args = parser.parse_args()
+
+    results = load_results(args.results_file)
+    if not results:
+        parser.error(f"no replayable MusicGen results (with a seed) in {args.results_file}")
+
+    print(f"[MusicGen] Replaying {len(results)} result(s) from {args.results_file} ...")
+    replayed = replay(results, verify=args.verify)
+    save_results(replayed, args.output)
+
+    if args.verify and not all(r.get("identical") for r in replayed):
+        raise SystemExit(1)
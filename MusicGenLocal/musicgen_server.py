@@ -0,0 +1,291 @@
+"""
+MusicGen Local - Inference Server
+==================================
+Long-lived HTTP server that keeps the MusicGen model resident and
+decodes queued requests together (dynamic batching).
+
+Endpoints:
+  POST /generate   {"prompt": ..., "duration_s": ..., "output_filename": ...}
+  GET  /metrics    request / batch / latency / queue-depth counters
+  GET  /metrics/prometheus   the same counters plus per-stage telemetry
+                             spans, in Prometheus text format
+  GET  /health     liveness check
+
+Usage:
+  python musicgen_server.py [--host HOST] [--port PORT] [--batch-window-ms MS]
+"""
+
+import json
+import time
+import queue
+import argparse
+import threading
+import collections
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from musicgen_utils import (
+    DEFAULT_DURATION_S,
+    MAX_BATCH_SIZE,
+    SERVER_HOST,
+    SERVER_PORT,
+    BATCH_WINDOW_MS,
+    validate_params,
+    validate_output_filename,
+)
+from musicgen_generate import _load_model, generate_music_batch
+from aimusic import telemetry
+
+LATENCY_WINDOW = 1000            # number of recent requests kept for percentiles
+
+
+class _Job:
+    """A single queued generation request."""
+
+    def __init__(self, prompt: str, duration_s: int, output_filename: str | None, seed: int | None = None):
+        self.prompt = prompt
+        self.duration_s = duration_s
+        self.output_filename = output_filename
+        self.seed = seed
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ServerMetrics:
+    """Thread-safe counters and latency samples for /metrics."""
+
+    def __init__(self, job_queue: queue.Queue):
+        self._queue = job_queue
+        self._lock = threading.Lock()
+        self.requests_total = 0
+        self.requests_failed = 0
+        self.batches_total = 0
+        self.batched_requests_total = 0
+        self.max_queue_depth = 0
+        self._latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self._queue_waits = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def record_enqueue(self):
+        with self._lock:
+            self.requests_total += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+    def record_batch(self, jobs: list[_Job]):
+        with self._lock:
+            self.batches_total += 1
+            self.batched_requests_total += len(jobs)
+            for job in jobs:
+                if job.error is not None:
+                    self.requests_failed += 1
+                self._latencies.append(job.latency_s)
+                self._queue_waits.append(job.queue_wait_s)
+
+    def prometheus_text(self) -> str:
+        """Server counters and gauges followed by the telemetry spans."""
+        with self._lock:
+            values = [
+                ("queue_depth", "gauge", self._queue.qsize()),
+                ("max_queue_depth", "gauge", self.max_queue_depth),
+                ("requests_total", "counter", self.requests_total),
+                ("requests_failed_total", "counter", self.requests_failed),
+                ("batches_total", "counter", self.batches_total),
+                ("batched_requests_total", "counter", self.batched_requests_total),
+            ]
+        lines = []
+        for name, kind, value in values:
+            lines += [f"# TYPE musicgen_server_{name} {kind}", f"musicgen_server_{name} {value}"]
+        return "\n".join(lines) + "\n" + telemetry.prometheus_text()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            waits = sorted(self._queue_waits)
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self.max_queue_depth,
+                "requests_total": self.requests_total,
+                "requests_failed": self.requests_failed,
+                "batches_total": self.batches_total,
+                "avg_batch_size": round(
+                    self.batched_requests_total / self.batches_total, 2
+                ) if self.batches_total else 0,
+                "latency_s": _percentiles(latencies),
+                "queue_wait_s": _percentiles(waits),
+            }
+
+
+def _percentiles(sorted_values: list[float]) -> dict:
+    if not sorted_values:
+        return {"p50": None, "p95": None, "max": None}
+
+    def pick(q):
+        return round(sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))], 3)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "max": round(sorted_values[-1], 3)}
+
+
+class BatchWorker(threading.Thread):
+    """
+    Pull jobs off the queue and decode them in batches.
+
+    After the first job arrives, the worker keeps collecting for up to
+    batch_window_ms (or until MAX_BATCH_SIZE jobs) before calling
+    generate_music_batch, which further buckets them by duration.
+    """
+
+    def __init__(self, job_queue: queue.Queue, metrics: ServerMetrics, batch_window_ms: int):
+        super().__init__(name="musicgen-batch-worker", daemon=True)
+        self._queue = job_queue
+        self._metrics = metrics
+        self._window_s = batch_window_ms / 1000
+
+    def _collect(self) -> list[_Job]:
+        jobs = [self._queue.get()]
+        deadline = time.perf_counter() + self._window_s
+        while len(jobs) < MAX_BATCH_SIZE:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                jobs.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return jobs
+
+    def run(self):
+        while True:
+            jobs = self._collect()
+            started = time.perf_counter()
+            for job in jobs:
+                job.started_at = started
+
+            # One generate() call samples from one seed, so only requests
+            # with the same seed (or none) can share a batch
+            by_seed = {}
+            for job in jobs:
+                by_seed.setdefault(job.seed, []).append(job)
+
+            for seed, group in by_seed.items():
+                try:
+                    results = generate_music_batch(
+                        prompts=[job.prompt for job in group],
+                        durations=[job.duration_s for job in group],
+                        output_filenames=[job.output_filename for job in group],
+                        seed=seed,
+                    )
+                    for job, result in zip(group, results):
+                        job.result = result
+                except Exception as e:
+                    for job in group:
+                        job.error = str(e)
+
+            finished = time.perf_counter()
+            for job in jobs:
+                job.queue_wait_s = job.started_at - job.submitted_at
+                job.latency_s = finished - job.submitted_at
+                if job.result is not None:
+                    job.result["queue_wait_s"] = round(job.queue_wait_s, 3)
+                    job.result["latency_s"] = round(job.latency_s, 3)
+
+            self._metrics.record_batch(jobs)
+            for job in jobs:
+                job.done.set()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "MusicGenServer/1.0"
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send_json(200, self.server.metrics.snapshot())
+        elif self.path == "/metrics/prometheus":
+            data = self.server.metrics.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/generate":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("request body must be a JSON object.")
+            prompt = body.get("prompt", "")
+            if not isinstance(prompt, str):
+                raise ValueError("prompt must be a string.")
+            duration_s = int(body.get("duration_s", DEFAULT_DURATION_S))
+            seed = int(body["seed"]) if body.get("seed") is not None else None
+            validate_params(prompt, duration_s)
+            validate_output_filename(body.get("output_filename"))
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        job = _Job(prompt, duration_s, body.get("output_filename"), seed)
+        self.server.job_queue.put(job)
+        self.server.metrics.record_enqueue()
+        job.done.wait()
+
+        if job.error is not None:
+            self._send_json(500, {"error": job.error})
+        else:
+            self._send_json(200, job.result)
+
+    def log_message(self, format, *args):
+        print(f"[MusicGen Server] {self.address_string()} - {format % args}")
+
+
+def serve(
+    host: str = SERVER_HOST,
+    port: int = SERVER_PORT,
+    batch_window_ms: int = BATCH_WINDOW_MS,
+):
+    """Load the model once, then serve generation requests until interrupted."""
+    _load_model()
+
+    job_queue = queue.Queue()
+    metrics = ServerMetrics(job_queue)
+    BatchWorker(job_queue, metrics, batch_window_ms).start()
+
+    httpd = ThreadingHTTPServer((host, port), _Handler)
+    httpd.job_queue = job_queue
+    httpd.metrics = metrics
+
+    print(f"[MusicGen Server] Listening on http://{host}:{port} "
+          f"(batch window {batch_window_ms} ms, max batch {MAX_BATCH_SIZE})")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[MusicGen Server] Shutting down ...")
+    finally:
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MusicGen inference server")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--batch-window-ms", type=int, default=BATCH_WINDOW_MS)
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.batch_window_ms)
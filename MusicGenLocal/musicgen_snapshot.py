@@ -0,0 +1,183 @@
+"""
+MusicGen Local - Model Snapshots
+=================================
+Export the ready-to-run model once, then start every later process from
+a memory-mapped copy instead of from_pretrained().
+
+A snapshot directory holds:
+  config.json, generation_config.json, processor files
+  weights.pt      every parameter and buffer, already in the target dtype
+  snapshot.json   manifest (model, precision, versions, sizes)
+
+load_snapshot() builds the model skeleton on the meta device and assigns
+tensors loaded with torch.load(mmap=True), so no weights are copied: the
+tensors are backed by the file's page cache, and worker processes on the
+same host share the same physical pages. For int8 the snapshot stores
+fp32 weights and the decoder is re-quantized at load (packed int8 weights
+cannot be memory-mapped).
+
+Usage:
+  python musicgen_snapshot.py export [DIR]
+  MUSICGEN_PRECISION=bf16 python musicgen_snapshot.py export
+  python musicgen_snapshot.py info [DIR]
+"""
+
+import os
+import json
+import time
+import argparse
+import datetime
+import torch
+
+from musicgen_utils import (
+    MODEL_NAME,
+    PRECISION,
+    SNAPSHOT_DIR,
+    DEVICE,
+    validate_precision,
+)
+
+WEIGHTS_FILE = "weights.pt"
+MANIFEST_FILE = "snapshot.json"
+SNAPSHOT_FORMAT = 1
+
+
+def _named_tensors(model) -> dict:
+    """All parameters and buffers (including non-persistent ones) by name."""
+    tensors = {}
+    for name, param in model.named_parameters(remove_duplicate=False):
+        tensors[name] = param.detach()
+    for name, buffer in model.named_buffers(remove_duplicate=False):
+        tensors[name] = buffer
+    return tensors
+
+
+def _assign_tensors(model, tensors: dict) -> None:
+    """Point each parameter/buffer of a meta-device model at a loaded tensor."""
+    for name, tensor in tensors.items():
+        module_name, _, leaf = name.rpartition(".")
+        module = model.get_submodule(module_name)
+        if leaf in module._parameters:
+            module._parameters[leaf] = torch.nn.Parameter(tensor, requires_grad=False)
+        else:
+            module._buffers[leaf] = tensor
+
+    missing = [name for name, t in _named_tensors(model).items() if t.is_meta]
+    if missing:
+        raise RuntimeError(
+            f"[MusicGen] Snapshot is missing {len(missing)} tensor(s), e.g. {missing[0]}. "
+            "Re-export it with this version of transformers."
+        )
+
+
+def read_manifest(snapshot_dir: str = SNAPSHOT_DIR) -> dict | None:
+    path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_snapshot(snapshot_dir: str = SNAPSHOT_DIR) -> str | None:
+    """Return snapshot_dir if it holds a snapshot of MODEL_NAME at PRECISION."""
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        return None
+    if manifest.get("model") != MODEL_NAME or manifest.get("precision") != PRECISION:
+        print(f"[MusicGen] Ignoring snapshot {snapshot_dir} "
+              f"({manifest.get('model')}, {manifest.get('precision')}); "
+              f"need {MODEL_NAME}, {PRECISION}")
+        return None
+    return snapshot_dir
+
+
+def export_snapshot(snapshot_dir: str = SNAPSHOT_DIR, precision: str = PRECISION) -> dict:
+    """Load the model from the hub, convert it to `precision` and write a snapshot."""
+    from transformers import __version__ as transformers_version
+    from musicgen_generate import _load_pretrained
+
+    validate_precision(precision)
+    print(f"[MusicGen] Exporting snapshot of {MODEL_NAME} (precision={precision}) to {snapshot_dir} ...")
+    start_time = time.time()
+
+    # int8 is applied at load time; the stored weights stay fp32
+    model, processor = _load_pretrained("fp32" if precision == "int8" else precision)
+    model = model.to("cpu")
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    model.config.save_pretrained(snapshot_dir)
+    model.generation_config.save_pretrained(snapshot_dir)
+    processor.save_pretrained(snapshot_dir)
+
+    weights_path = os.path.join(snapshot_dir, WEIGHTS_FILE)
+    tmp_path = weights_path + ".tmp"
+    torch.save(_named_tensors(model), tmp_path)
+    os.replace(tmp_path, weights_path)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "model": MODEL_NAME,
+        "precision": precision,
+        "weights_file": WEIGHTS_FILE,
+        "weights_bytes": os.path.getsize(weights_path),
+        "torch_version": torch.__version__,
+        "transformers_version": transformers_version,
+        "created_at": datetime.datetime.now().isoformat(),
+    }
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"[MusicGen] Snapshot written in {round(time.time() - start_time, 2)}s "
+          f"({manifest['weights_bytes'] / 1024 ** 2:.1f} MB)")
+    return manifest
+
+
+def load_snapshot(snapshot_dir: str = SNAPSHOT_DIR):
+    """Load (model, processor) from a snapshot with memory-mapped weights."""
+    from transformers import AutoProcessor, GenerationConfig, MusicgenConfig, MusicgenForConditionalGeneration
+    from musicgen_generate import _apply_precision
+
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        raise ValueError(f"No snapshot found in {snapshot_dir}.")
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(
+            f"Unsupported snapshot format {manifest.get('format')} in {snapshot_dir}; re-export it."
+        )
+
+    config = MusicgenConfig.from_pretrained(snapshot_dir)
+    with torch.device("meta"):
+        model = MusicgenForConditionalGeneration(config)
+
+    tensors = torch.load(
+        os.path.join(snapshot_dir, manifest["weights_file"]),
+        mmap=True,
+        weights_only=True,
+    )
+    _assign_tensors(model, tensors)
+    model.generation_config = GenerationConfig.from_pretrained(snapshot_dir)
+    model.eval()
+
+    if DEVICE != "cpu":
+        model = model.to(DEVICE)
+    if manifest["precision"] == "int8":
+        model = _apply_precision(model, "int8")
+
+    processor = AutoProcessor.from_pretrained(snapshot_dir)
+    return model, processor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or inspect a MusicGen model snapshot")
+    parser.add_argument("command", choices=["export", "info"])
+    parser.add_argument("snapshot_dir", nargs="?", default=SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_snapshot(args.snapshot_dir)
+    else:
+        manifest = read_manifest(args.snapshot_dir)
+        if manifest is None:
+            print(f"[MusicGen] No snapshot in {args.snapshot_dir}")
+        else:
+            print(json.dumps(manifest, indent=2))
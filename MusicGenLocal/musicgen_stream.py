@@ -0,0 +1,447 @@
+"""
+MusicGen Local - Streaming Generation
+======================================
+Two ways to get audio out before a whole track is finished:
+
+  stream_music()       Token-level streaming of a single generate() call.
+                       Audio-codec frames are decoded every
+                       STREAM_PLAY_STEPS tokens during sampling and yielded
+                       as fixed-size float32 blocks.
+  stream_long_music()  Long-form generation beyond MAX_DURATION_S in
+                       windows, each conditioned on the text prompt and on
+                       the last LONG_CONTEXT_S seconds of audio so far.
+
+Usage:
+  python musicgen_stream.py "A calm piano piece" --duration 20 --realtime
+  python musicgen_stream.py "An ambient drone with slow evolving pads" --duration 300
+"""
+
+import os
+import time
+import queue
+import argparse
+import threading
+import numpy as np
+import torch
+from transformers.generation.stopping_criteria import StoppingCriteria, StoppingCriteriaList
+
+from musicgen_utils import (
+    MODEL_NAME,
+    MODEL_SIZE,
+    SAMPLE_RATE,
+    TOKENS_PER_SECOND,
+    SAMPLING_PARAMS,
+    MAX_LONG_DURATION_S,
+    LONG_WINDOW_S,
+    LONG_CONTEXT_S,
+    LONG_CROSSFADE_S,
+    STREAM_BLOCK_S,
+    STREAM_PLAY_STEPS,
+    DEFAULT_DURATION_S,
+    OUTPUT_DIR,
+    OUTPUT_CODEC,
+    DEVICE,
+    validate_params,
+    resolve_seed,
+)
+from musicgen_generate import _load_model, _default_filename, _build_result
+from audio_io import open_writer, crossfade
+
+
+class MusicgenStreamer:
+    """
+    Turns the token stream of model.generate() into decoded audio.
+
+    put() is handed the decoder ids generated so far after every sampling
+    step. Every `play_steps` steps the codes are undelayed and decoded by
+    the audio codec; the newly final samples (all but the last `stride`,
+    which later frames can still change) are put on `audio_queue`. end()
+    flushes the remainder and puts None as the end-of-stream marker.
+    """
+
+    def __init__(self, model, play_steps: int = STREAM_PLAY_STEPS):
+        self.decoder = model.decoder
+        self.audio_encoder = model.audio_encoder
+        self.generation_config = model.generation_config
+        self.play_steps = play_steps
+
+        hop_length = int(np.prod(self.audio_encoder.config.upsampling_ratios))
+        self.stride = max(hop_length * (play_steps - self.decoder.num_codebooks) // 6, 0)
+
+        self.token_ids = None
+        self.to_yield = 0
+        self.audio_queue = queue.Queue()
+        self._ended = False
+
+    def _decode(self, token_ids: torch.Tensor) -> np.ndarray:
+        _, delay_pattern_mask = self.decoder.build_delay_pattern_mask(
+            token_ids[:, :1],
+            pad_token_id=self.generation_config.decoder_start_token_id,
+            max_length=token_ids.shape[-1],
+        )
+        token_ids = self.decoder.apply_delay_pattern_mask(token_ids, delay_pattern_mask)
+        token_ids = token_ids[token_ids != self.generation_config.pad_token_id].reshape(
+            1, self.decoder.num_codebooks, -1
+        )
+        if token_ids.shape[-1] == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        codes = token_ids[None, ...].to(self.audio_encoder.device)
+        audio_values = self.audio_encoder.decode(codes, audio_scales=[None]).audio_values
+        return audio_values[0, 0].float().cpu().numpy()
+
+    def put(self, token_ids: torch.Tensor):
+        """Take the (num_codebooks, steps) decoder ids generated so far."""
+        if token_ids.shape[0] != self.decoder.num_codebooks:
+            raise ValueError("MusicgenStreamer only supports batch size 1.")
+
+        self.token_ids = token_ids
+        if token_ids.shape[-1] % self.play_steps == 0:
+            audio = self._decode(token_ids)
+            end = len(audio) - self.stride
+            if end > self.to_yield:
+                self.audio_queue.put(audio[self.to_yield:end])
+                self.to_yield = end
+
+    def end(self, audio: np.ndarray | None = None):
+        """
+        Flush the rest of the clip and mark the end of the stream.
+
+        `audio` is the full waveform returned by generate(), when available;
+        otherwise the last ids seen by put() are decoded.
+        """
+        if self._ended:
+            return
+        self._ended = True
+        if audio is None and self.token_ids is not None:
+            audio = self._decode(self.token_ids)
+        if audio is not None and len(audio) > self.to_yield:
+            self.audio_queue.put(audio[self.to_yield:])
+        self.audio_queue.put(None)
+
+
+class _StreamCriteria(StoppingCriteria):
+    """
+    Hands each step's ids to the streamer and stops generate() once the
+    consumer of stream_music() goes away. A stopping criterion sees every
+    sampling step regardless of how generate() forwards `streamer=`.
+    """
+
+    def __init__(self, streamer: MusicgenStreamer, cancelled: threading.Event):
+        self.streamer = streamer
+        self.cancelled = cancelled
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if not self.cancelled.is_set():
+            self.streamer.put(input_ids)
+        return torch.full(
+            (input_ids.shape[0],), self.cancelled.is_set(), dtype=torch.bool, device=input_ids.device
+        )
+
+
+def stream_music(
+    prompt: str,
+    duration_s: int = DEFAULT_DURATION_S,
+    block_s: float = STREAM_BLOCK_S,
+    play_steps: int = STREAM_PLAY_STEPS,
+    seed: int | None = None,
+    stats: dict | None = None,
+):
+    """
+    Yield float32 PCM blocks of `block_s` seconds while MusicGen samples.
+
+    generate() runs on a background thread feeding a MusicgenStreamer, so the
+    first block is available after roughly `play_steps` tokens instead of
+    after the whole clip. The final block may be shorter. If `stats` is
+    given it is filled with time_to_first_chunk_s, audio_s, wall_s and
+    real_time_factor (audio seconds per wall-clock second).
+    """
+    validate_params(prompt, duration_s)
+    model, processor = _load_model()
+
+    block_samples = max(int(block_s * SAMPLE_RATE), 1)
+    streamer = MusicgenStreamer(model, play_steps=play_steps)
+    cancelled = threading.Event()
+    errors = []
+
+    inputs = processor(text=[prompt], padding=True, return_tensors="pt").to(DEVICE)
+    if seed is not None:
+        torch.manual_seed(seed)
+
+    def run():
+        audio = None
+        try:
+            audio_values = model.generate(
+                **inputs,
+                max_new_tokens=int(duration_s * TOKENS_PER_SECOND),
+                stopping_criteria=StoppingCriteriaList([_StreamCriteria(streamer, cancelled)]),
+                **SAMPLING_PARAMS,
+            )
+            audio = audio_values[0, 0].float().cpu().numpy()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            streamer.end(audio if not errors else np.zeros(0, dtype=np.float32))
+
+    stats = stats if stats is not None else {}
+    start_time = time.perf_counter()
+    thread = threading.Thread(target=run, name="musicgen-stream", daemon=True)
+    thread.start()
+
+    pending = np.zeros(0, dtype=np.float32)
+    emitted = 0
+
+    def emit(block):
+        nonlocal emitted
+        if emitted == 0:
+            stats["time_to_first_chunk_s"] = round(time.perf_counter() - start_time, 3)
+        emitted += len(block)
+        return block
+
+    try:
+        while True:
+            audio = streamer.audio_queue.get()
+            if audio is None:
+                break
+            pending = np.concatenate([pending, audio.astype(np.float32, copy=False)])
+            while len(pending) >= block_samples:
+                yield emit(pending[:block_samples])
+                pending = pending[block_samples:]
+
+        if errors:
+            raise errors[0]
+        if len(pending):
+            yield emit(pending)
+    finally:
+        cancelled.set()
+        thread.join()
+        wall_s = time.perf_counter() - start_time
+        stats["audio_s"] = round(emitted / SAMPLE_RATE, 3)
+        stats["wall_s"] = round(wall_s, 3)
+        stats["real_time_factor"] = round(stats["audio_s"] / wall_s, 3) if wall_s > 0 else None
+
+
+def _validate_long_params(prompt: str, duration_s: int, window_s: int, context_s: int):
+    validate_params(prompt, duration_s, max_duration_s=MAX_LONG_DURATION_S)
+    if not 1 <= context_s < window_s:
+        raise ValueError(
+            f"context_s must be >= 1 and smaller than window_s "
+            f"(got context_s={context_s}, window_s={window_s})."
+        )
+
+
+def stream_long_music(
+    prompt: str,
+    duration_s: int,
+    window_s: int = LONG_WINDOW_S,
+    context_s: int = LONG_CONTEXT_S,
+    crossfade_s: float = LONG_CROSSFADE_S,
+    seed: int | None = None,
+):
+    """
+    Yield float32 audio chunks that together make up `duration_s` seconds.
+
+    The first window is conditioned on text only. Every later window is
+    given the previous `context_s` seconds as an audio prompt and generates
+    `window_s - context_s` new seconds. MusicGen re-decodes the prompt at
+    the start of its output; the last `crossfade_s` of that re-decoded
+    context is crossfaded with the held-back end of the previous chunk so
+    window boundaries are seamless.
+    """
+    _validate_long_params(prompt, duration_s, window_s, context_s)
+
+    model, processor = _load_model()
+
+    total_samples = int(duration_s * SAMPLE_RATE)
+    context_samples = int(context_s * SAMPLE_RATE)
+    fade_samples = min(int(crossfade_s * SAMPLE_RATE), context_samples)
+
+    if seed is not None:
+        torch.manual_seed(seed)
+
+    emitted = 0
+    recent = np.zeros(0, dtype=np.float32)  # last context_samples of the audio yielded so far
+    context = None       # audio prompt: end of recent followed by held
+    held = None          # end of the previous chunk, waiting to be crossfaded
+
+    while emitted + (len(held) if held is not None else 0) < total_samples:
+        if context is None:
+            inputs = processor(text=[prompt], padding=True, return_tensors="pt")
+            new_seconds = window_s
+        else:
+            inputs = processor(
+                audio=context,
+                sampling_rate=SAMPLE_RATE,
+                text=[prompt],
+                padding=True,
+                return_tensors="pt",
+            )
+            new_seconds = window_s - context_s
+
+        inputs = inputs.to(DEVICE)
+        if "input_values" in inputs:
+            inputs["input_values"] = inputs["input_values"].to(model.dtype)
+
+        audio_values = model.generate(
+            **inputs,
+            max_new_tokens=int(new_seconds * TOKENS_PER_SECOND),
+            **SAMPLING_PARAMS,
+        )
+        window = audio_values[0, 0].float().cpu().numpy()
+
+        if context is None:
+            chunk = window
+        else:
+            # Output = re-decoded context followed by the new audio
+            prompt_len = min(len(context), len(window))
+            chunk = window[prompt_len:]
+            if held is not None and fade_samples:
+                overlap = window[prompt_len - fade_samples:prompt_len]
+                chunk = np.concatenate([crossfade(held, overlap), chunk])
+            elif held is not None:
+                chunk = np.concatenate([held, chunk])
+            held = None
+
+        if len(chunk) == 0:
+            raise RuntimeError(
+                f"[MusicGen] Window produced no new audio after {emitted / SAMPLE_RATE:.1f}s "
+                f"of {duration_s}s (context {context_s}s, window {window_s}s)."
+            )
+
+        # Hold back the tail of the chunk for the next crossfade
+        remaining = total_samples - emitted
+        chunk = chunk[:remaining]
+        if fade_samples and len(chunk) < remaining:
+            held = chunk[-fade_samples:].copy()
+            chunk = chunk[:-fade_samples]
+
+        # The next prompt is the track as it stands: what was yielded plus the
+        # held-back tail (which the next crossfade replaces, not extends)
+        recent = np.concatenate([recent, chunk])[-context_samples:]
+        context = np.concatenate([recent, held])[-context_samples:] if held is not None else recent
+
+        emitted += len(chunk)
+        yield chunk
+
+    if held is not None:
+        yield held
+
+
+def generate_long_music(
+    prompt: str,
+    duration_s: int,
+    output_filename: str | None = None,
+    window_s: int = LONG_WINDOW_S,
+    context_s: int = LONG_CONTEXT_S,
+    seed: int | None = None,
+) -> dict:
+    """Stream a long track straight into an audio file and return its result dict."""
+    # Check before the output file is opened (and truncated); the generator only would on its first chunk
+    _validate_long_params(prompt, duration_s, window_s, context_s)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_path = os.path.join(OUTPUT_DIR, output_filename or _default_filename(prompt))
+    seed = resolve_seed(seed)
+
+    print(f"[MusicGen] Streaming long-form generation (model={MODEL_SIZE}, "
+          f"duration={duration_s}s, window={window_s}s, context={context_s}s, device={DEVICE}, "
+          f"seed={seed}) ...")
+
+    start_time = time.time()
+    first_chunk_time = None
+    windows = 0
+
+    with open_writer(output_path, SAMPLE_RATE, OUTPUT_CODEC, seed=seed) as writer:
+        for chunk in stream_long_music(prompt, duration_s, window_s, context_s, seed=seed):
+            if first_chunk_time is None:
+                first_chunk_time = round(time.time() - start_time, 3)
+                print(f"[MusicGen] First audio after {first_chunk_time}s")
+            writer.write(chunk)
+            windows += 1
+            print(f"[MusicGen]  {writer.frames_written / SAMPLE_RATE:.1f}s / {duration_s}s written")
+        num_samples = writer.frames_written
+
+    generation_time = round(time.time() - start_time, 3)
+    print(f"[MusicGen] Generation complete! ({generation_time}s)")
+
+    result = _build_result(prompt, duration_s, output_path, num_samples, generation_time, seed)
+    result.update({
+        "mode": "long_form",
+        "window_s": window_s,
+        "context_s": context_s,
+        "windows": windows,
+        "time_to_first_audio_s": first_chunk_time,
+    })
+    return result
+
+
+def stream_music_to_file(
+    prompt: str,
+    duration_s: int = DEFAULT_DURATION_S,
+    output_filename: str | None = None,
+    seed: int | None = None,
+) -> dict:
+    """Write stream_music() blocks to an audio file as they arrive and return the result dict."""
+    validate_params(prompt, duration_s)  # before the output file is opened
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_path = os.path.join(OUTPUT_DIR, output_filename or _default_filename(prompt))
+    seed = resolve_seed(seed)
+
+    print(f"[MusicGen] Streaming generation (model={MODEL_SIZE}, "
+          f"duration={duration_s}s, device={DEVICE}, seed={seed}) ...")
+
+    stats = {}
+    with open_writer(output_path, SAMPLE_RATE, OUTPUT_CODEC, seed=seed) as writer:
+        for block in stream_music(prompt, duration_s, seed=seed, stats=stats):
+            if writer.frames_written == 0:
+                print(f"[MusicGen] First audio after {stats['time_to_first_chunk_s']}s")
+            writer.write(block)
+        num_samples = writer.frames_written
+
+    print(f"[MusicGen] Generation complete! ({stats['wall_s']}s, "
+          f"real-time factor {stats['real_time_factor']}x)")
+
+    result = _build_result(prompt, duration_s, output_path, num_samples, stats["wall_s"], seed)
+    result.update({
+        "mode": "stream",
+        "time_to_first_chunk_s": stats.get("time_to_first_chunk_s"),
+        "real_time_factor": stats["real_time_factor"],
+    })
+    return result
+
+
+if __name__ == "__main__":
+    from musicgen_generate import print_results
+
+    parser = argparse.ArgumentParser(description="Streaming MusicGen generation")
+    parser.add_argument("prompt")
+    parser.add_argument("--duration", type=int, default=None)
+    parser.add_argument("--realtime", action="store_true",
+                        help="token-level streaming of a single clip (up to MAX_DURATION_S)")
+    parser.add_argument("--window", type=int, default=LONG_WINDOW_S)
+    parser.add_argument("--context", type=int, default=LONG_CONTEXT_S)
+    parser.add_argument("--output-filename", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  MusicGen Local - Streaming Generation")
+    print(f"  Model: {MODEL_NAME} | Device: {DEVICE}")
+    print("=" * 60)
+
+    if args.realtime:
+        result = stream_music_to_file(
+            args.prompt,
+            args.duration or DEFAULT_DURATION_S,
+            output_filename=args.output_filename,
+            seed=args.seed,
+        )
+    else:
+        result = generate_long_music(
+            args.prompt,
+            args.duration or LONG_WINDOW_S * 4,
+            output_filename=args.output_filename,
+            window_s=args.window,
+            context_s=args.context,
+            seed=args.seed,
+        )
+    print_results(result)
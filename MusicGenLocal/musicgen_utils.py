@@ -11,36 +11,131 @@ Models available (from HuggingFace):
 """
 
 import os
-import torch
+import sys
+import secrets
 
-# Model selection (change to "medium" or "large" for better quality)
-MODEL_SIZE = "small"
+# Make the shared aimusic package (telemetry) importable when these scripts
+# are run directly from MusicGenLocal/
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+# Model selection (change to "medium" or "large" for better quality,
+# or set MUSICGEN_MODEL_SIZE)
+MODEL_SIZES = ("small", "medium", "large")
+MODEL_SIZE = os.environ.get("MUSICGEN_MODEL_SIZE", "small")
 MODEL_NAME = f"facebook/musicgen-{MODEL_SIZE}"
 
+# Inference precision: "fp32" (default), "bf16", or "int8" (dynamic int8
+# quantization of the decoder's Linear layers, CPU only)
+PRECISIONS = ("fp32", "bf16", "int8")
+PRECISION = os.environ.get("MUSICGEN_PRECISION", "fp32")
+
 # Generation defaults
 DEFAULT_DURATION_S = 30          # seconds (small model handles 30s well)
-MAX_DURATION_S = 120             # max recommended for small model
+MAX_DURATION_S = 120             # max recommended for small model (single generate call)
 SAMPLE_RATE = 32000              # MusicGen outputs at 32kHz
 MAX_PROMPT_LENGTH = 1500         # practical limit for good results
+TOKENS_PER_SECOND = 50           # MusicGen generates ~50 tokens per second of audio
+
+# Sampling parameters passed to model.generate() (part of the cache key)
+SAMPLING_PARAMS = {
+    "do_sample": True,
+}
+
+# Batching
+MAX_BATCH_SIZE = 4               # prompts decoded together in one generate() call
+DURATION_BUCKET_S = 5            # durations within this many seconds share a batch
+
+# Inference server
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+BATCH_WINDOW_MS = 20             # how long the server gathers requests into one batch
+
+# Long-form streaming generation (musicgen_stream.py)
+MAX_LONG_DURATION_S = 1800       # upper bound for windowed generation
+LONG_WINDOW_S = 30               # audio generated per window, including context
+LONG_CONTEXT_S = 10              # tail of the previous window used as audio prompt
+LONG_CROSSFADE_S = 0.1           # crossfade across each window boundary
+
+# Token-level streaming (stream_music)
+STREAM_BLOCK_S = 0.5             # size of each yielded PCM block
+STREAM_PLAY_STEPS = 50           # decode audio every N sampled tokens (~1s of audio)
 
 # Output
 OUTPUT_DIR = "generated_music"
-OUTPUT_FORMAT = "wav"            # MusicGen outputs raw audio -> WAV
+# Output codec (audio_io.open_writer): "pcm16", "pcm24" or "float32" WAV,
+# "flac" (needs soundfile), or "opus" / "mp3" (need ffmpeg on PATH)
+OUTPUT_CODEC = os.environ.get("MUSICGEN_CODEC", "pcm16")
+CODEC_FORMATS = {
+    "float32": "wav",
+    "pcm16": "wav",
+    "pcm24": "wav",
+    "flac": "flac",
+    "opus": "opus",
+    "mp3": "mp3",
+}
+OUTPUT_FORMAT = CODEC_FORMATS.get(OUTPUT_CODEC, "wav")
+
+# Pre-serialized model snapshot (musicgen_snapshot.py); used by _load_model when present
+def snapshot_dir(model_size: str = MODEL_SIZE, precision: str = PRECISION) -> str:
+    """Snapshot directory of a model size and precision (MUSICGEN_SNAPSHOT_DIR overrides it)."""
+    return os.environ.get("MUSICGEN_SNAPSHOT_DIR", os.path.join("snapshots", f"musicgen-{model_size}-{precision}"))
+
+
+SNAPSHOT_DIR = snapshot_dir()
+
+# CPU execution profile (musicgen_cpu.py), applied once before the model
+# loads. 0 / "" leave torch's defaults alone. MUSICGEN_CPU_AFFINITY takes a
+# core list such as "0-7,16-23".
+CPU_INTRA_OP_THREADS = int(os.environ.get("MUSICGEN_INTRA_OP_THREADS", "0"))
+CPU_INTER_OP_THREADS = int(os.environ.get("MUSICGEN_INTER_OP_THREADS", "0"))
+CPU_AFFINITY = os.environ.get("MUSICGEN_CPU_AFFINITY", "")
+# Measured worker x thread throughput written by `musicgen_cpu.py autotune`
+CPU_TUNING_FILE = os.environ.get("MUSICGEN_CPU_TUNING_FILE", "cpu_tuning.json")
+# Memory one worker process needs with the model loaded (GB). Each worker
+# holds its own copy, so plan_workers() starts no more than available RAM
+# allows. fp32 figures, i.e. conservative for bf16 / int8.
+WORKER_MEMORY_GB_BY_SIZE = {"small": 3.0, "medium": 8.0, "large": 16.0}
+WORKER_MEMORY_GB = float(
+    os.environ.get("MUSICGEN_WORKER_MEMORY_GB", WORKER_MEMORY_GB_BY_SIZE.get(MODEL_SIZE, 16.0))
+)
+
+# Generation cache
+CACHE_DIR = ".musicgen_cache"
+CACHE_MAX_BYTES = 2 * 1024 ** 3  # least recently used entries are evicted beyond this
+
+# Near-duplicate prompt reuse (aimusic.prompt_index): a cache miss is served
+# from a cached track whose prompt is at least this similar (cosine, 0-1;
+# above 1 turns reuse off). Prompts are embedded with hashed TF-IDF, or with
+# the model's own text encoder ("text-encoder", loads the model).
+PROMPT_REUSE_THRESHOLD = float(os.environ.get("AIMUSIC_PROMPT_REUSE", "0.95"))
+PROMPT_EMBEDDER = os.environ.get("MUSICGEN_PROMPT_EMBEDDER", "tfidf")
+PROMPT_EMBEDDERS = ("tfidf", "text-encoder")
 
 # Device selection
 def get_device() -> str:
     """Auto-detect best available device."""
+    import torch
+
     if torch.cuda.is_available():
         return "cuda"
     else:
         return "cpu"
 
-DEVICE = get_device()
+
+def __getattr__(name: str):
+    # DEVICE is resolved on first access so that importing this module
+    # (e.g. just for the config constants) does not import torch.
+    if name == "DEVICE":
+        device = globals()["DEVICE"] = get_device()
+        return device
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Validation
 
-def validate_params(prompt: str, duration_s: int):
+def validate_params(prompt: str, duration_s: int, max_duration_s: int = MAX_DURATION_S):
     """Validate generation parameters."""
     if not prompt or not prompt.strip():
         raise ValueError("prompt is required and cannot be empty.")
@@ -51,8 +146,58 @@ def validate_params(prompt: str, duration_s: int):
             f"(got {len(prompt)})."
         )
 
-    if duration_s < 1 or duration_s > MAX_DURATION_S:
+    if duration_s < 1 or duration_s > max_duration_s:
         raise ValueError(
-            f"duration_s must be between 1 and {MAX_DURATION_S} "
+            f"duration_s must be between 1 and {max_duration_s} "
             f"(got {duration_s})."
         )
+
+
+def validate_output_filename(output_filename: str | None):
+    """Validate a client-supplied output file name: a plain name inside OUTPUT_DIR."""
+    if output_filename is None:
+        return
+    if not isinstance(output_filename, str) or not output_filename.strip():
+        raise ValueError("output_filename must be a non-empty string.")
+    separators = {"/", "\\", os.sep} | ({os.altsep} if os.altsep else set())
+    if any(sep in output_filename for sep in separators) or output_filename in (".", ".."):
+        raise ValueError(f"output_filename must be a plain file name without directories (got {output_filename!r}).")
+
+
+def validate_precision(precision: str, device: str | None = None):
+    """Validate an inference precision mode for the given device (default DEVICE)."""
+    if device is None:
+        device = sys.modules[__name__].DEVICE
+    if precision not in PRECISIONS:
+        raise ValueError(
+            f"precision must be one of {', '.join(PRECISIONS)} (got {precision!r})."
+        )
+    if precision == "int8" and device != "cpu":
+        raise ValueError("int8 dynamic quantization is only supported on CPU.")
+
+
+def resolve_seed(seed: int | None) -> int:
+    """Return `seed`, or a fresh random one if None, so every run can be replayed."""
+    return seed if seed is not None else secrets.randbelow(2 ** 31)
+
+
+def bucket_by_duration(durations: list[int]) -> list[list[int]]:
+    """
+    Group prompt indices into batches of similar duration.
+
+    Indices are sorted by duration and a new bucket starts whenever the
+    spread would exceed DURATION_BUCKET_S or the bucket is full.
+    """
+    order = sorted(range(len(durations)), key=lambda i: durations[i])
+    buckets = []
+    for i in order:
+        current = buckets[-1] if buckets else None
+        if (
+            current is None
+            or len(current) >= MAX_BATCH_SIZE
+            or durations[i] - durations[current[0]] > DURATION_BUCKET_S
+        ):
+            buckets.append([i])
+        else:
+            current.append(i)
+    return buckets
@@ -0,0 +1,374 @@
+"""
+Audio Analysis
+===============
+Per-track audio features for comparing what the backends actually
+produced, not just how long they took:
+
+  rms_dbfs        overall RMS level
+  peak_dbfs       sample peak
+  lufs            integrated loudness (ITU-R BS.1770: K-weighting,
+                  400 ms blocks, -70 LUFS absolute and -10 LU relative gate)
+  tempo_bpm       tempo estimate from the autocorrelation of a
+                  spectral-flux onset envelope (None without a steady beat)
+  centroid_hz     mean spectral centroid of the non-silent frames
+  silence_ratio   share of frames quieter than SILENCE_DBFS
+
+Files are read block by block (WAV through a memory map, MP3 and other
+formats through ffmpeg), every block is analysed with vectorized NumPy,
+and files are spread over a process pool. The features go to a columnar
+file: Parquet when pyarrow is installed, otherwise a NumPy .npz with one
+array per column.
+
+Usage:
+  python audio_analysis.py                      # the default audio folders
+  python audio_analysis.py some/dir track.wav --output features.npz --workers 4
+"""
+
+import os
+import sys
+import time
+import argparse
+import warnings
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import signal
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT_DIR, "MusicGenLocal"))
+
+from audio_io import open_reader
+
+AUDIO_DIRS = [
+    os.path.join(ROOT_DIR, "MusicGenLocal", "generated_music"),
+    os.path.join(ROOT_DIR, "SunoAPI", "example_audios"),
+    os.path.join(ROOT_DIR, "MusicGenerationSunoAndMusicGen", "generated_music"),
+]
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".opus", ".ogg", ".m4a")
+FEATURES_FILE = "track_features.parquet" if importlib.util.find_spec("pyarrow") else "track_features.npz"
+
+READ_BLOCK_FRAMES = 256 * 1024
+FRAME_SIZE = 2048
+HOP_SIZE = 1024
+SILENCE_DBFS = -60.0
+TEMPO_MIN_BPM = 60
+TEMPO_MAX_BPM = 200
+TEMPO_PRIOR_BPM = 120       # octave errors are resolved towards this tempo
+TEMPO_MIN_STRENGTH = 0.2    # autocorrelation peak above its median, normalized; below this -> no steady beat
+TEMPO_MIN_BEAT_FLUX = 10.0  # RMS onset flux of the beat below this -> only a steady tone's jitter
+LUFS_BLOCK_S = 0.4
+LUFS_STEP_S = 0.1           # 75% block overlap
+LUFS_ABSOLUTE_GATE = -70.0
+LUFS_RELATIVE_GATE = -10.0
+
+FEATURE_COLUMNS = (
+    "path", "source", "format", "sample_rate", "channels", "duration_s",
+    "rms_dbfs", "peak_dbfs", "lufs", "tempo_bpm", "centroid_hz", "silence_ratio",
+    "analysis_s", "error",
+)
+STRING_COLUMNS = ("path", "source", "format", "error")
+
+
+def k_weighting(sample_rate: int) -> np.ndarray:
+    """BS.1770 K-weighting (high shelf + high pass) as second-order sections for `sample_rate`."""
+    # Pre-filter: +4 dB high shelf around 1.7 kHz
+    gain_db, q, fc = 3.999843853973347, 0.7071752369554196, 1681.974450955533
+    k = np.tan(np.pi * fc / sample_rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    shelf = [vh + vb * k / q + k * k, 2 * (k * k - vh), vh - vb * k / q + k * k,
+             1 + k / q + k * k, 2 * (k * k - 1), 1 - k / q + k * k]
+    # RLB high pass at ~38 Hz
+    q, fc = 0.5003270373238773, 38.13547087602444
+    k = np.tan(np.pi * fc / sample_rate)
+    a0 = 1 + k / q + k * k
+    high_pass = [a0, -2 * a0, a0, a0, 2 * (k * k - 1), 1 - k / q + k * k]  # b stays [1, -2, 1]
+
+    sos = np.array([shelf, high_pass])
+    sos /= sos[:, 3:4]
+    return sos
+
+
+def _db(power: float) -> float:
+    return float(10 * np.log10(power)) if power > 0 else float("-inf")
+
+
+class _TrackFeatures:
+    """Running state for one file; feed it blocks in order, then call result()."""
+
+    def __init__(self, sample_rate: int, channels: int):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames = 0
+        self.sum_squares = 0.0
+        self.peak = 0.0
+
+        self._sos = k_weighting(sample_rate)
+        self._zi = np.zeros((len(self._sos), 2, channels))
+        self._lufs_step = int(round(LUFS_STEP_S * sample_rate))
+        self._lufs_carry = np.zeros(0)
+        self._lufs_steps = []  # K-weighted energy (summed over channels) per LUFS_STEP_S
+
+        self._window = np.hanning(FRAME_SIZE).astype(np.float32)
+        self._freqs = np.fft.rfftfreq(FRAME_SIZE, 1 / sample_rate).astype(np.float32)
+        self._silence_power = 10 ** (SILENCE_DBFS / 10)
+        self._mono_carry = np.zeros(0, dtype=np.float32)
+        self._previous_spectrum = None
+        self._onsets = []
+        self.analysis_frames = 0
+        self.silent_frames = 0
+        self._centroid_sum = 0.0
+        self._centroid_frames = 0
+
+    def add(self, block: np.ndarray) -> None:
+        self.frames += len(block)
+        self.sum_squares += float(np.einsum("ij,ij->", block, block, dtype=np.float64))
+        self.peak = max(self.peak, float(np.abs(block).max(initial=0.0)))
+        self._add_loudness(block)
+        self._add_spectral(block.mean(axis=1))
+
+    def _add_loudness(self, block: np.ndarray) -> None:
+        weighted, self._zi = signal.sosfilt(self._sos, block, axis=0, zi=self._zi)
+        energy = np.concatenate([self._lufs_carry, np.einsum("ij,ij->i", weighted, weighted)])
+        whole = len(energy) - len(energy) % self._lufs_step
+        self._lufs_steps.append(energy[:whole].reshape(-1, self._lufs_step).sum(axis=1))
+        self._lufs_carry = energy[whole:]
+
+    def _add_spectral(self, mono: np.ndarray) -> None:
+        samples = np.concatenate([self._mono_carry, mono])
+        if len(samples) < FRAME_SIZE:
+            self._mono_carry = samples
+            return
+        frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+        self._mono_carry = samples[len(frames) * HOP_SIZE:]
+
+        power = np.einsum("ij,ij->i", frames, frames) / FRAME_SIZE
+        loud = power >= self._silence_power
+        self.analysis_frames += len(frames)
+        self.silent_frames += int(len(frames) - loud.sum())
+
+        magnitude = np.abs(np.fft.rfft(frames * self._window, axis=1))
+        total = magnitude.sum(axis=1)
+        if loud.any():
+            centroids = (magnitude[loud] @ self._freqs) / np.maximum(total[loud], 1e-12)
+            self._centroid_sum += float(centroids.sum())
+            self._centroid_frames += int(loud.sum())
+
+        # Spectral flux of the log-compressed magnitude, carried across blocks
+        compressed = np.log1p(100 * magnitude)
+        previous = compressed[:1] if self._previous_spectrum is None else self._previous_spectrum
+        flux = np.diff(compressed, axis=0, prepend=previous)
+        self._onsets.append(np.maximum(flux, 0).sum(axis=1))
+        self._previous_spectrum = compressed[-1:]
+
+    def _lufs(self) -> float | None:
+        steps = np.concatenate(self._lufs_steps) if self._lufs_steps else np.zeros(0)
+        per_block = int(round(LUFS_BLOCK_S / LUFS_STEP_S))
+        if len(steps) < per_block:
+            if not self.frames:
+                return None
+            blocks = np.array([(steps.sum() + self._lufs_carry.sum()) / self.frames])  # shorter than one block
+        else:
+            blocks = np.convolve(steps, np.ones(per_block), mode="valid") / (per_block * self._lufs_step)
+        loudness = -0.691 + 10 * np.log10(np.maximum(blocks, 1e-20))
+        gated = blocks[loudness > LUFS_ABSOLUTE_GATE]
+        if not len(gated):
+            return None
+        relative_gate = -0.691 + 10 * np.log10(gated.mean()) + LUFS_RELATIVE_GATE
+        gated = blocks[(loudness > LUFS_ABSOLUTE_GATE) & (loudness > relative_gate)]
+        return round(-0.691 + _db(gated.mean()), 2)
+
+    def _tempo(self) -> float | None:
+        onsets = np.concatenate(self._onsets) if self._onsets else np.zeros(0)
+        frame_rate = self.sample_rate / HOP_SIZE
+        min_lag = int(np.floor(60 * frame_rate / TEMPO_MAX_BPM))
+        max_lag = int(np.ceil(60 * frame_rate / TEMPO_MIN_BPM))
+        if len(onsets) < 2 * max_lag or not onsets.any():
+            return None
+        # Remove the local mean (slow swells are not beats) before correlating
+        onsets = onsets - np.convolve(onsets, np.ones(max_lag) / max_lag, mode="same")
+        size = 1 << int(np.ceil(np.log2(2 * len(onsets))))
+        spectrum = np.fft.rfft(onsets, size)
+        autocorrelation = np.fft.irfft(spectrum * np.conj(spectrum), size)[:max_lag + 2]
+        if autocorrelation[0] <= 0:
+            return None
+
+        lags = np.arange(max(min_lag, 1), max_lag + 1)
+        bpm = 60 * frame_rate / lags
+        prior = np.exp(-0.5 * np.log2(bpm / TEMPO_PRIOR_BPM) ** 2)
+        score = autocorrelation[lags] / autocorrelation[0] * prior
+        best = int(np.argmax(score))
+        # The peak over the autocorrelation's level across the lag range is the
+        # beat's share of the envelope. Steady tones still jitter periodically
+        # (phase against the hop, quantization noise), but only by a few units
+        # of flux, where even a quiet drum gives hundreds.
+        peak = autocorrelation[lags[best]] - np.median(autocorrelation[lags])
+        if peak < TEMPO_MIN_STRENGTH * autocorrelation[0] or peak < TEMPO_MIN_BEAT_FLUX ** 2 * len(onsets):
+            return None
+
+        # Parabolic interpolation around the peak for a sub-frame lag
+        lag = float(lags[best])
+        if 0 < best < len(lags) - 1:
+            left, mid, right = autocorrelation[lags[best] - 1:lags[best] + 2]
+            denominator = left - 2 * mid + right
+            if denominator < 0:
+                lag += 0.5 * (left - right) / denominator
+        return round(float(60 * frame_rate / lag), 1)
+
+    def result(self) -> dict:
+        samples = self.frames * self.channels
+        return {
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "duration_s": round(self.frames / self.sample_rate, 3),
+            "rms_dbfs": round(_db(self.sum_squares / samples), 2) if samples else None,
+            "peak_dbfs": round(float(20 * np.log10(self.peak)), 2) if self.peak > 0 else None,
+            "lufs": self._lufs(),
+            "tempo_bpm": self._tempo(),
+            "centroid_hz": round(self._centroid_sum / self._centroid_frames, 1) if self._centroid_frames else None,
+            "silence_ratio": round(self.silent_frames / self.analysis_frames, 4) if self.analysis_frames else None,
+        }
+
+
+def analyze_file(path: str, source: str | None = None) -> dict:
+    """Features of one audio file; failures are reported in the "error" field instead of raised."""
+    row = dict.fromkeys(FEATURE_COLUMNS)
+    row.update(
+        path=path,
+        source=source if source is not None else os.path.basename(os.path.dirname(os.path.abspath(path))),
+        format=os.path.splitext(path)[1].lstrip(".").lower(),
+    )
+    start = time.perf_counter()
+    try:
+        with open_reader(path) as reader:
+            features = _TrackFeatures(reader.sample_rate, reader.channels)
+            for block in reader.blocks(READ_BLOCK_FRAMES):
+                features.add(block)
+        row.update(features.result())
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["analysis_s"] = round(time.perf_counter() - start, 4)
+    return row
+
+
+def _analyze_job(job: tuple[str, str | None]) -> dict:
+    return analyze_file(*job)
+
+
+def find_audio_files(paths: list[str]) -> list[tuple[str, str]]:
+    """(file, source) pairs for the given files and directories (searched recursively), sorted."""
+    found = []
+    for path in paths:
+        if os.path.isfile(path):
+            found.append((path, os.path.basename(os.path.dirname(os.path.abspath(path)))))
+            continue
+        if not os.path.isdir(path):
+            continue
+        source = os.path.relpath(os.path.abspath(path), os.path.abspath(ROOT_DIR))
+        if source.startswith(".."):
+            source = os.path.normpath(path)
+        for directory, _, names in os.walk(path):
+            found += [
+                (os.path.join(directory, name), source)
+                for name in names if name.lower().endswith(AUDIO_EXTENSIONS)
+            ]
+    return sorted(found)
+
+
+def analyze_files(files: list[str | tuple[str, str]], workers: int | None = None) -> list[dict]:
+    """Analyse files (paths or (path, source) pairs) on `workers` processes; rows come back in input order."""
+    jobs = [(f, None) if isinstance(f, str) else tuple(f) for f in files]
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1 or len(jobs) <= 1:
+        return [_analyze_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_analyze_job, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+
+
+def to_columns(rows: list[dict]) -> dict[str, np.ndarray]:
+    """Rows -> one array per column (strings as str arrays, missing numbers as NaN)."""
+    columns = {}
+    for name in FEATURE_COLUMNS:
+        values = [row.get(name) for row in rows]
+        if name in STRING_COLUMNS:
+            columns[name] = np.array(["" if v is None else str(v) for v in values], dtype=str)
+        else:
+            columns[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return columns
+
+
+def write_features(rows: list[dict], path: str = FEATURES_FILE) -> str:
+    """Write rows as a columnar .parquet (needs pyarrow) or .npz file; returns the path."""
+    columns = to_columns(rows)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet output needs the pyarrow package (pip install pyarrow); use .npz.") from None
+        pyarrow.parquet.write_table(pyarrow.table(columns), path)
+    elif path.endswith(".npz"):
+        np.savez(path, **columns)
+    else:
+        raise ValueError(f"Features file must end in .parquet or .npz (got {path!r}).")
+    return path
+
+
+def read_features(path: str) -> dict[str, np.ndarray]:
+    """Load a file written by write_features() back into column arrays."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(path)
+        return {name: table[name].to_numpy(zero_copy_only=False) for name in table.column_names}
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def print_features(columns: dict[str, np.ndarray]) -> None:
+    """Per-source averages of the analysed tracks."""
+    metrics = ("duration_s", "rms_dbfs", "lufs", "tempo_bpm", "centroid_hz", "silence_ratio")
+    ok = columns["error"] == ""
+    print()
+    print("=" * 104)
+    print(f"  {'Source':<40s} {'Tracks':>6s} {'Dur':>7s} {'RMS':>7s} {'LUFS':>7s} {'BPM':>6s} "
+          f"{'Centroid':>9s} {'Silence':>8s}")
+    print(f"  {'─' * 40} {'─' * 6} {'─' * 7} {'─' * 7} {'─' * 7} {'─' * 6} {'─' * 9} {'─' * 8}")
+    for source in sorted(set(columns["source"])):
+        selected = ok & (columns["source"] == source)
+        if not selected.any():
+            continue
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns, e.g. no tempo for very short clips
+            means = [np.nanmean(np.where(np.isinf(columns[m][selected]), np.nan, columns[m][selected]))
+                     for m in metrics]
+        print(f"  {source[-40:]:<40s} {int(selected.sum()):>6d} {means[0]:>6.1f}s {means[1]:>7.1f} {means[2]:>7.1f} "
+              f"{means[3]:>6.1f} {means[4]:>8.0f}Hz {means[5]:>7.1%}")
+    print("=" * 104)
+    failed = np.flatnonzero(~ok)
+    for i in failed:
+        print(f"  FAILED {columns['path'][i]}: {columns['error'][i]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute loudness, tempo and spectral features of generated tracks")
+    parser.add_argument("paths", nargs="*", default=AUDIO_DIRS, help="audio files or directories (default: the audio folders)")
+    parser.add_argument("--output", default=FEATURES_FILE, help=f"columnar features file, .parquet or .npz (default: {FEATURES_FILE})")
+    parser.add_argument("--workers", type=int, default=None, help="analysis processes (default: one per core)")
+    args = parser.parse_args()
+
+    files = find_audio_files(args.paths)
+    if not files:
+        parser.error("no audio files found")
+
+    print(f"Analysing {len(files)} track(s)...")
+    start = time.perf_counter()
+    rows = analyze_files(files, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    audio_s = sum(row["duration_s"] or 0 for row in rows)
+    print(f"Analysed {audio_s / 60:.1f} min of audio in {elapsed:.2f}s")
+
+    write_features(rows, args.output)
+    print_features(to_columns(rows))
+    print(f"\nFeatures saved to: {args.output}")
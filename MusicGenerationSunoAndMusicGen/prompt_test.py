@@ -1,11 +1,22 @@
 import sys
 import os
 import json
+import asyncio
+import argparse
 import time
 import datetime
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
 
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), "SunoAPI"))
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), "MusicGenLocal"))
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT_DIR, "SunoAPI"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "MusicGenLocal"))
+sys.path.insert(0, ROOT_DIR)
+
+from aimusic.jobstore import JobStore, DONE, SUBMITTED
+from aimusic.prompt_index import REUSE_THRESHOLD
+from aimusic.results_log import ResultsLog, compact
 
 # Prompt Pool 
 
@@ -122,68 +133,234 @@ PROMPTS = [
 ]
 
 RESULTS_FILE = "prompt_comparison.json"
+RESULTS_LOG_FILE = "prompt_comparison.jsonl"  # one line per result as it arrives; compacted into RESULTS_FILE
+AUDIO_DIR = "generated_music"
+FEATURES_NAME = "prompt_comparison_features"  # + .parquet, or .npz without pyarrow
+MUSICGEN_WORKERS = None     # MusicGen processes; None lets musicgen_cpu.plan_workers choose
+PROMPT_REUSE_THRESHOLD = REUSE_THRESHOLD  # serve near-duplicate prompts from earlier tracks (> 1 disables)
+JOB_BATCH = "prompt_test"   # batch name of these jobs in the job store
+
+
 
 
+def _suno_kwargs(cfg: dict) -> dict:
+    kwargs = {
+        "prompt": cfg["prompt"],
+        "custom_mode": cfg.get("custom_mode", False),
+        "instrumental": cfg.get("instrumental", False),
+        "style": cfg.get("style"),
+        "title": cfg.get("title"),
+        "model": cfg.get("model", "V4_5ALL"),
+    }
+    if cfg.get("vocal_gender"):
+        kwargs["vocal_gender"] = cfg["vocal_gender"]
+    if cfg.get("negative_tags"):
+        kwargs["negative_tags"] = cfg["negative_tags"]
+    return kwargs
+
+
+def _suno_summary(
+    cfg: dict,
+    prompt_name: str,
+    task_data: dict,
+    total_time: float,
+    downloads: list[dict] | None = None,
+) -> dict:
+    tracks = []
+    suno_data = task_data.get("response", {}).get("sunoData", [])
+    for i, track in enumerate(suno_data):
+        local_file = downloads[i].get("path") if downloads else None
+        tracks.append({
+            "title": track.get("title"),
+            "tags": track.get("tags"),
+            "duration_s": track.get("duration"),
+            "model_name": track.get("modelName"),
+            "audio_url": track.get("audioUrl"),
+            "stream_url": track.get("streamAudioUrl"),
+            "image_url": track.get("imageUrl"),
+            "local_file": local_file,
+        })
+
+    return {
+        "api": "Suno",
+        "prompt_name": prompt_name,
+        "model": cfg.get("model", "V4_5ALL"),
+        "prompt_chars": len(cfg["prompt"]),
+        "total_time_s": total_time,
+        "tracks_generated": len(tracks),
+        "error": None,
+        "tracks": tracks,
+    }
 
 
-def run_suno(prompt_config: dict, prompt_name: str) -> dict:
+def _suno_index_entry(cfg: dict) -> tuple[str, str]:
+    """Prompt index namespace (everything but the text) and text (style, title, prompt) of a Suno config."""
+    settings = {k: cfg.get(k) for k in ("model", "custom_mode", "instrumental", "vocal_gender", "negative_tags")}
+    namespace = "suno:" + json.dumps(settings, sort_keys=True)
+    text = "\n".join(part for part in (cfg.get("style"), cfg.get("title"), cfg["prompt"]) if part)
+    return namespace, text
+
+
+def _reused_suno_summary(cfg: dict, prompt_name: str) -> dict | None:
+    """Summary of an earlier Suno result for a near-duplicate prompt whose tracks are still on disk."""
+    if PROMPT_REUSE_THRESHOLD > 1:
+        return None
+    from aimusic.prompt_index import get_index
+
+    match = get_index().best(*_suno_index_entry(cfg), threshold=PROMPT_REUSE_THRESHOLD)
+    if match is None:
+        return None
+    summary = match["payload"]
+    if not summary.get("tracks") or not all(os.path.exists(t.get("local_file") or "") for t in summary["tracks"]):
+        return None
+    print(f"[Suno] Reusing the tracks of \"{summary['prompt_name']}\" for {prompt_name} "
+          f"(similarity {match['score']:.3f})")
+    return {**summary, "prompt_name": prompt_name, "reused_from": summary["prompt_name"],
+            "prompt_similarity": match["score"]}
+
+
+def _index_suno_summary(cfg: dict, summary: dict) -> None:
+    """Make a finished Suno result with downloaded tracks findable by near-duplicate prompts."""
+    if PROMPT_REUSE_THRESHOLD <= 1 and summary["tracks"] and all(t.get("local_file") for t in summary["tracks"]):
+        from aimusic.prompt_index import get_index
+
+        get_index().add(*_suno_index_entry(cfg), summary)
+
+
+def job_keys(store: JobStore, prompt_configs: list[dict], kind: str) -> list[str]:
+    """Register each prompt's `kind` ("suno" / "musicgen") job in the store and return the keys."""
+    return [store.add(JOB_BATCH, kind, {"name": p["name"], **p[kind]}) for p in prompt_configs]
+
+
+def run_suno_all(
+    prompt_configs: list[dict],
+    on_result=None,
+    store: JobStore | None = None,
+    reuse: bool = True,
+) -> list[dict]:
+    """
+    Submit every Suno prompt, within the API rate limit and in-flight cap.
+
+    If given, on_result(i, summary) is called as soon as prompt i finishes.
+    Requests go through a SubmissionScheduler, so a throttled or failing
+    request is retried instead of failing its prompt.
+
+    With a job store, each taskId is recorded as soon as it is submitted
+    and each summary once it is done. Prompts already done are answered
+    from the store, and prompts a previous run submitted are re-attached
+    to their taskId instead of being submitted (and paid for) again.
+
+    With `reuse`, a prompt that is a near-duplicate of an earlier one
+    (PROMPT_REUSE_THRESHOLD) gets that prompt's downloaded tracks instead
+    of a new task.
+    """
+    names = [p["name"] for p in prompt_configs]
+    keys = job_keys(store, prompt_configs, "suno") if store is not None else None
     try:
         import suno_utils
-        from suno_generate import generate_music, wait_for_completion
 
         if not suno_utils.API_KEY:
-            return {"api": "Suno", "prompt_name": prompt_name, "error": "API key not set", "tracks": []}
-
-        cfg = prompt_config["suno"]
-        start_time = time.time()
-
-        kwargs = {
-            "prompt": cfg["prompt"],
-            "custom_mode": cfg.get("custom_mode", False),
-            "instrumental": cfg.get("instrumental", False),
-            "style": cfg.get("style"),
-            "title": cfg.get("title"),
-            "model": cfg.get("model", "V4_5ALL"),
-        }
-        if cfg.get("vocal_gender"):
-            kwargs["vocal_gender"] = cfg["vocal_gender"]
-        if cfg.get("negative_tags"):
-            kwargs["negative_tags"] = cfg["negative_tags"]
-
-        result = generate_music(**kwargs)
-        task_id = result["data"]["taskId"]
-        task_data = wait_for_completion(task_id)
-
-        total_time = round(time.time() - start_time, 3)
-
-        tracks = []
-        suno_data = task_data.get("response", {}).get("sunoData", [])
-        for track in suno_data:
-            tracks.append({
-                "title": track.get("title"),
-                "tags": track.get("tags"),
-                "duration_s": track.get("duration"),
-                "model_name": track.get("modelName"),
-                "audio_url": track.get("audioUrl"),
-                "stream_url": track.get("streamAudioUrl"),
-                "image_url": track.get("imageUrl"),
-            })
-
-        return {
-            "api": "Suno",
-            "prompt_name": prompt_name,
-            "model": cfg.get("model", "V4_5ALL"),
-            "prompt_chars": len(cfg["prompt"]),
-            "total_time_s": total_time,
-            "tracks_generated": len(tracks),
-            "error": None,
-            "tracks": tracks,
-        }
+            return [
+                {"api": "Suno", "prompt_name": name, "error": "API key not set", "tracks": []}
+                for name in names
+            ]
+
+        def done(i: int, summary: dict, final: bool = True) -> None:
+            # final=False leaves the job "submitted" so the next run re-attaches to it
+            results[i] = summary
+            if store is not None and final:
+                if summary.get("error"):
+                    store.mark_failed(keys[i], summary["error"])
+                else:
+                    store.mark_done(keys[i], summary)
+            if on_result is not None:
+                on_result(i, summary)
+
+        async def run_all() -> list[dict]:
+            from suno_scheduler import SubmissionScheduler, TaskTimeout
+            from suno_download import download_task_audio
+
+            start_time = time.time()
+
+            async def run_one(scheduler: SubmissionScheduler, i: int) -> None:
+                job = store.get(keys[i]) if store is not None else None
+                if job is not None and job["state"] == DONE:
+                    done(i, job["result"], final=False)
+                    return
+                task_id = job["task_id"] if job is not None and job["state"] == SUBMITTED else None
+                if task_id is not None:
+                    print(f"[Suno] Re-attaching to task {task_id} ({names[i]})")
+                elif reuse:
+                    reused = _reused_suno_summary(prompt_configs[i]["suno"], names[i])
+                    if reused is not None:
+                        done(i, reused)
+                        return
+
+                def submitted(new_task_id: str) -> None:
+                    if store is not None:
+                        store.mark_submitted(keys[i], new_task_id)
+
+                try:
+                    data = await scheduler.run_job(
+                        _suno_kwargs(prompt_configs[i]["suno"]), task_id=task_id, on_submitted=submitted,
+                    )
+                except TaskTimeout as e:
+                    # Still running on Suno's side; stays "submitted" for the next run
+                    done(i, {"api": "Suno", "prompt_name": names[i], "error": str(e), "tracks": []}, final=False)
+                    return
+                except Exception as e:
+                    done(i, {"api": "Suno", "prompt_name": names[i], "error": str(e), "tracks": []})
+                    return
+
+                total_time = round(time.time() - start_time, 3)
+                downloads = await download_task_audio(data, output_dir=AUDIO_DIR)
+                summary = _suno_summary(prompt_configs[i]["suno"], names[i], data, total_time, downloads)
+                _index_suno_summary(prompt_configs[i]["suno"], summary)
+                done(i, summary)
+
+            # Submissions and polls share one rate limit, and only
+            # MAX_IN_FLIGHT_TASKS tasks run at once; the rest queue.
+            async with SubmissionScheduler() as scheduler:
+                await asyncio.gather(*(run_one(scheduler, i) for i in range(len(prompt_configs))))
+                stats = scheduler.stats()
+            print(f"[Suno] {stats['submitted']} submitted, {stats['requests']} requests, "
+                  f"{stats['retries']} retries ({stats['throttled']} throttled)")
+
+            return results
+
+        results = [None] * len(prompt_configs)
+        return asyncio.run(run_all())
     except Exception as e:
-        return {"api": "Suno", "prompt_name": prompt_name, "error": str(e), "tracks": []}
+        return [
+            {"api": "Suno", "prompt_name": name, "error": str(e), "tracks": []}
+            for name in names
+        ]
+
+
+def _musicgen_summary(cfg: dict, prompt_name: str, result: dict) -> dict:
+    has_output = result.get("output_file") is not None
+    reused = {"reused_prompt": result["prompt"], "prompt_similarity": result["prompt_similarity"]} \
+        if result.get("requested_prompt") else {}
+    return {
+        "api": "MusicGen (Local)",
+        "prompt_name": prompt_name,
+        "model": result.get("model", "facebook/musicgen-small"),
+        "device": result.get("device", "cpu"),
+        "prompt_chars": len(cfg["prompt"]),
+        "total_time_s": result.get("generation_time_s"),
+        "tracks_generated": 1 if has_output else 0,
+        "error": None,
+        "tracks": [{
+            "output_file": result.get("output_file"),
+            "file_size_kb": round(result.get("file_size_bytes", 0) / 1024, 1),
+            "duration_actual_s": result.get("duration_actual_s"),
+            "duration_requested_s": cfg.get("duration_s", 30),
+        }] if has_output else [],
+        **reused,
+    }
 
 
-def run_musicgen(prompt_config: dict, prompt_name: str) -> dict:
+def run_musicgen(prompt_config: dict, prompt_name: str, use_cache: bool = True) -> dict:
     try:
         from musicgen_generate import generate_music
 
@@ -191,73 +368,205 @@ def run_musicgen(prompt_config: dict, prompt_name: str) -> dict:
         result = generate_music(
             prompt=cfg["prompt"],
             duration_s=cfg.get("duration_s", 30),
+            use_cache=use_cache,
         )
-
-        has_output = result.get("output_file") is not None
-        return {
-            "api": "MusicGen (Local)",
-            "prompt_name": prompt_name,
-            "model": result.get("model", "facebook/musicgen-small"),
-            "device": result.get("device", "cpu"),
-            "prompt_chars": len(cfg["prompt"]),
-            "total_time_s": result.get("generation_time_s"),
-            "tracks_generated": 1 if has_output else 0,
-            "error": None,
-            "tracks": [{
-                "output_file": result.get("output_file"),
-                "file_size_kb": round(result.get("file_size_bytes", 0) / 1024, 1),
-                "duration_actual_s": result.get("duration_actual_s"),
-                "duration_requested_s": cfg.get("duration_s", 30),
-            }] if has_output else [],
-        }
+        return _musicgen_summary(cfg, prompt_name, result)
     except Exception as e:
         return {"api": "MusicGen (Local)", "prompt_name": prompt_name, "error": str(e), "tracks": []}
 
 
+# Parallel orchestration
+
+def _init_musicgen_worker(core_groups) -> None:
+    """Pin this worker to one core group and load the model once for all its jobs."""
+    cores, inter_op_threads = core_groups.get()
 
+    from musicgen_cpu import apply_cpu_profile
+    from musicgen_generate import _load_model
+
+    profile = apply_cpu_profile(len(cores), inter_op_threads, cores)
+    print(f"[MusicGen] Worker {os.getpid()} pinned to cores {cores} "
+          f"({profile['intra_op_threads']} intra-op / {profile['inter_op_threads']} inter-op threads)")
+    _load_model()
+
+
+def _musicgen_job(prompt_config: dict, use_cache: bool) -> dict:
+    return run_musicgen(prompt_config, prompt_config["name"], use_cache=use_cache)
+
+
+def run_parallel(
+    prompt_configs: list[dict],
+    use_cache: bool = True,
+    workers: int | None = MUSICGEN_WORKERS,
+    store: JobStore | None = None,
+):
+    """
+    Run Suno and MusicGen side by side and yield (i, result) as each finishes.
+
+    Suno prompts are submitted together and awaited on a background thread
+    (the time is network waiting). MusicGen prompts go to a process pool
+    whose workers are pinned to disjoint core groups and load the model
+    once, so the total wall time approaches max(Suno, MusicGen) rather
+    than their sum. Without `workers`, the workers x threads split comes
+    from musicgen_cpu.plan_workers (using the autotune result if any).
+
+    With a job store, finished jobs are yielded from it without running
+    again and every new result is recorded as it arrives (see run_suno_all
+    for how Suno tasks are resumed).
+    """
+    suno_futures = [Future() for _ in prompt_configs]
+
+    def suno_done(i: int, summary: dict) -> None:
+        if not suno_futures[i].done():
+            suno_futures[i].set_result(summary)
+
+    def run_suno_side() -> None:
+        results = run_suno_all(prompt_configs, on_result=suno_done, store=store, reuse=use_cache)
+        for i, summary in enumerate(results):
+            suno_done(i, summary or {
+                "api": "Suno", "prompt_name": prompt_configs[i]["name"],
+                "error": "no result", "tracks": [],
+            })
+
+    from musicgen_cpu import PLAN_INTER_OP_THREADS, available_cores, load_tuning, plan_workers, split_cores
+
+    mg_keys = job_keys(store, prompt_configs, "musicgen") if store is not None else []
+    mg_jobs = [store.get(key) for key in mg_keys] or [None] * len(prompt_configs)
+    remaining = sum(1 for job in mg_jobs if job is None or job["state"] != DONE)
+
+    if workers is None:
+        plan = plan_workers(remaining, tuning=load_tuning())
+        core_groups = plan["core_groups"]
+        memory = f", memory for {plan['memory_cap']}" if plan["memory_cap"] is not None else ""
+        print(f"[MusicGen] Plan: {plan['workers']} worker(s) x {plan['threads']} thread(s) "
+              f"({plan['source']}{memory})")
+    else:
+        core_groups = split_cores(available_cores(), workers)
+
+    ctx = multiprocessing.get_context("spawn")
+    group_queue = ctx.Queue()
+    for group in core_groups:
+        group_queue.put((group, PLAN_INTER_OP_THREADS))
+
+    with ProcessPoolExecutor(
+        max_workers=len(core_groups),
+        mp_context=ctx,
+        initializer=_init_musicgen_worker,
+        initargs=(group_queue,),
+    ) as pool:
+        mg_futures = []
+        for p, job in zip(prompt_configs, mg_jobs):
+            if job is not None and job["state"] == DONE:
+                mg_futures.append(Future())
+                mg_futures[-1].set_result(job["result"])
+            else:
+                mg_futures.append(pool.submit(_musicgen_job, p, use_cache))
+        threading.Thread(target=run_suno_side, name="suno", daemon=True).start()
+
+        slots = {f: 2 * i for i, f in enumerate(suno_futures)}
+        slots.update({f: 2 * i + 1 for i, f in enumerate(mg_futures)})
+        for future in as_completed(slots):
+            i = slots[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"api": "MusicGen (Local)", "prompt_name": prompt_configs[i // 2]["name"],
+                          "error": str(e), "tracks": []}
+            if i % 2 and store is not None and mg_jobs[i // 2]["state"] != DONE:
+                if result.get("error"):
+                    store.mark_failed(mg_keys[i // 2], result["error"])
+                else:
+                    store.mark_done(mg_keys[i // 2], result)
+            yield i, result
+
+
+def results_header(prompt_configs: list[dict]) -> dict:
+    """Fields of RESULTS_FILE besides the results, logged at the start of a run."""
+    return {
+        "question": "Q2: Prompt Engineering",
+        "timestamp": datetime.datetime.now().isoformat(),
+        "prompts": [{"name": p["name"], "description": p["description"]} for p in prompt_configs],
+    }
+
+
+def analyze_tracks(all_results: list, workers: int | None = None) -> list[dict]:
+    """
+    Compute audio features (loudness, tempo, spectral centroid, silence) of
+    every downloaded / generated track, attach them to the track entries as
+    "features" and write them to a columnar FEATURES_NAME file. Returns the
+    feature rows.
+    """
+    from audio_analysis import FEATURE_COLUMNS, FEATURES_FILE, analyze_files, write_features
+
+    tracks = []
+    for result in all_results:
+        for track in (result or {}).get("tracks", []):
+            path = track.get("local_file") or track.get("output_file")
+            if path and os.path.exists(path):
+                tracks.append((track, path, result["api"]))
+    rows = analyze_files([(path, api) for _, path, api in tracks], workers=workers)
+
+    metrics = FEATURE_COLUMNS[FEATURE_COLUMNS.index("duration_s"):FEATURE_COLUMNS.index("analysis_s")]
+    for (track, _, _), row in zip(tracks, rows):
+        track["features"] = {"error": row["error"]} if row["error"] else {m: row[m] for m in metrics}
+    if rows:
+        write_features(rows, FEATURES_NAME + os.path.splitext(FEATURES_FILE)[1])
+    return rows
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare prompts across Suno and MusicGen")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always generate, ignoring cached results and tracks of similar earlier prompts")
+    parser.add_argument("--reuse-threshold", type=float, default=PROMPT_REUSE_THRESHOLD,
+                        help="prompt similarity (0-1) above which an earlier track is reused; >1 disables "
+                             f"(default: {PROMPT_REUSE_THRESHOLD})")
+    parser.add_argument("--workers", type=int, default=MUSICGEN_WORKERS,
+                        help="number of MusicGen worker processes (default: planned from the core count)")
+    parser.add_argument("--fresh", action="store_true", help="forget finished and in-flight jobs from earlier runs")
+    parser.add_argument("--analyze", action="store_true",
+                        help="also measure loudness, tempo, spectral centroid and silence of every track")
+    args = parser.parse_args()
+
+    # Spawned MusicGen workers read the threshold from the environment
+    PROMPT_REUSE_THRESHOLD = args.reuse_threshold
+    os.environ["AIMUSIC_PROMPT_REUSE"] = str(args.reuse_threshold)
+
+    # Job states survive crashes: a rerun skips finished prompts and
+    # re-attaches to Suno tasks that were already submitted.
+    store = JobStore()
+    if args.fresh:
+        store.clear(JOB_BATCH)
+    counts = store.counts(JOB_BATCH)
+    if counts["done"] or counts["submitted"]:
+        print(f"[Jobs] Resuming from {store.path}: {counts['done']} done, {counts['submitted']} in flight")
+
     print("=" * 60)
     print("  Q2: Prompt Engineering - Suno vs MusicGen")
     print(f"  {len(PROMPTS)} prompts × 2 APIs = {len(PROMPTS) * 2} total generations")
     print("=" * 60)
 
-    all_results = []
-
     for i, prompt_config in enumerate(PROMPTS, 1):
-        name = prompt_config["name"]
-        desc = prompt_config["description"]
-
         print(f"\n{'─' * 60}")
-        print(f"  PROMPT {i}/{len(PROMPTS)}: {name}")
-        print(f"  {desc}")
-        print(f"{'─' * 60}")
-
-        # Run on Suno
-        print(f"\n  [Suno] Testing '{name}'...")
-        suno_result = run_suno(prompt_config, name)
-        status = "OK" if not suno_result.get("error") else f"FAILED: {suno_result['error'][:60]}"
-        print(f"  [Suno] {status} | tracks={suno_result.get('tracks_generated', 0)} | time={suno_result.get('total_time_s', 'N/A')}s")
-        all_results.append(suno_result)
-
-        # Run on MusicGen (Local)
-        print(f"\n  [MusicGen] Testing '{name}'...")
-        mg_result = run_musicgen(prompt_config, name)
-        status = "OK" if not mg_result.get("error") else f"FAILED: {mg_result['error'][:60]}"
-        print(f"  [MusicGen] {status} | tracks={mg_result.get('tracks_generated', 0)} | time={mg_result.get('total_time_s', 'N/A')}s")
-        all_results.append(mg_result)
-
-    output = {
-        "question": "Q2: Prompt Engineering",
-        "timestamp": datetime.datetime.now().isoformat(),
-        "total_prompts": len(PROMPTS),
-        "prompts": [{"name": p["name"], "description": p["description"]} for p in PROMPTS],
-        "results": all_results,
-    }
-
-    with open(RESULTS_FILE, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+        print(f"  PROMPT {i}/{len(PROMPTS)}: {prompt_config['name']}")
+        print(f"  {prompt_config['description']}")
+    print(f"{'─' * 60}")
+
+    # Suno (network-bound) and MusicGen (CPU-bound) run side by side; each
+    # result is appended to prompt_comparison.jsonl as it comes in
+    # (python -m aimusic.results_log tail -f prompt_comparison.jsonl).
+    print(f"\n  Running Suno concurrently and MusicGen on {args.workers or 'planned'} pinned worker process(es)...")
+    start_time = time.time()
+    results_log = ResultsLog(RESULTS_LOG_FILE)
+    results_log.start("comparison", results_header(PROMPTS))
+    all_results = [None] * (2 * len(PROMPTS))
+    for i, result in run_parallel(PROMPTS, use_cache=not args.no_cache, workers=args.workers, store=store):
+        all_results[i] = result
+        results_log.append(result, key=i)
+        tag = "[Suno]" if result["api"] == "Suno" else "[MusicGen]"
+        status = "OK" if not result.get("error") else f"FAILED: {result['error'][:60]}"
+        print(f"  {tag} {result['prompt_name']}: {status} | tracks={result.get('tracks_generated', 0)} | time={result.get('total_time_s', 'N/A')}s")
+    print(f"\n  All generations finished in {round(time.time() - start_time, 1)}s")
 
     # Summary table
     print(f"\n{'=' * 60}")
@@ -270,6 +579,18 @@ if __name__ == "__main__":
         t = f"{r.get('total_time_s', 0)}s" if r.get("total_time_s") else "N/A"
         print(f"  {r['prompt_name']:<25s} {r['api']:<12s} {status:<10s} {r.get('tracks_generated', 0):<8d} {t:>8s}")
 
-    print(f"\n  Results saved to: {RESULTS_FILE}")
+    if args.analyze:
+        from audio_analysis import print_features, to_columns
+
+        rows = analyze_tracks(all_results)
+        for i, result in enumerate(all_results):
+            if any("features" in track for track in result.get("tracks", [])):
+                results_log.append(result, key=i)
+        if rows:
+            print_features(to_columns(rows))
+
+    results_log.close()
+    compact(RESULTS_LOG_FILE, RESULTS_FILE, results_log.run_id)
+    print(f"\n  Results saved to: {RESULTS_FILE} (log: {RESULTS_LOG_FILE})")
     print(f"{'=' * 60}\n")
 
@@ -0,0 +1,297 @@
+"""
+Suno API - Local Fake Server
+=============================
+A stand-in for the Suno API, for exercising the client end to end
+without an API key or network access. Tasks walk through
+PENDING -> TEXT_SUCCESS -> FIRST_SUCCESS -> SUCCESS on a timer, and
+"text" / "first" / "complete" callbacks are POSTed to the task's
+callBackUrl at the same points (unless it is the example.com default).
+
+With --rate-limit N, API requests beyond N per second are answered with
+HTTP 429 and a Retry-After header, like a throttled account.
+
+Usage:
+  python fake_suno_server.py [--port 8901] [--task-seconds 6] [--rate-limit 2]
+
+  # in another shell
+  SUNO_BASE_URL=http://127.0.0.1:8901/api/v1 SUNO_API_KEY=test \\
+      python suno_generate.py
+"""
+
+import json
+import time
+import uuid
+import hashlib
+import argparse
+import threading
+import collections
+import urllib.request
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FAKE_HOST = "127.0.0.1"
+FAKE_PORT = 8901
+FAKE_TASK_SECONDS = 6.0      # time from submission to SUCCESS
+FAKE_TRACKS_PER_TASK = 2
+FAKE_AUDIO_BYTES = 512 * 1024  # size of each served fake MP3
+
+# Fraction of FAKE_TASK_SECONDS at which each status is reached
+_STATUS_TIMELINE = [
+    (0.0, "PENDING"),
+    (0.3, "TEXT_SUCCESS"),
+    (0.6, "FIRST_SUCCESS"),
+    (1.0, "SUCCESS"),
+]
+
+_CALLBACK_TYPES = {"TEXT_SUCCESS": "text", "FIRST_SUCCESS": "first", "SUCCESS": "complete"}
+
+
+class FakeSunoState:
+    """In-memory task table shared by all request handlers."""
+
+    def __init__(self, task_seconds: float = FAKE_TASK_SECONDS, rate_limit: float | None = None):
+        self.task_seconds = task_seconds
+        self.rate_limit = rate_limit
+        self.tasks = {}
+        self.request_counts = {"generate": 0, "record_info": 0, "callbacks_sent": 0, "throttled": 0}
+        self.lock = threading.Lock()
+        self._recent = collections.deque()
+
+    def throttle(self) -> bool:
+        """True if this API request is over the per-second rate limit."""
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.rate_limit:
+                self.request_counts["throttled"] += 1
+                return True
+            self._recent.append(now)
+            return False
+
+    def create_task(self, payload: dict, base_url: str) -> str:
+        task_id = uuid.uuid4().hex
+        with self.lock:
+            self.request_counts["generate"] += 1
+            self.tasks[task_id] = {"payload": payload, "created": time.monotonic()}
+
+        callback_url = payload.get("callBackUrl") or ""
+        if callback_url.startswith("http") and "example.com" not in callback_url:
+            for fraction, status in _STATUS_TIMELINE[1:]:
+                timer = threading.Timer(
+                    fraction * self.task_seconds,
+                    self._send_callback,
+                    args=(task_id, status, callback_url, base_url),
+                )
+                timer.daemon = True
+                timer.start()
+        return task_id
+
+    def _send_callback(self, task_id: str, status: str, callback_url: str, base_url: str):
+        tracks = self.record_info(task_id, base_url, count=False)["response"]["sunoData"]
+        body = {
+            "code": 200,
+            "msg": "success",
+            "data": {
+                "callbackType": _CALLBACK_TYPES[status],
+                "task_id": task_id,
+                "data": [
+                    {
+                        "id": t["id"],
+                        "title": t["title"],
+                        "tags": t["tags"],
+                        "duration": t["duration"],
+                        "model_name": t["modelName"],
+                        "audio_url": t["audioUrl"],
+                        "stream_audio_url": t["streamAudioUrl"],
+                        "image_url": t["imageUrl"],
+                    }
+                    for t in tracks
+                ],
+            },
+        }
+        request = urllib.request.Request(
+            callback_url,
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+            with self.lock:
+                self.request_counts["callbacks_sent"] += 1
+        except OSError:
+            pass
+
+    def status_of(self, task_id: str) -> str:
+        progress = (time.monotonic() - self.tasks[task_id]["created"]) / self.task_seconds
+        status = _STATUS_TIMELINE[0][1]
+        for threshold, name in _STATUS_TIMELINE:
+            if progress >= threshold:
+                status = name
+        return status
+
+    def record_info(self, task_id: str, base_url: str, count: bool = True) -> dict:
+        if count:
+            with self.lock:
+                self.request_counts["record_info"] += 1
+        task = self.tasks[task_id]
+        status = self.status_of(task_id)
+        payload = task["payload"]
+
+        tracks = []
+        if status == "SUCCESS":
+            for i in range(1, FAKE_TRACKS_PER_TASK + 1):
+                track_id = f"{task_id}-{i}"
+                tracks.append({
+                    "id": track_id,
+                    "title": payload.get("title") or "Fake Track",
+                    "tags": payload.get("style") or "fake",
+                    "duration": 30.0,
+                    "modelName": "fake-model",
+                    "createTime": int(time.time() * 1000),
+                    "audioUrl": f"{base_url}/audio/{track_id}.mp3",
+                    "streamAudioUrl": f"{base_url}/stream/{track_id}",
+                    "imageUrl": f"{base_url}/image/{track_id}.jpeg",
+                })
+
+        return {
+            "taskId": task_id,
+            "status": status,
+            "response": {"sunoData": tracks},
+            "errorMessage": None,
+        }
+
+
+def fake_audio(track_id: str) -> bytes:
+    """Deterministic stand-in audio bytes for a track."""
+    block = hashlib.sha256(track_id.encode("utf-8")).digest()
+    return (block * (FAKE_AUDIO_BYTES // len(block) + 1))[:FAKE_AUDIO_BYTES]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeSuno/1.0"
+
+    @property
+    def state(self) -> FakeSunoState:
+        return self.server.state
+
+    def _base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_throttled(self):
+        data = b'{"code": 429, "msg": "Too Many Requests"}'
+        self.send_response(429)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Retry-After", "1")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/api/v1/generate":
+            self._send_json(404, {"code": 404, "msg": "not found"})
+            return
+        if self.state.throttle():
+            self._send_throttled()
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        task_id = self.state.create_task(payload, self._base_url())
+        self._send_json(200, {"code": 200, "msg": "success", "data": {"taskId": task_id}})
+
+    def _send_audio(self, head_only: bool):
+        track_id = urlparse(self.path).path.rsplit("/", 1)[-1].removesuffix(".mp3")
+        audio = fake_audio(track_id)
+        start, status = 0, 200
+
+        range_header = self.headers.get("Range", "")
+        if range_header.startswith("bytes=") and not head_only:
+            start = int(range_header[len("bytes="):].split("-")[0] or 0)
+            status = 206
+
+        body = audio[start:]
+        self.send_response(status)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{len(audio) - 1}/{len(audio)}")
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        if urlparse(self.path).path.startswith("/audio/"):
+            self._send_audio(head_only=True)
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.startswith("/audio/"):
+            self._send_audio(head_only=False)
+        elif url.path == "/api/v1/generate/record-info":
+            if self.state.throttle():
+                self._send_throttled()
+                return
+            task_id = parse_qs(url.query).get("taskId", [""])[0]
+            if task_id not in self.state.tasks:
+                self._send_json(200, {"code": 404, "msg": f"unknown taskId {task_id}", "data": {}})
+                return
+            data = self.state.record_info(task_id, self._base_url())
+            self._send_json(200, {"code": 200, "msg": "success", "data": data})
+        else:
+            self._send_json(404, {"code": 404, "msg": "not found"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_server(
+    host: str = FAKE_HOST,
+    port: int = FAKE_PORT,
+    task_seconds: float = FAKE_TASK_SECONDS,
+    rate_limit: float | None = None,
+) -> ThreadingHTTPServer:
+    """
+    Start the fake server on a background thread and return it.
+
+    Pass port=0 to pick a free port; the base URL to use as SUNO_BASE_URL
+    is f"http://{host}:{server.server_address[1]}/api/v1".
+    Call server.shutdown() when done.
+    """
+    httpd = ThreadingHTTPServer((host, port), _Handler)
+    httpd.state = FakeSunoState(task_seconds, rate_limit)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake Suno API server")
+    parser.add_argument("--host", default=FAKE_HOST)
+    parser.add_argument("--port", type=int, default=FAKE_PORT)
+    parser.add_argument("--task-seconds", type=float, default=FAKE_TASK_SECONDS)
+    parser.add_argument("--rate-limit", type=float, default=None, help="API requests per second before HTTP 429")
+    args = parser.parse_args()
+
+    server = start_fake_server(args.host, args.port, args.task_seconds, args.rate_limit)
+    print(f"[Fake Suno] Listening on http://{args.host}:{server.server_address[1]}/api/v1 "
+          f"(tasks finish after {args.task_seconds}s)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
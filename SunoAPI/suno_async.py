@@ -0,0 +1,232 @@
+"""
+Suno API - Async Client
+========================
+asyncio versions of generate_music / get_task_status / wait_for_completion
+sharing one pooled httpx.AsyncClient, plus run_tasks() to submit many
+generations up front and wait on all of them concurrently.
+
+The functions in suno_generate.py are thin synchronous wrappers around
+these.
+"""
+
+import time
+import asyncio
+import contextlib
+import httpx
+
+from suno_utils import (
+    ENDPOINTS,
+    DEFAULT_MODEL,
+    STATUS_PENDING,
+    STATUS_SUCCESS,
+    FAILURE_STATUSES,
+    DEFAULT_MAX_WAIT,
+    REQUEST_TIMEOUT,
+    MAX_CONCURRENT_REQUESTS,
+    get_headers,
+    validate_params,
+    build_payload,
+    PollSchedule,
+)
+from aimusic import telemetry
+
+
+def create_client(concurrency: int = MAX_CONCURRENT_REQUESTS) -> httpx.AsyncClient:
+    """
+    Build a pooled keep-alive client.
+
+    The pool size is the concurrency limit: at most `concurrency` requests
+    are in flight, the rest wait for a free connection.
+    """
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, pool=None),
+        limits=httpx.Limits(
+            max_connections=concurrency,
+            max_keepalive_connections=concurrency,
+        ),
+    )
+
+
+@contextlib.asynccontextmanager
+async def _client_scope(client: httpx.AsyncClient | None):
+    """Use the caller's client, or open a short-lived one."""
+    if client is not None:
+        yield client
+    else:
+        async with create_client() as own_client:
+            yield own_client
+
+
+# API Functions
+async def generate_music(
+    prompt: str,
+    custom_mode: bool = False,
+    instrumental: bool = False,
+    style: str | None = None,
+    title: str | None = None,
+    model: str = DEFAULT_MODEL,
+    api_key: str | None = None,
+    client: httpx.AsyncClient | None = None,
+    **optional,
+) -> dict:
+    validate_params(prompt, custom_mode, instrumental, style, title, model)
+
+    payload = build_payload(
+        prompt=prompt,
+        custom_mode=custom_mode,
+        instrumental=instrumental,
+        model=model,
+        style=style,
+        title=title,
+        **optional,
+    )
+
+    print(f"[Suno] Submitting generation request (model={model}) ...")
+    with telemetry.span("suno.submit", model=model):
+        async with _client_scope(client) as http:
+            response = await http.post(
+                ENDPOINTS["generate"],
+                headers=get_headers(api_key),
+                json=payload,
+            )
+        response.raise_for_status()
+        result = response.json()
+
+    if result.get("code") != 200:
+        raise RuntimeError(
+            f"Suno API error {result.get('code')}: {result.get('msg')}"
+        )
+
+    task_id = result["data"]["taskId"]
+    print(f"[Suno] Task submitted successfully! taskId = {task_id}")
+    return result
+
+
+async def get_task_status(
+    task_id: str,
+    api_key: str | None = None,
+    client: httpx.AsyncClient | None = None,
+) -> dict:
+    with telemetry.span("suno.status_poll"):
+        async with _client_scope(client) as http:
+            response = await http.get(
+                ENDPOINTS["record_info"],
+                headers=get_headers(api_key),
+                params={"taskId": task_id},
+            )
+        response.raise_for_status()
+        return response.json()
+
+
+async def wait_for_completion(
+    task_id: str,
+    api_key: str | None = None,
+    poll_interval: float | None = None,
+    max_wait: float = DEFAULT_MAX_WAIT,
+    client: httpx.AsyncClient | None = None,
+) -> dict:
+    """
+    Poll the Suno API until the task completes or fails.
+
+    Polls follow an adaptive PollSchedule unless a fixed poll_interval is
+    given. max_wait is measured on the monotonic clock, so it includes
+    request latency, not just sleep time. Sleeping yields to the event
+    loop, so many tasks can wait at once.
+
+    The whole wait is recorded as the suno.completion span, and the time
+    until the task first reports a status past PENDING as suno.first_status.
+    """
+    with telemetry.span("suno.completion"):
+        return await _wait_for_completion(task_id, api_key, poll_interval, max_wait, client)
+
+
+async def _wait_for_completion(
+    task_id: str,
+    api_key: str | None,
+    poll_interval: float | None,
+    max_wait: float,
+    client: httpx.AsyncClient | None,
+) -> dict:
+    schedule = PollSchedule() if poll_interval is None else None
+    start = time.monotonic()
+    deadline = start + max_wait
+    status = STATUS_PENDING
+    print(f"[Suno] Waiting for task {task_id} to complete ...")
+
+    async with _client_scope(client) as http:
+        while True:
+            result = await get_task_status(task_id, api_key, client=http)
+            data = result.get("data", {})
+            previous, status = status, data.get("status", "UNKNOWN")
+
+            print(f"[Suno]  {task_id} status: {status}  "
+                  f"({time.monotonic() - start:.1f}s elapsed)")
+
+            if previous == STATUS_PENDING and status != STATUS_PENDING:
+                telemetry.observe("suno.first_status", time.monotonic() - start)
+
+            if status == STATUS_SUCCESS:
+                print(f"[Suno] Task {task_id} complete!")
+                return data
+
+            if status in FAILURE_STATUSES:
+                error_msg = data.get("errorMessage") or status
+                raise RuntimeError(f"[Suno] Generation failed: {error_msg}")
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            delay = poll_interval if schedule is None else schedule.next_interval(status)
+            await asyncio.sleep(min(delay, remaining))
+
+    raise RuntimeError(
+        f"[Suno]   Timed out after {max_wait}s. "
+        f"Task {task_id} is still in status: {status}"
+    )
+
+
+async def run_tasks(
+    jobs: list[dict],
+    api_key: str | None = None,
+    concurrency: int = MAX_CONCURRENT_REQUESTS,
+    poll_interval: float | None = None,
+    max_wait: float = DEFAULT_MAX_WAIT,
+) -> list[dict | Exception]:
+    """
+    Submit every job up front, then wait for all of them together.
+
+    Each job is a dict of generate_music() keyword arguments. Status is
+    checked in shared sweeps by a TaskTracker. Returns the completed task
+    data for each job in input order, or the exception that job raised,
+    so one failure does not cancel the others.
+    """
+    from suno_tracker import TaskTracker
+
+    async with create_client(concurrency) as client:
+        submissions = await asyncio.gather(
+            *(generate_music(api_key=api_key, client=client, **job) for job in jobs),
+            return_exceptions=True,
+        )
+
+        results = list(submissions)
+        index = {}
+        for i, submission in enumerate(submissions):
+            if not isinstance(submission, Exception):
+                index[submission["data"]["taskId"]] = i
+
+        tracker = TaskTracker(index, api_key, poll_interval, max_wait, concurrency)
+        try:
+            async for task_id, data in tracker.as_completed(client):
+                status = data.get("status")
+                if status in FAILURE_STATUSES:
+                    error_msg = data.get("errorMessage") or status
+                    results[index[task_id]] = RuntimeError(f"[Suno] Generation failed: {error_msg}")
+                else:
+                    print(f"[Suno] Task {task_id} complete!")
+                    results[index[task_id]] = data
+        except RuntimeError as e:
+            for task_id in tracker.pending:
+                results[index[task_id]] = e
+
+        return results
@@ -0,0 +1,205 @@
+"""
+Suno API - Callback Receiver
+=============================
+Optional local HTTP endpoint for Suno's completion callbacks, so waiting
+tasks wake up as soon as Suno reports them done instead of polling.
+
+Suno POSTs to the callBackUrl given at submission with a body like
+  {"code": 200, "data": {"callbackType": "complete", "task_id": "...", ...}}
+A "complete" or "error" callback resolves that task's future; the waiter
+then fetches record-info once so callers get the same task data shape as
+wait_for_completion(). Tasks with no callback before the deadline fall
+back to slow polling.
+
+  async with CallbackReceiver() as receiver:
+      result = await generate_music(prompt, callback_url=receiver.callback_url)
+      data = await receiver.wait(result["data"]["taskId"])
+"""
+
+import json
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import httpx
+
+from suno_utils import (
+    CALLBACK_HOST,
+    CALLBACK_PORT,
+    CALLBACK_PATH,
+    CALLBACK_PUBLIC_URL,
+    CALLBACK_DEADLINE,
+    CALLBACK_FALLBACK_POLL_INTERVAL,
+    DEFAULT_MAX_WAIT,
+    MAX_CONCURRENT_REQUESTS,
+)
+from suno_async import create_client, generate_music, wait_for_completion
+
+FINAL_CALLBACK_TYPES = ["complete", "error"]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "SunoCallbackReceiver/1.0"
+
+    def do_POST(self):
+        if self.path.split("?")[0] != CALLBACK_PATH:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            body = {}
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"status": "received"}')
+
+        self.server.receiver._on_callback(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CallbackReceiver:
+    """
+    Background HTTP server that turns Suno callbacks into asyncio futures.
+
+    Must be started from inside a running event loop (use `async with`).
+    """
+
+    def __init__(
+        self,
+        host: str = CALLBACK_HOST,
+        port: int = CALLBACK_PORT,
+        public_url: str = CALLBACK_PUBLIC_URL,
+    ):
+        self.host = host
+        self.port = port
+        self.public_url = public_url
+        self._httpd = None
+        self._loop = None
+        self._futures = {}
+        self.callbacks_received = 0
+
+    @property
+    def callback_url(self) -> str:
+        """URL to pass as callBackUrl when submitting tasks."""
+        if self.public_url:
+            return self.public_url
+        return f"http://{self.host}:{self.port}{CALLBACK_PATH}"
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._httpd.receiver = self
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        print(f"[Suno] Callback receiver listening on {self.callback_url}")
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.stop()
+
+    def _future(self, task_id: str) -> asyncio.Future:
+        if task_id not in self._futures:
+            self._futures[task_id] = self._loop.create_future()
+        return self._futures[task_id]
+
+    def _on_callback(self, body: dict) -> None:
+        """Runs on the HTTP thread; hands the callback to the event loop."""
+        data = body.get("data") or {}
+        task_id = data.get("task_id") or data.get("taskId")
+        callback_type = data.get("callbackType")
+        self.callbacks_received += 1
+        print(f"[Suno] Callback received: {task_id} ({callback_type})")
+
+        if task_id and callback_type in FINAL_CALLBACK_TYPES:
+            self._loop.call_soon_threadsafe(self._resolve, task_id, body)
+
+    def _resolve(self, task_id: str, body: dict) -> None:
+        future = self._future(task_id)
+        if not future.done():
+            future.set_result(body)
+
+    async def wait(
+        self,
+        task_id: str,
+        api_key: str | None = None,
+        deadline: float = CALLBACK_DEADLINE,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        client: httpx.AsyncClient | None = None,
+    ) -> dict:
+        """
+        Wait for a task's final callback, then return its task data.
+
+        If no callback arrives within `deadline` seconds, poll every
+        CALLBACK_FALLBACK_POLL_INTERVAL seconds for up to `max_wait` more.
+        """
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future(task_id)), deadline)
+        except asyncio.TimeoutError:
+            print(f"[Suno] No callback for {task_id} after {deadline}s, falling back to polling")
+            return await wait_for_completion(
+                task_id,
+                api_key,
+                poll_interval=CALLBACK_FALLBACK_POLL_INTERVAL,
+                max_wait=max_wait,
+                client=client,
+            )
+
+        # The callback only signals completion; record-info has the
+        # canonical data (and any failure status) and should answer at once.
+        return await wait_for_completion(task_id, api_key, max_wait=max_wait, client=client)
+
+
+async def run_tasks_with_callbacks(
+    jobs: list[dict],
+    api_key: str | None = None,
+    receiver: CallbackReceiver | None = None,
+    deadline: float = CALLBACK_DEADLINE,
+    concurrency: int = MAX_CONCURRENT_REQUESTS,
+) -> list[dict | Exception]:
+    """
+    Like suno_async.run_tasks(), but completion is signalled by callbacks.
+
+    Uses the given receiver, or starts one on CALLBACK_HOST:CALLBACK_PORT
+    for the duration of the call.
+    """
+    owns_receiver = receiver is None
+    if owns_receiver:
+        receiver = CallbackReceiver()
+        receiver.start()
+
+    try:
+        async with create_client(concurrency) as client:
+            async def run_one(job: dict) -> dict:
+                result = await generate_music(
+                    api_key=api_key,
+                    client=client,
+                    callback_url=receiver.callback_url,
+                    **job,
+                )
+                return await receiver.wait(
+                    result["data"]["taskId"], api_key, deadline=deadline, client=client,
+                )
+
+            return await asyncio.gather(
+                *(run_one(job) for job in jobs),
+                return_exceptions=True,
+            )
+    finally:
+        if owns_receiver:
+            receiver.stop()
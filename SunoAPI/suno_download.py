@@ -0,0 +1,175 @@
+"""
+Suno API - Audio Downloader
+============================
+Fetches the audio of a completed task to disk.
+
+All tracks of a task download in parallel over one pooled connection.
+Each file is streamed in DOWNLOAD_CHUNK_SIZE chunks into <name>.part,
+resumed with an HTTP Range request if a partial file is already there,
+and renamed into place only once its size checks out. Files that already
+exist are skipped only when the server reports a size and it matches;
+without one they are downloaded again. Memory use is one chunk per
+track, however long the track is.
+"""
+
+import os
+import asyncio
+import hashlib
+import httpx
+
+from suno_utils import (
+    DOWNLOAD_DIR,
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_TIMEOUT,
+    MAX_CONCURRENT_REQUESTS,
+)
+from aimusic import telemetry
+
+_UNSAFE_CHARS = '<>:"/\\|?*\n\r\t'
+
+
+def track_filename(track: dict, index: int) -> str:
+    """Name a track '<title>_track<index>.mp3', matching the existing audio folders."""
+    title = track.get("title") or track.get("id") or "Untitled"
+    safe_title = "".join("_" if c in _UNSAFE_CHARS else c for c in title).strip()[:80]
+    return f"{safe_title}_track{index}.mp3"
+
+
+def _hash_file(path: str, digest) -> None:
+    """Feed an existing file into a hash object, one chunk at a time."""
+    with open(path, "rb") as f:
+        while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+
+
+async def _remote_size(client: httpx.AsyncClient, url: str) -> int | None:
+    response = await client.head(url, follow_redirects=True)
+    if response.status_code >= 400:
+        return None
+    length = response.headers.get("Content-Length")
+    return int(length) if length is not None else None
+
+
+def _total_size(response: httpx.Response, offset: int) -> int | None:
+    """Full size of the file from a GET response (Content-Range, else offset + Content-Length)."""
+    total = response.headers.get("Content-Range", "").rpartition("/")[2]
+    if total.isdigit():
+        return int(total)
+    length = response.headers.get("Content-Length")
+    return offset + int(length) if length is not None and "Content-Encoding" not in response.headers else None
+
+
+def _finish_part(part_path: str, path: str) -> dict:
+    """Hash a `.part` file that already holds the whole track and move it into place."""
+    digest = hashlib.sha256()
+    _hash_file(part_path, digest)
+    size = os.path.getsize(part_path)
+    os.replace(part_path, path)
+    return {"path": path, "bytes": size, "sha256": digest.hexdigest(), "status": "resumed"}
+
+
+async def download_file(client: httpx.AsyncClient, url: str, path: str) -> dict:
+    """
+    Stream one URL to `path`, resuming a leftover `path`.part if present.
+
+    Returns a dict with the path, byte count, sha256 and whether the file
+    was downloaded, resumed or skipped.
+    """
+    expected = await _remote_size(client, url)
+
+    # Without a known size an existing file may be one cut short by a crash
+    if os.path.exists(path) and expected is not None and os.path.getsize(path) == expected:
+        digest = hashlib.sha256()
+        _hash_file(path, digest)
+        return {"path": path, "bytes": os.path.getsize(path),
+                "sha256": digest.hexdigest(), "status": "skipped"}
+
+    part_path = f"{path}.part"
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if expected is not None and offset > expected:
+        offset = 0
+    if offset and offset == expected:
+        # Crashed between the last write and the rename: nothing left to fetch
+        return _finish_part(part_path, path)
+
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    async with client.stream("GET", url, headers=headers, follow_redirects=True) as response:
+        if offset and response.status_code == 416 and response.headers.get("Content-Range") == f"bytes */{offset}":
+            return _finish_part(part_path, path)  # the part already ends where the file does
+        response.raise_for_status()
+        if offset and response.status_code != 206:
+            offset = 0  # server ignored the Range header; start over
+        if expected is None:
+            expected = _total_size(response, offset)
+
+        digest = hashlib.sha256()
+        if offset:
+            _hash_file(part_path, digest)
+
+        written = offset
+        with open(part_path, "ab" if offset else "wb") as f:
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                digest.update(chunk)
+                written += len(chunk)
+
+    if expected is not None and written != expected:
+        raise RuntimeError(
+            f"[Suno] Incomplete download of {url}: got {written} of {expected} bytes "
+            f"(partial file kept at {part_path})"
+        )
+
+    os.replace(part_path, path)
+    return {"path": path, "bytes": written, "sha256": digest.hexdigest(),
+            "status": "resumed" if offset else "downloaded"}
+
+
+async def download_task_audio(
+    task_data: dict,
+    output_dir: str = DOWNLOAD_DIR,
+    client: httpx.AsyncClient | None = None,
+) -> list[dict]:
+    """
+    Download every track of a completed task in parallel.
+
+    Returns one entry per track (in track order) with its URL and either
+    the download_file() fields or an 'error'.
+    """
+    tracks = task_data.get("response", {}).get("sunoData", [])
+    os.makedirs(output_dir, exist_ok=True)
+
+    async def fetch(http: httpx.AsyncClient, index: int, track: dict) -> dict:
+        url = track.get("audioUrl") or track.get("streamAudioUrl")
+        entry = {"track": index, "url": url}
+        if not url:
+            entry["error"] = "track has no audio URL"
+            return entry
+        path = os.path.join(output_dir, track_filename(track, index))
+        try:
+            with telemetry.span("suno.download"):
+                entry.update(await download_file(http, url, path))
+            telemetry.count("suno.download_bytes", entry["bytes"], status=entry["status"])
+            print(f"[Suno] {entry['status'].capitalize()}: {path} ({entry['bytes'] / 1024:.1f} KB)")
+        except (httpx.HTTPError, OSError, RuntimeError) as e:
+            entry["error"] = str(e)
+            print(f"[Suno] Download failed for track {index}: {e}")
+        return entry
+
+    async def fetch_all(http: httpx.AsyncClient) -> list[dict]:
+        return await asyncio.gather(
+            *(fetch(http, i, track) for i, track in enumerate(tracks, 1))
+        )
+
+    if client is not None:
+        return await fetch_all(client)
+
+    async with httpx.AsyncClient(
+        timeout=DOWNLOAD_TIMEOUT,
+        limits=httpx.Limits(max_connections=MAX_CONCURRENT_REQUESTS),
+    ) as own_client:
+        return await fetch_all(own_client)
+
+
+def download_tracks(task_data: dict, output_dir: str = DOWNLOAD_DIR) -> list[dict]:
+    """Synchronous wrapper around download_task_audio()."""
+    return asyncio.run(download_task_audio(task_data, output_dir))
@@ -1,22 +1,15 @@
-import time
-import requests
+import asyncio
 
+import suno_async
+from suno_download import download_tracks
 from suno_utils import (
     API_KEY,
-    ENDPOINTS,
     DEFAULT_MODEL,
-    STATUS_SUCCESS,
-    FAILURE_STATUSES,
-    DEFAULT_POLL_INTERVAL,
     DEFAULT_MAX_WAIT,
-    REQUEST_TIMEOUT,
-    get_headers,
-    validate_params,
-    build_payload,
 )
 
 
-# API Functions
+# API Functions (synchronous wrappers around suno_async)
 def generate_music(
     prompt: str,
     custom_mode: bool = False,
@@ -27,84 +20,39 @@ def generate_music(
     api_key: str | None = None,
     **optional,
 ) -> dict:
-    validate_params(prompt, custom_mode, instrumental, style, title, model)
-
-    payload = build_payload(
-        prompt=prompt,
+    return asyncio.run(suno_async.generate_music(
+        prompt,
         custom_mode=custom_mode,
         instrumental=instrumental,
-        model=model,
         style=style,
         title=title,
+        model=model,
+        api_key=api_key,
         **optional,
-    )
-
-    print(f"[Suno] Submitting generation request (model={model}) ...")
-    response = requests.post(
-        ENDPOINTS["generate"],
-        headers=get_headers(api_key),
-        json=payload,
-        timeout=REQUEST_TIMEOUT,
-    )
-    response.raise_for_status()
-    result = response.json()
-
-    if result.get("code") != 200:
-        raise RuntimeError(
-            f"Suno API error {result.get('code')}: {result.get('msg')}"
-        )
-
-    task_id = result["data"]["taskId"]
-    print(f"[Suno] Task submitted successfully! taskId = {task_id}")
-    return result
+    ))
 
 
 def get_task_status(task_id: str, api_key: str | None = None) -> dict:
-    response = requests.get(
-        ENDPOINTS["record_info"],
-        headers=get_headers(api_key),
-        params={"taskId": task_id},
-        timeout=REQUEST_TIMEOUT,
-    )
-    response.raise_for_status()
-    return response.json()
+    return asyncio.run(suno_async.get_task_status(task_id, api_key))
 
 
 def wait_for_completion(
     task_id: str,
     api_key: str | None = None,
-    poll_interval: int = DEFAULT_POLL_INTERVAL,
-    max_wait: int = DEFAULT_MAX_WAIT,
+    poll_interval: float | None = None,
+    max_wait: float = DEFAULT_MAX_WAIT,
 ) -> dict:
     """
     Poll the Suno API until the task completes or fails.
-    """
-    elapsed = 0
-    status = "PENDING"
-    print(f"[Suno] Waiting for task {task_id} to complete ...")
-
-    while elapsed < max_wait:
-        result = get_task_status(task_id, api_key)
-        data = result.get("data", {})
-        status = data.get("status", "UNKNOWN")
-
-        print(f"[Suno]  Status: {status}  ({elapsed}s elapsed)")
-
-        if status == STATUS_SUCCESS:
-            print("[Suno] Generation complete!")
-            return data
 
-        if status in FAILURE_STATUSES:
-            error_msg = data.get("errorMessage") or status
-            raise RuntimeError(f"[Suno] Generation failed: {error_msg}")
-
-        time.sleep(poll_interval)
-        elapsed += poll_interval
-
-    raise RuntimeError(
-        f"[Suno]   Timed out after {max_wait}s. "
-        f"Task {task_id} is still in status: {status}"
-    )
+    Uses adaptive backoff unless a fixed poll_interval is given.
+    """
+    return asyncio.run(suno_async.wait_for_completion(
+        task_id,
+        api_key,
+        poll_interval=poll_interval,
+        max_wait=max_wait,
+    ))
 
 
 def print_results(task_data: dict) -> None:
@@ -145,6 +93,7 @@ if __name__ == "__main__":
     )
     task_data = wait_for_completion(result["data"]["taskId"])
     print_results(task_data)
+    download_tracks(task_data)
 
     # Custom mode – instrumental
     result = generate_music(
@@ -159,6 +108,7 @@ if __name__ == "__main__":
     )
     task_data = wait_for_completion(result["data"]["taskId"])
     print_results(task_data)
+    download_tracks(task_data)
 
     # Custom mode – with lyrics
     result = generate_music(
@@ -171,3 +121,4 @@ if __name__ == "__main__":
     )
     task_data = wait_for_completion(result["data"]["taskId"])
     print_results(task_data)
+    download_tracks(task_data)
@@ -0,0 +1,320 @@
+"""
+Suno API - Submission Scheduler
+================================
+Keeps many Suno generations moving without tripping the API's limits:
+
+  - every request (submit or status poll) first takes a token from a
+    token bucket (API_RATE_PER_S sustained, API_BURST at once)
+  - at most MAX_IN_FLIGHT_TASKS tasks are submitted and unfinished at a
+    time; further jobs queue until one completes
+  - 429 / 5xx responses and throttling / maintenance error codes are
+    retried with exponential backoff and jitter, honoring Retry-After;
+    a throttle also pauses the whole bucket, so other requests back off
+    instead of piling onto the limit
+  - a submission is only resent when it certainly was not accepted
+    (connection failure, throttling), never after a timeout or 5xx that
+    may have created the task already
+
+  async with SubmissionScheduler() as scheduler:
+      results = await scheduler.run(jobs)   # jobs: generate_music() kwargs
+      print(scheduler.stats())
+
+stats() reports queue depth, in-flight tasks and request / retry /
+throttle counters; the counters are also kept in aimusic.telemetry.
+"""
+
+import time
+import random
+import asyncio
+import datetime
+import email.utils
+import httpx
+
+from suno_utils import (
+    ENDPOINTS,
+    DEFAULT_MODEL,
+    STATUS_PENDING,
+    STATUS_SUCCESS,
+    FAILURE_STATUSES,
+    DEFAULT_MAX_WAIT,
+    API_RATE_PER_S,
+    API_BURST,
+    MAX_IN_FLIGHT_TASKS,
+    MAX_RETRIES,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+    RETRY_HTTP_STATUSES,
+    THROTTLE_HTTP_STATUSES,
+    RETRY_API_CODES,
+    THROTTLE_API_CODES,
+    get_headers,
+    validate_params,
+    build_payload,
+    PollSchedule,
+)
+from suno_async import create_client
+from aimusic import telemetry
+
+
+class TaskTimeout(RuntimeError):
+    """A submitted task did not finish within max_wait (it may still finish later)."""
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second, holding at most `capacity`.
+
+    pause(seconds) empties the bucket and blocks every caller until the
+    pause is over, e.g. for a Retry-After from the server.
+    """
+
+    def __init__(self, rate: float = API_RATE_PER_S, capacity: int = API_BURST):
+        if rate <= 0 or capacity < 1:
+            raise ValueError(f"rate must be > 0 and capacity >= 1 (got {rate}, {capacity}).")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        start = max(self._updated, self._paused_until)
+        if now > start:
+            self._tokens = min(self.capacity, self._tokens + (now - start) * self.rate)
+        self._updated = max(now, self._updated)
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns the time waited."""
+        waited = 0.0
+        async with self._lock:  # callers are served in arrival order
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def pause(self, seconds: float) -> None:
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = 0.0
+        self._paused_until = max(self._paused_until, now + seconds)
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter for retry number `attempt` (1-based)."""
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+class SubmissionScheduler:
+    """
+    Rate-limited, retrying Suno client for running many jobs.
+
+    Use as an async context manager (it opens a pooled client unless one
+    is passed in). run_job() submits one job and waits for it; run()
+    does that for a list of jobs concurrently within the limits.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        rate: float = API_RATE_PER_S,
+        burst: int = API_BURST,
+        max_in_flight: int = MAX_IN_FLIGHT_TASKS,
+        max_retries: int = MAX_RETRIES,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        client: httpx.AsyncClient | None = None,
+    ):
+        self.api_key = api_key
+        self.bucket = TokenBucket(rate, burst)
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._client = client
+        self._own_client = client is None
+        self.queued = 0
+        self.in_flight = 0
+        self.counters = dict.fromkeys(
+            ("requests", "retries", "throttled", "server_errors", "submitted", "completed", "failed", "timed_out"),
+            0,
+        )
+
+    async def __aenter__(self):
+        if self._client is None:
+            self._client = create_client()
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._own_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _count(self, name: str) -> None:
+        self.counters[name] += 1
+        telemetry.count(f"suno.{name}")
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "rate_per_s": self.bucket.rate,
+            **self.counters,
+        }
+
+    async def request(self, method: str, url: str, idempotent: bool = True, **kwargs) -> dict:
+        """
+        Send one API request through the bucket and return its JSON body.
+
+        Retryable HTTP statuses and API codes are retried up to max_retries
+        times; anything else (or running out of retries) raises. With
+        idempotent=False (submissions) a request is only resent when it was
+        certainly not accepted: the connection failed, or it was throttled.
+        A timeout or server error may come after Suno created the task, so
+        resending would pay for it twice.
+        """
+        headers = get_headers(self.api_key)
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            self._count("requests")
+            try:
+                response = await self._client.request(method, url, headers=headers, **kwargs)
+            except httpx.TransportError as e:
+                throttled, delay, error = False, None, e
+                not_sent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+            else:
+                try:
+                    body = response.json()
+                except ValueError:
+                    body = {}  # e.g. an HTML error page from a proxy
+                code = body.get("code") if isinstance(body, dict) else None
+                throttled = response.status_code in THROTTLE_HTTP_STATUSES or code in THROTTLE_API_CODES
+                retryable = response.status_code in RETRY_HTTP_STATUSES or code in RETRY_API_CODES
+                if not retryable:
+                    response.raise_for_status()
+                    return body
+                delay = _retry_after(response)
+                error = RuntimeError(f"Suno API returned HTTP {response.status_code} (code {code})")
+                not_sent = throttled
+
+            if throttled:
+                self._count("throttled")
+            elif not isinstance(error, httpx.TransportError):
+                self._count("server_errors")
+
+            if not idempotent and not not_sent:
+                raise RuntimeError(f"[Suno] Not resending a request that may have been accepted: {error}") from error
+            attempt += 1
+            if attempt > self.max_retries:
+                raise RuntimeError(f"[Suno] Giving up after {self.max_retries} retries: {error}") from error
+            delay = delay if delay is not None else _backoff(attempt)
+            if throttled:
+                self.bucket.pause(delay)
+            self._count("retries")
+            print(f"[Suno] {error}; retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def submit(self, model: str = DEFAULT_MODEL, **kwargs) -> str:
+        """Validate and submit one generation; returns its taskId."""
+        validate_params(
+            kwargs.get("prompt"), kwargs.get("custom_mode", False), kwargs.get("instrumental", False),
+            kwargs.get("style"), kwargs.get("title"), model,
+        )
+        payload = build_payload(model=model, **{"custom_mode": False, "instrumental": False, **kwargs})
+
+        with telemetry.span("suno.submit", model=model):
+            result = await self.request("POST", ENDPOINTS["generate"], idempotent=False, json=payload)
+        if result.get("code") != 200:
+            raise RuntimeError(f"Suno API error {result.get('code')}: {result.get('msg')}")
+        self._count("submitted")
+        return result["data"]["taskId"]
+
+    async def wait(self, task_id: str) -> dict:
+        """Poll one task (adaptive schedule) until SUCCESS; raise on failure or TaskTimeout."""
+        schedule = PollSchedule()
+        start = time.monotonic()
+        status = STATUS_PENDING
+        while True:
+            with telemetry.span("suno.status_poll"):
+                result = await self.request("GET", ENDPOINTS["record_info"], params={"taskId": task_id})
+            if result.get("code") != 200:
+                # e.g. an unknown or expired taskId: a failure, not something to wait out
+                raise RuntimeError(f"Suno API error {result.get('code')} for task {task_id}: {result.get('msg')}")
+            data = result.get("data") or {}
+            previous, status = status, data.get("status", "UNKNOWN")
+            if previous == STATUS_PENDING and status != STATUS_PENDING:
+                telemetry.observe("suno.first_status", time.monotonic() - start)
+
+            if status == STATUS_SUCCESS:
+                telemetry.observe("suno.completion", time.monotonic() - start)
+                return data
+            if status in FAILURE_STATUSES:
+                telemetry.observe("suno.completion", time.monotonic() - start, error=True)
+                raise RuntimeError(f"[Suno] Generation failed: {data.get('errorMessage') or status}")
+
+            remaining = start + self.max_wait - time.monotonic()
+            if remaining <= 0:
+                raise TaskTimeout(
+                    f"[Suno]   Timed out after {self.max_wait}s. Task {task_id} is still in status: {status}"
+                )
+            await asyncio.sleep(min(schedule.next_interval(status), remaining))
+
+    async def run_job(self, job: dict, task_id: str | None = None, on_submitted=None) -> dict:
+        """
+        Submit `job` (generate_music() kwargs) once an in-flight slot is
+        free, then wait for it. Pass task_id to re-attach to a task that
+        was already submitted. on_submitted(task_id) is called right after
+        a new submission.
+        """
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        try:
+            if task_id is None:
+                task_id = await self.submit(**job)
+                print(f"[Suno] Task submitted: {task_id} (in flight {self.in_flight}/{self.max_in_flight}, "
+                      f"queued {self.queued})")
+                if on_submitted is not None:
+                    on_submitted(task_id)
+            data = await self.wait(task_id)
+            self._count("completed")
+            return data
+        except TaskTimeout:
+            self._count("timed_out")
+            raise
+        except Exception:
+            self._count("failed")
+            raise
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def run(self, jobs: list[dict]) -> list[dict | Exception]:
+        """Run every job within the limits; returns task data or the exception, in input order."""
+        return await asyncio.gather(*(self.run_job(job) for job in jobs), return_exceptions=True)
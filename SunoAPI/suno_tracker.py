@@ -0,0 +1,188 @@
+"""
+Suno API - Task Tracker
+========================
+Tracks a set of in-flight taskIds and sweeps their status together on a
+single schedule over one pooled keep-alive connection, yielding each task
+as soon as it reaches SUCCESS or a failure status.
+
+  tracker = TaskTracker(task_ids)
+  for task_id, data in tracker:            # sync
+      ...
+  async for task_id, data in tracker:      # async
+      ...
+"""
+
+import time
+import asyncio
+import httpx
+
+from suno_utils import (
+    ENDPOINTS,
+    STATUS_PENDING,
+    STATUS_SUCCESS,
+    NEAR_DONE_STATUSES,
+    FAILURE_STATUSES,
+    DEFAULT_MAX_WAIT,
+    REQUEST_TIMEOUT,
+    MAX_CONCURRENT_REQUESTS,
+    get_headers,
+    PollSchedule,
+)
+from suno_async import create_client, get_task_status
+from aimusic import telemetry
+
+FINAL_STATUSES = [STATUS_SUCCESS, *FAILURE_STATUSES]
+
+
+class TaskTracker:
+    """
+    Poll many Suno tasks in sweeps instead of one loop per task.
+
+    Each sweep requests record-info for every pending taskId (concurrently
+    in async mode, back to back over one connection in sync mode). Tasks
+    that reach a final status are yielded as (task_id, data); check
+    data["status"] to tell success from failure. Sweeps are spaced by a
+    shared PollSchedule driven by the most advanced pending status. If
+    tasks are still pending after max_wait seconds, RuntimeError is raised.
+
+    Per task, the time from tracking start to its first status past
+    PENDING and to its final status is recorded as the suno.first_status
+    and suno.completion telemetry stages.
+    """
+
+    def __init__(
+        self,
+        task_ids=(),
+        api_key: str | None = None,
+        poll_interval: float | None = None,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        concurrency: int = MAX_CONCURRENT_REQUESTS,
+    ):
+        self.api_key = api_key
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self.concurrency = concurrency
+        self.pending = set(task_ids)
+        self.statuses = {task_id: STATUS_PENDING for task_id in self.pending}
+        self._started = {task_id: time.monotonic() for task_id in self.pending}
+        self.sweeps = 0
+        self.requests = 0
+
+    def add(self, task_id: str) -> None:
+        """Start tracking another taskId (takes effect on the next sweep)."""
+        self.pending.add(task_id)
+        self.statuses.setdefault(task_id, STATUS_PENDING)
+        self._started.setdefault(task_id, time.monotonic())
+
+    def _sweep_status(self) -> str:
+        """Most advanced status among pending tasks, used to pick the next interval."""
+        pending_statuses = {self.statuses[task_id] for task_id in self.pending}
+        for status in reversed(NEAR_DONE_STATUSES):
+            if status in pending_statuses:
+                return status
+        return STATUS_PENDING
+
+    def _record(self, task_id: str, result: dict) -> dict | None:
+        """Update a task's status; return its data if it just finished."""
+        data = result.get("data") or {}
+        status = data.get("status", "UNKNOWN")
+        elapsed = time.monotonic() - self._started[task_id]
+        if self.statuses[task_id] == STATUS_PENDING and status != STATUS_PENDING:
+            telemetry.observe("suno.first_status", elapsed)
+        self.statuses[task_id] = status
+        if status in FINAL_STATUSES:
+            telemetry.observe("suno.completion", elapsed, error=status != STATUS_SUCCESS)
+            self.pending.discard(task_id)
+            return data
+        return None
+
+    def _timeout_error(self) -> RuntimeError:
+        return RuntimeError(
+            f"[Suno]   Timed out after {self.max_wait}s. "
+            f"{len(self.pending)} task(s) still pending: "
+            + ", ".join(f"{t} ({self.statuses[t]})" for t in sorted(self.pending))
+        )
+
+    def _next_delay(self, schedule: PollSchedule | None) -> float:
+        if schedule is None:
+            return self.poll_interval
+        return schedule.next_interval(self._sweep_status())
+
+    # Async iteration
+
+    async def _iterate_async(self, client: httpx.AsyncClient):
+        schedule = PollSchedule() if self.poll_interval is None else None
+        deadline = time.monotonic() + self.max_wait
+
+        while self.pending:
+            task_ids = sorted(self.pending)
+            results = await asyncio.gather(
+                *(get_task_status(t, self.api_key, client=client) for t in task_ids),
+                return_exceptions=True,
+            )
+            self.sweeps += 1
+            self.requests += len(task_ids)
+
+            for task_id, result in zip(task_ids, results):
+                if isinstance(result, Exception):
+                    print(f"[Suno]  {task_id} status check failed: {result}")
+                    continue
+                data = self._record(task_id, result)
+                if data is not None:
+                    yield task_id, data
+
+            if not self.pending:
+                return
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise self._timeout_error()
+            await asyncio.sleep(min(self._next_delay(schedule), remaining))
+
+    async def as_completed(self, client: httpx.AsyncClient | None = None):
+        """Async generator of (task_id, data) in completion order."""
+        if client is not None:
+            async for item in self._iterate_async(client):
+                yield item
+        else:
+            async with create_client(self.concurrency) as own_client:
+                async for item in self._iterate_async(own_client):
+                    yield item
+
+    def __aiter__(self):
+        return self.as_completed()
+
+    # Sync iteration
+
+    def __iter__(self):
+        """Sync generator of (task_id, data) in completion order."""
+        schedule = PollSchedule() if self.poll_interval is None else None
+        deadline = time.monotonic() + self.max_wait
+        headers = get_headers(self.api_key)
+
+        with httpx.Client(timeout=REQUEST_TIMEOUT, headers=headers) as client:
+            while self.pending:
+                for task_id in sorted(self.pending):
+                    try:
+                        with telemetry.span("suno.status_poll"):
+                            response = client.get(ENDPOINTS["record_info"], params={"taskId": task_id})
+                            response.raise_for_status()
+                            result = response.json()
+                    except httpx.HTTPError as e:
+                        print(f"[Suno]  {task_id} status check failed: {e}")
+                        continue
+                    finally:
+                        self.requests += 1
+
+                    data = self._record(task_id, result)
+                    if data is not None:
+                        yield task_id, data
+                self.sweeps += 1
+
+                if not self.pending:
+                    return
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise self._timeout_error()
+                time.sleep(min(self._next_delay(schedule), remaining))
@@ -5,13 +5,22 @@ Centralized configuration, constants, and helper functions.
 """
 
 import os
+import sys
+import random
 from dotenv import load_dotenv
 
+# Make the shared aimusic package (telemetry) importable when these scripts
+# are run directly from SunoAPI/
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
 load_dotenv()
 
 # API Configuration 
 
-BASE_URL = "https://api.sunoapi.org/api/v1"
+# Override with SUNO_BASE_URL to point at a local stand-in (see fake_suno_server.py)
+BASE_URL = os.environ.get("SUNO_BASE_URL", "https://api.sunoapi.org/api/v1")
 
 ENDPOINTS = {
     "generate": f"{BASE_URL}/generate",
@@ -38,6 +47,8 @@ STATUS_TEXT_SUCCESS = "TEXT_SUCCESS"
 STATUS_FIRST_SUCCESS = "FIRST_SUCCESS"
 STATUS_SUCCESS = "SUCCESS"
 
+NEAR_DONE_STATUSES = [STATUS_TEXT_SUCCESS, STATUS_FIRST_SUCCESS]
+
 FAILURE_STATUSES = [
     "CREATE_TASK_FAILED",
     "GENERATE_AUDIO_FAILED",
@@ -47,13 +58,56 @@ FAILURE_STATUSES = [
 
 #  Polling & Timeout Defaults 
 
-DEFAULT_POLL_INTERVAL = 30   # seconds between each status poll
-DEFAULT_MAX_WAIT = 300       # maximum seconds to wait for completion
+DEFAULT_POLL_INTERVAL = 30   # fixed interval when polling is not adaptive; also the backoff ceiling
+DEFAULT_MAX_WAIT = 300       # maximum seconds to wait for completion (wall clock)
 REQUEST_TIMEOUT = 30         # seconds for HTTP request timeout
+MAX_CONCURRENT_REQUESTS = 8  # pooled connections shared by concurrent tasks
+
+# Adaptive polling: start short, back off exponentially with jitter, and
+# tighten up again once the task reports partial results.
+POLL_INITIAL_INTERVAL = 2    # seconds before the second poll
+POLL_BACKOFF_FACTOR = 1.6    # interval multiplier after each unchanged poll
+POLL_JITTER = 0.2            # +/- fraction of randomness applied to each interval
+POLL_NEAR_DONE_INTERVAL = 3  # interval right after TEXT_SUCCESS / FIRST_SUCCESS
+POLL_NEAR_DONE_MAX = 10      # backoff ceiling while in those statuses
+
+# Submission scheduler (suno_scheduler.py). Every API request (submits and
+# status polls) takes a token from one bucket refilled at API_RATE_PER_S up
+# to API_BURST; set these to your plan's quota. At most MAX_IN_FLIGHT_TASKS
+# tasks are submitted and not yet finished at any time.
+API_RATE_PER_S = float(os.environ.get("SUNO_API_RATE", "2"))
+API_BURST = int(os.environ.get("SUNO_API_BURST", "10"))
+MAX_IN_FLIGHT_TASKS = int(os.environ.get("SUNO_MAX_IN_FLIGHT", "10"))
+# Transient failures are retried with exponential backoff (or the server's
+# Retry-After), up to MAX_RETRIES times per request
+MAX_RETRIES = 5
+RETRY_BACKOFF_BASE = 1.0     # seconds before the first retry
+RETRY_BACKOFF_MAX = 60       # backoff ceiling
+RETRY_HTTP_STATUSES = (429, 500, 502, 503, 504)
+THROTTLE_HTTP_STATUSES = (429,)
+# Error codes in the JSON body: 430 = call frequency too high, 455 = maintenance
+RETRY_API_CODES = (430, 455, 500)
+THROTTLE_API_CODES = (430,)
 
 # Default callback URL (required by the API, but unused when polling)
 DEFAULT_CALLBACK_URL = "https://example.com/callback"
 
+# Local callback receiver (see suno_callback.py). CALLBACK_PUBLIC_URL is the
+# address Suno should POST to, e.g. a tunnel in front of the local port;
+# when unset, the receiver advertises http://CALLBACK_HOST:CALLBACK_PORT.
+CALLBACK_HOST = "127.0.0.1"
+CALLBACK_PORT = 8902
+CALLBACK_PATH = "/suno/callback"
+CALLBACK_PUBLIC_URL = os.environ.get("SUNO_CALLBACK_URL", "")
+CALLBACK_DEADLINE = 300          # seconds to wait for a callback before polling
+CALLBACK_FALLBACK_POLL_INTERVAL = 60  # slow polling interval after the deadline
+
+#  Audio Download 
+
+DOWNLOAD_DIR = "example_audios"      # where finished tracks are saved
+DOWNLOAD_CHUNK_SIZE = 256 * 1024     # bytes per streamed chunk
+DOWNLOAD_TIMEOUT = 120               # seconds per download request
+
 #  Character Limits (per model) 
 
 PROMPT_LIMITS = {"V4": 3000, "V4_5": 5000, "V4_5PLUS": 5000, "V4_5ALL": 5000, "V5": 5000}
@@ -164,6 +218,48 @@ def build_payload(
 
     return payload
 
+
+class PollSchedule:
+    """
+    Status-aware exponential backoff for task polling.
+
+    Call next_interval(status) after each poll to get how long to sleep.
+    The interval grows by `factor` up to `maximum` while the status is
+    unchanged. Entering a near-done status (TEXT_SUCCESS, FIRST_SUCCESS)
+    resets it to `near_done` and lowers the ceiling to `near_done_max`,
+    since SUCCESS usually follows shortly after.
+    """
+
+    def __init__(
+        self,
+        initial: float = POLL_INITIAL_INTERVAL,
+        maximum: float = DEFAULT_POLL_INTERVAL,
+        factor: float = POLL_BACKOFF_FACTOR,
+        jitter: float = POLL_JITTER,
+        near_done: float = POLL_NEAR_DONE_INTERVAL,
+        near_done_max: float = POLL_NEAR_DONE_MAX,
+    ):
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+        self.near_done = near_done
+        self.near_done_max = near_done_max
+        self._interval = initial
+        self._status = None
+
+    def next_interval(self, status: str) -> float:
+        near_done = status in NEAR_DONE_STATUSES
+        ceiling = min(self.near_done_max, self.maximum) if near_done else self.maximum
+
+        if near_done and status != self._status:
+            self._interval = self.near_done
+        self._status = status
+
+        interval = min(self._interval, ceiling)
+        self._interval = min(self._interval * self.factor, ceiling)
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
 def _require(value, field_name: str, context: str) -> None:
     """Raise ValueError if a required value is missing."""
     if not value:
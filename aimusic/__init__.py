@@ -0,0 +1,40 @@
+"""
+AI Music Generation System - Package Entry Point
+=================================================
+Importable front door to both backends:
+
+  from aimusic import suno, musicgen
+  suno.generate_music(...)        # Suno cloud API
+  musicgen.generate_music(...)    # local MusicGen
+
+Nothing heavy is imported up front: `suno` and `musicgen` are loaded on
+first attribute access, and each of them only imports its backend
+modules (httpx, torch, transformers) when one of its functions is first
+used. The backend scripts stay where they are (SunoAPI/, MusicGenLocal/)
+and are put on sys.path here.
+"""
+
+import os
+import sys
+import importlib
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUNO_DIR = os.path.join(ROOT_DIR, "SunoAPI")
+MUSICGEN_DIR = os.path.join(ROOT_DIR, "MusicGenLocal")
+COMPARISON_DIR = os.path.join(ROOT_DIR, "MusicGenerationSunoAndMusicGen")
+
+for _path in (SUNO_DIR, MUSICGEN_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+__all__ = ["suno", "musicgen"]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
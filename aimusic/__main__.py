@@ -0,0 +1,119 @@
+"""
+Command-line entry point:
+
+  python -m aimusic suno "A song about the sea" --style "Folk" --title "Tides"
+  python -m aimusic musicgen "A calm piano piece" --duration 10
+  python -m aimusic replay results.json [--verify]
+  python -m aimusic compare [--workers 2] [--no-cache]
+
+Backends are imported inside each command, so `--help` and argument
+errors return without importing httpx or torch.
+"""
+
+import os
+import sys
+import runpy
+import argparse
+
+from aimusic import COMPARISON_DIR
+from musicgen_utils import DEFAULT_DURATION_S
+
+
+def _run_suno(args) -> None:
+    from aimusic import suno
+
+    kwargs = {
+        "prompt": args.prompt,
+        "custom_mode": bool(args.style or args.title),
+        "instrumental": args.instrumental,
+        "style": args.style,
+        "title": args.title,
+    }
+    if args.model:
+        kwargs["model"] = args.model
+    result = suno.generate_music(**kwargs)
+    task_data = suno.wait_for_completion(result["data"]["taskId"])
+    suno.print_results(task_data)
+    if not args.no_download:
+        suno.download_tracks(task_data)
+
+
+def _run_musicgen(args) -> None:
+    from aimusic import musicgen
+
+    result = musicgen.generate_music(
+        args.prompt,
+        args.duration,
+        output_filename=args.output_filename,
+        seed=args.seed,
+        use_cache=not args.no_cache,
+    )
+    musicgen.print_results(result)
+
+
+def _run_replay(args) -> None:
+    from aimusic import musicgen
+
+    results = musicgen.load_results(args.results_file)
+    if not results:
+        raise SystemExit(f"No replayable MusicGen results (with a seed) in {args.results_file}")
+    replayed = musicgen.replay(results, verify=args.verify)
+    if args.verify and not all(r.get("identical") for r in replayed):
+        raise SystemExit(1)
+
+
+def _run_compare(args) -> None:
+    script = os.path.join(COMPARISON_DIR, "prompt_test.py")
+    argv = [script]
+    if args.workers is not None:
+        argv += ["--workers", str(args.workers)]
+    if args.no_cache:
+        argv.append("--no-cache")
+    if args.fresh:
+        argv.append("--fresh")
+    sys.argv = argv
+    runpy.run_path(script, run_name="__main__")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m aimusic", description="AI music generation (Suno + MusicGen)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    suno = commands.add_parser("suno", help="generate a track with the Suno API")
+    suno.add_argument("prompt")
+    suno.add_argument("--style", default=None)
+    suno.add_argument("--title", default=None)
+    suno.add_argument("--model", default=None, help="Suno model version (default: DEFAULT_MODEL)")
+    suno.add_argument("--instrumental", action="store_true")
+    suno.add_argument("--no-download", action="store_true")
+    suno.set_defaults(func=_run_suno)
+
+    musicgen = commands.add_parser("musicgen", help="generate a clip with local MusicGen")
+    musicgen.add_argument("prompt")
+    musicgen.add_argument("--duration", type=int, default=DEFAULT_DURATION_S)
+    musicgen.add_argument("--seed", type=int, default=None)
+    musicgen.add_argument("--output-filename", default=None)
+    musicgen.add_argument("--no-cache", action="store_true")
+    musicgen.set_defaults(func=_run_musicgen)
+
+    replay = commands.add_parser("replay", help="regenerate MusicGen tracks from stored result JSON")
+    replay.add_argument("results_file")
+    replay.add_argument("--verify", action="store_true", help="check replayed files match the originals")
+    replay.set_defaults(func=_run_replay)
+
+    compare = commands.add_parser("compare", help="run the Suno vs MusicGen prompt comparison")
+    compare.add_argument("--workers", type=int, default=None, help="MusicGen worker processes (default: planned from the core count)")
+    compare.add_argument("--no-cache", action="store_true")
+    compare.add_argument("--fresh", action="store_true", help="ignore jobs recorded by earlier runs")
+    compare.set_defaults(func=_run_compare)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
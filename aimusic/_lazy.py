@@ -0,0 +1,25 @@
+"""Module-level lazy re-exports (PEP 562) shared by the backend facades."""
+
+import sys
+import importlib
+
+
+def lazy_exports(module_name: str, exports: dict[str, str]):
+    """
+    Build __getattr__/__dir__ for a facade module.
+
+    `exports` maps each public name to the backend module that defines
+    it; the backend is imported the first time the name is looked up and
+    the value is then cached in the facade's globals.
+    """
+    def __getattr__(name: str):
+        if name not in exports:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(exports[name]), name)
+        setattr(sys.modules[module_name], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[module_name])) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,120 @@
+"""
+Import-time regression check
+=============================
+Runs each startup path in a fresh interpreter with `-X importtime`, adds
+up the cumulative import time of every module it pulls in beyond a bare
+interpreter (`-c pass`), and fails if a path goes over its budget or
+imports a module it must not (torch, transformers, httpx, numpy).
+
+Usage:
+  python -m aimusic.importtime [--repeat 5] [--json]
+
+Exits with status 1 on any regression, so it can gate CI.
+"""
+
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from aimusic import ROOT_DIR
+
+HEAVY_MODULES = ("torch", "transformers", "httpx", "numpy", "scipy")
+
+# (label, interpreter args, import budget in ms, modules that must not be imported)
+CASES = [
+    ("import aimusic", ["-c", "import aimusic"], 20, HEAVY_MODULES),
+    ("from aimusic import suno, musicgen", ["-c", "from aimusic import suno, musicgen"], 25, HEAVY_MODULES),
+    ("python -m aimusic --help", ["-m", "aimusic", "--help"], 60, HEAVY_MODULES),
+    ("import musicgen_utils", ["-c", "import aimusic, musicgen_utils"], 25, HEAVY_MODULES),
+    ("import suno_utils", ["-c", "import aimusic, suno_utils"], 60, ("torch", "transformers", "numpy")),
+]
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """Parse `-X importtime` output into (module, depth, cumulative_us) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), depth, int(cumulative)))
+    return rows
+
+
+def _run(args: list[str]) -> tuple[list[tuple[str, int, int]], float]:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed: {proc.stderr.strip().splitlines()[-1]}")
+    return parse_importtime(proc.stderr), wall_ms
+
+
+def measure(args: list[str], baseline: set[str]) -> dict:
+    """Import cost of `args` beyond the modules a bare interpreter loads."""
+    rows, wall_ms = _run(args)
+    modules = {name for name, _, _ in rows}
+    top_level = [(name, us) for name, depth, us in rows if depth == 0 and name not in baseline]
+    return {
+        "import_ms": round(sum(us for _, us in top_level) / 1000, 2),
+        "wall_ms": round(wall_ms, 1),
+        "modules": modules - baseline,
+        "slowest": sorted(top_level, key=lambda item: -item[1])[:5],
+    }
+
+
+def run_checks(repeat: int = 3) -> list[dict]:
+    """Measure every case (best of `repeat` runs) and compare against its budget."""
+    baseline = {name for name, _, _ in _run(["-c", "pass"])[0]}
+    results = []
+    for label, args, budget_ms, forbidden in CASES:
+        runs = [measure(args, baseline) for _ in range(repeat)]
+        best = min(runs, key=lambda r: r["import_ms"])
+        heavy = sorted(m for m in best["modules"] if m.split(".")[0] in forbidden)
+        results.append({
+            "case": label,
+            "import_ms": best["import_ms"],
+            "wall_ms": min(r["wall_ms"] for r in runs),
+            "budget_ms": budget_ms,
+            "forbidden_imports": sorted({m.split(".")[0] for m in heavy}),
+            "slowest": [(name, round(us / 1000, 2)) for name, us in best["slowest"]],
+            "ok": best["import_ms"] <= budget_ms and not heavy,
+        })
+    return results
+
+
+def print_checks(results: list[dict]) -> None:
+    print()
+    print("=" * 72)
+    print(f"  {'Startup path':<38s} {'Imports':>9s} {'Budget':>8s} {'Wall':>8s}  Status")
+    print(f"  {'─' * 38} {'─' * 9} {'─' * 8} {'─' * 8}  {'─' * 6}")
+    for r in results:
+        status = "OK" if r["ok"] else "FAILED"
+        print(f"  {r['case']:<38s} {r['import_ms']:>7.1f}ms {r['budget_ms']:>6d}ms {r['wall_ms']:>6.0f}ms  {status}")
+        if r["forbidden_imports"]:
+            print(f"    imports {', '.join(r['forbidden_imports'])}")
+        if not r["ok"]:
+            print("    slowest: " + ", ".join(f"{name} {ms}ms" for name, ms in r["slowest"]))
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check startup import time against budgets")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest is kept")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run_checks(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_checks(results)
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
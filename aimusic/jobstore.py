@@ -0,0 +1,187 @@
+"""
+Persistent job store
+=====================
+A small SQLite table that records every generation job of a batch run
+and its state, committed on every transition so a crash loses nothing:
+
+  queued     recorded, not started yet
+  submitted  sent to Suno; task_id is stored so a rerun can re-attach
+             to the task instead of paying for a new one
+  done       finished; the result dict is stored
+  failed     ended with an error (retried on the next run)
+
+Jobs are keyed by batch name, kind ("suno" / "musicgen") and a hash of
+their parameters, so rerunning the same batch finds the same rows:
+
+  store = JobStore()
+  key = store.add("prompt_test", "suno", params)
+  job = store.get(key)          # {"state": ..., "task_id": ..., "result": ...}
+  store.mark_submitted(key, task_id)
+  store.mark_done(key, result)
+
+Usage:
+  python -m aimusic.jobstore [jobs.sqlite3] [--batch NAME] [--clear]
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import argparse
+import datetime
+import threading
+
+JOB_STORE_FILE = os.environ.get("AIMUSIC_JOB_STORE", "jobs.sqlite3")
+
+QUEUED = "queued"
+SUBMITTED = "submitted"
+DONE = "done"
+FAILED = "failed"
+STATES = (QUEUED, SUBMITTED, DONE, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_key    TEXT PRIMARY KEY,
+    batch      TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    state      TEXT NOT NULL,
+    params     TEXT NOT NULL,
+    task_id    TEXT,
+    result     TEXT,
+    error      TEXT,
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+)
+"""
+
+
+def job_key(batch: str, kind: str, params: dict) -> str:
+    """Stable key for a job: same batch, kind and parameters -> same key."""
+    payload = json.dumps({"batch": batch, "kind": kind, "params": params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class JobStore:
+    """
+    SQLite-backed job states, safe to share between threads of one process.
+
+    Every method commits before returning. Keep writes in one process (the
+    orchestrator); worker processes report back to it instead.
+    """
+
+    def __init__(self, path: str = JOB_STORE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _execute(self, sql: str, args: tuple = ()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.datetime.now().isoformat()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def add(self, batch: str, kind: str, params: dict) -> str:
+        """Record a queued job unless it is already known; returns its key."""
+        key = job_key(batch, kind, params)
+        now = self._now()
+        self._execute(
+            "INSERT OR IGNORE INTO jobs (job_key, batch, kind, state, params, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, batch, kind, QUEUED, json.dumps(params, ensure_ascii=False), now, now),
+        )
+        return key
+
+    def get(self, key: str) -> dict | None:
+        rows = self._execute("SELECT * FROM jobs WHERE job_key = ?", (key,))
+        return self._to_dict(rows[0]) if rows else None
+
+    def jobs(self, batch: str | None = None, state: str | None = None) -> list[dict]:
+        """All jobs, optionally filtered by batch and state, oldest first."""
+        sql, args = "SELECT * FROM jobs WHERE 1=1", []
+        if batch is not None:
+            sql, args = sql + " AND batch = ?", args + [batch]
+        if state is not None:
+            sql, args = sql + " AND state = ?", args + [state]
+        return [self._to_dict(row) for row in self._execute(sql + " ORDER BY created_at, rowid", tuple(args))]
+
+    def mark_submitted(self, key: str, task_id: str) -> None:
+        self._execute(
+            "UPDATE jobs SET state = ?, task_id = ?, error = NULL, attempts = attempts + 1, updated_at = ? "
+            "WHERE job_key = ?",
+            (SUBMITTED, task_id, self._now(), key),
+        )
+
+    def mark_done(self, key: str, result: dict) -> None:
+        self._execute(
+            "UPDATE jobs SET state = ?, result = ?, error = NULL, updated_at = ? WHERE job_key = ?",
+            (DONE, json.dumps(result, ensure_ascii=False), self._now(), key),
+        )
+
+    def mark_failed(self, key: str, error: str) -> None:
+        self._execute(
+            "UPDATE jobs SET state = ?, error = ?, attempts = attempts + 1, updated_at = ? WHERE job_key = ?",
+            (FAILED, error, self._now(), key),
+        )
+
+    def counts(self, batch: str | None = None) -> dict[str, int]:
+        """Number of jobs in each state."""
+        sql, args = "SELECT state, COUNT(*) FROM jobs", ()
+        if batch is not None:
+            sql, args = sql + " WHERE batch = ?", (batch,)
+        counts = dict.fromkeys(STATES, 0)
+        counts.update({state: n for state, n in self._execute(sql + " GROUP BY state", args)})
+        return counts
+
+    def clear(self, batch: str | None = None) -> int:
+        """Forget all jobs (of one batch); returns how many were removed."""
+        with self._lock:
+            if batch is None:
+                return self._db.execute("DELETE FROM jobs").rowcount
+            return self._db.execute("DELETE FROM jobs WHERE batch = ?", (batch,)).rowcount
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or reset the persistent job store")
+    parser.add_argument("path", nargs="?", default=JOB_STORE_FILE)
+    parser.add_argument("--batch", default=None, help="only this batch")
+    parser.add_argument("--clear", action="store_true", help="forget the jobs so the next run starts over")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        parser.error(f"no job store at {args.path}")
+
+    with JobStore(args.path) as store:
+        if args.clear:
+            print(f"Removed {store.clear(args.batch)} job(s) from {args.path}")
+        else:
+            print(f"{args.path}: " + ", ".join(f"{state}={n}" for state, n in store.counts(args.batch).items()))
+            for job in store.jobs(args.batch):
+                if job["state"] != DONE:
+                    detail = job["task_id"] or ""
+                    if job["error"]:
+                        detail += f" {job['error'][:60]}"
+                    print(f"  {job['batch']:<18s} {job['kind']:<9s} {job['state']:<10s} {detail.strip()}")
@@ -0,0 +1,26 @@
+"""
+Local MusicGen backend (lazy facade over MusicGenLocal/).
+
+Importing this module is cheap; torch and transformers are only
+imported when one of the names below is first used.
+"""
+
+from aimusic._lazy import lazy_exports
+
+_EXPORTS = {
+    "generate_music": "musicgen_generate",
+    "generate_music_batch": "musicgen_generate",
+    "print_results": "musicgen_generate",
+    "save_results": "musicgen_generate",
+    "stream_music": "musicgen_stream",
+    "stream_music_to_file": "musicgen_stream",
+    "generate_long_music": "musicgen_stream",
+    "export_snapshot": "musicgen_snapshot",
+    "load_snapshot": "musicgen_snapshot",
+    "get_cache": "musicgen_cache",
+    "replay": "musicgen_replay",
+    "load_results": "musicgen_replay",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
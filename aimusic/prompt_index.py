@@ -0,0 +1,302 @@
+"""
+Prompt similarity index
+========================
+Finds past generations whose prompt is a close paraphrase of a new one,
+so the earlier track can be served instead of paying for a new Suno task
+or MusicGen decode:
+
+  index = PromptIndex()                                  # hashed TF-IDF vectors
+  match = index.best("musicgen:<params hash>", prompt)   # None below REUSE_THRESHOLD
+  if match is None:
+      ...generate...
+      index.add("musicgen:<params hash>", prompt, {"key": cache_key})
+
+Entries are grouped by namespace (backend plus every parameter other than
+the prompt that changes the output), and only entries of the same
+namespace are compared. Each namespace keeps one float32 matrix of
+weighted unit-length vectors, stored dimension-major (one contiguous row
+per dimension), so a lookup multiplies only the rows of the query's
+non-zero dimensions: a sparse TF-IDF query touches about a fifth of the
+matrix and stays under a millisecond for tens of thousands of entries.
+(float16 would halve the memory, but NumPy has no BLAS kernel for it and
+a float16 product is some 30x slower.)
+
+Any embedder with `name`, `dim` and `embed(texts) -> (n, dim)` can be
+plugged in; MusicGen's text encoder is one (musicgen_cache). The default,
+HashedTfidf, needs only NumPy: word and word-bigram counts are hashed into
+INDEX_DIM buckets and weighted by inverse document frequency over the
+index.
+
+The index is persisted as one JSON line per entry (vector included) in
+INDEX_DIR, appended with a single write so several processes can share
+the file; each process picks up the others' entries on its next lookup.
+
+Usage:
+  python -m aimusic.prompt_index "a calm lo-fi beat" [--namespace NS] [-k 5]
+  python -m aimusic.prompt_index --bench 20000
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import base64
+import argparse
+import datetime
+import threading
+
+import numpy as np
+
+INDEX_DIR = os.environ.get("AIMUSIC_PROMPT_INDEX_DIR", ".prompt_index")
+INDEX_DIM = 256
+REUSE_THRESHOLD = float(os.environ.get("AIMUSIC_PROMPT_REUSE", "0.95"))  # cosine similarity; above 1 turns reuse off
+IDF_REFIT_GROWTH = 1.25  # refit IDF weights once the index has grown by this factor
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+class HashedTfidf:
+    """
+    Vocabulary-free TF-IDF: sublinear counts of words and word bigrams,
+    hashed into `dim` buckets. embed() returns the raw counts; the index
+    applies the IDF weights (uses_idf), since those depend on its contents.
+    """
+
+    name = "tfidf"
+    uses_idf = True
+
+    def __init__(self, dim: int = INDEX_DIM):
+        self.dim = dim
+
+    def features(self, text: str) -> list[str]:
+        words = _TOKEN_RE.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        counts = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            buckets = [zlib.crc32(feature.encode("utf-8")) % self.dim for feature in self.features(text)]
+            np.add.at(counts[row], buckets, 1.0)
+        return np.log1p(counts, out=counts)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class _Partition:
+    """The entries of one namespace: weighted unit vectors as the columns of a growable (dim, capacity) matrix."""
+
+    def __init__(self, dim: int):
+        self.size = 0
+        self.vectors = np.zeros((dim, 0), dtype=np.float32)
+        self.entries = []  # (text, payload) per column
+
+    def append(self, vector: np.ndarray, text: str, payload: dict) -> int:
+        if self.size == self.vectors.shape[1]:
+            grown = np.zeros((self.vectors.shape[0], max(64, 2 * self.size)), dtype=np.float32)
+            grown[:, :self.size] = self.vectors[:, :self.size]
+            self.vectors = grown
+        self.vectors[:, self.size] = vector
+        self.entries.append((text, payload))
+        self.size += 1
+        return self.size - 1
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the weighted unit `query` with every entry."""
+        nonzero = np.flatnonzero(query)
+        if len(nonzero) < len(query) // 2:
+            return query[nonzero] @ self.vectors[nonzero, :self.size]
+        return query @ self.vectors[:, :self.size]
+
+
+class PromptIndex:
+    """
+    Append-only vector index of prompts, safe to share between threads
+    (and, through its file, between processes).
+
+    Pass path=None for an in-memory index.
+    """
+
+    def __init__(self, path: str | None = "", embedder=None):
+        self.embedder = embedder or HashedTfidf()
+        if path == "":
+            path = os.path.join(INDEX_DIR, f"{self.embedder.name}.jsonl")
+        self.path = path
+        self._lock = threading.Lock()
+        self._partitions = {}
+        self._size = 0
+        self._idf = np.ones(self.embedder.dim, dtype=np.float32)
+        self._document_freq = np.zeros(self.embedder.dim, dtype=np.int64)
+        self._fitted_size = 0
+        self._file_offset = 0
+        with self._lock:
+            self._refresh()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def namespaces(self) -> list[str]:
+        return sorted(self._partitions)
+
+    def nbytes(self) -> int:
+        return sum(p.vectors.nbytes for p in self._partitions.values())
+
+    def _weigh(self, raw: np.ndarray) -> np.ndarray:
+        return _normalize(raw * self._idf) if self.embedder.uses_idf else _normalize(raw)
+
+    def _refit(self) -> None:
+        """
+        Recompute the IDF weights from the current entries and re-weigh every
+        vector. The raw vectors are not kept: scaling each dimension by
+        new / old weight and renormalizing gives the same result.
+        """
+        idf = (np.log((1 + self._size) / (1 + self._document_freq)) + 1).astype(np.float32)
+        ratio = (idf / self._idf)[:, None]
+        for partition in self._partitions.values():
+            vectors = partition.vectors[:, :partition.size]
+            vectors *= ratio
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=0), 1e-12)
+        self._idf = idf
+        self._fitted_size = self._size
+
+    def _append(self, namespace: str, text: str, payload: dict, raw: np.ndarray) -> None:
+        partition = self._partitions.get(namespace)
+        if partition is None:
+            partition = self._partitions[namespace] = _Partition(self.embedder.dim)
+        partition.append(self._weigh(raw), text, payload)
+        self._document_freq += raw > 0
+        self._size += 1
+        if self.embedder.uses_idf and self._size >= max(8, IDF_REFIT_GROWTH * self._fitted_size):
+            self._refit()  # amortized: the whole index is re-weighed only as it grows geometrically
+
+    def _refresh(self) -> None:
+        """Load entries appended to the file (by any process) since the last look."""
+        if self.path is None:
+            return
+        try:
+            if os.path.getsize(self.path) <= self._file_offset:
+                return
+            f = open(self.path, "rb")
+        except OSError:
+            return
+        with f:
+            f.seek(self._file_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # another process is mid-write; read it next time
+                self._file_offset += len(line)
+                try:
+                    record = json.loads(line)
+                    raw = np.frombuffer(base64.b64decode(record["vector"]), dtype="<f4")
+                except (ValueError, KeyError):
+                    continue  # a line cut short by a crashed writer
+                if len(raw) == self.embedder.dim:
+                    self._append(record["namespace"], record["text"], record["payload"], raw)
+
+    def add(self, namespace: str, text: str, payload: dict) -> None:
+        """Index `text` under `namespace` with the JSON-serializable `payload`."""
+        raw = self.embedder.embed([text])[0].astype("<f4")
+        with self._lock:
+            self._refresh()
+            if self.path is not None:
+                record = {
+                    "namespace": namespace,
+                    "text": text,
+                    "payload": payload,
+                    "vector": base64.b64encode(raw.tobytes()).decode("ascii"),
+                    "created_at": datetime.datetime.now().isoformat(),
+                }
+                line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                # One write() on an O_APPEND descriptor, so lines from several processes never interleave
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, line)
+                finally:
+                    os.close(fd)
+                self._refresh()  # reads our line back (and anything appended before it)
+            else:
+                self._append(namespace, text, payload, raw)
+
+    def search(self, namespace: str, text: str, k: int = 1) -> list[dict]:
+        """Up to k entries of `namespace` most similar to `text`, best first."""
+        raw = self.embedder.embed([text])[0]
+        with self._lock:
+            self._refresh()
+            partition = self._partitions.get(namespace)
+            if partition is None or not partition.size:
+                return []
+            scores = partition.scores(self._weigh(raw))
+            if k == 1:
+                top = [int(np.argmax(scores))]
+            else:
+                top = np.argsort(-scores)[:k]
+            return [
+                {"score": round(float(scores[row]), 4), "text": partition.entries[row][0],
+                 "payload": partition.entries[row][1]}
+                for row in top
+            ]
+
+    def best(self, namespace: str, text: str, threshold: float = REUSE_THRESHOLD) -> dict | None:
+        """The most similar entry if its similarity is at least `threshold`, else None."""
+        matches = self.search(namespace, text, k=1)
+        return matches[0] if matches and matches[0]["score"] >= threshold else None
+
+
+_indexes = {}
+
+
+def get_index(embedder=None) -> PromptIndex:
+    """Return the process-wide index for `embedder` (hashed TF-IDF by default)."""
+    embedder = embedder or HashedTfidf()
+    if embedder.name not in _indexes:
+        _indexes[embedder.name] = PromptIndex(embedder=embedder)
+    return _indexes[embedder.name]
+
+
+def _bench(entries: int, queries: int = 200) -> None:
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(5000)]
+    index = PromptIndex(path=None)
+    texts = [" ".join(rng.choice(words, 30)) for _ in range(entries)]
+    start = time.perf_counter()
+    for i, text in enumerate(texts):
+        index.add("bench", text, {"i": i})
+    build_s = time.perf_counter() - start
+
+    latencies = []
+    for text in texts[:queries]:
+        start = time.perf_counter()
+        index.best("bench", text)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(f"{entries} entries x {index.embedder.dim} dims ({index.nbytes() / 1024 ** 2:.1f} MB), "
+          f"built in {build_s:.2f}s")
+    print(f"lookup p50 {latencies[len(latencies) // 2] * 1000:.3f} ms, "
+          f"p95 {latencies[int(0.95 * len(latencies))] * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the prompt similarity index")
+    parser.add_argument("text", nargs="?", help="prompt to look up")
+    parser.add_argument("--index", default=os.path.join(INDEX_DIR, f"{HashedTfidf.name}.jsonl"))
+    parser.add_argument("--namespace", default=None, help="only this namespace (default: all)")
+    parser.add_argument("-k", type=int, default=5, help="number of matches to show")
+    parser.add_argument("--bench", type=int, metavar="N", help="time lookups on an in-memory index of N entries")
+    args = parser.parse_args()
+
+    if args.bench:
+        _bench(args.bench)
+    elif args.text:
+        index = PromptIndex(args.index)
+        namespaces = [args.namespace] if args.namespace else index.namespaces
+        print(f"{args.index}: {len(index)} entries in {len(index.namespaces)} namespace(s)")
+        for namespace in namespaces:
+            for match in index.search(namespace, args.text, k=args.k):
+                print(f"  {match['score']:.3f}  {namespace[:24]:<24s}  {match['text'][:70]!r}")
+    else:
+        parser.error("give a prompt to look up, or --bench N")
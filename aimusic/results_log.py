@@ -0,0 +1,327 @@
+"""
+Append-only results log
+========================
+Results are appended as one JSON line each as they arrive, instead of
+rewriting the whole results file every time:
+
+  with ResultsLog("results.jsonl") as log:
+      log.start("musicgen", {"model": ..., "device": ..., "precision": ...})
+      log.append(result, key=0)        # key: slot of the result; a later line for the same key replaces it
+
+  compact("results.jsonl", "results.json")    # the aggregated results.json format
+
+Every line is flushed to the OS when written, so `tail` sees it right
+away; fsync is batched (every FSYNC_EVERY lines or FSYNC_INTERVAL_S
+seconds, and on close), so a crash loses at most that much. When the
+file reaches ROTATE_BYTES it is renamed to <path>.000001 (.000002, ...)
+and a new one is started; readers go through the segments in order.
+
+Each run starts with a header line (start()); compaction uses the last
+run in the log and builds the same documents as before, see FORMATS:
+
+  musicgen     MusicGenLocal results.json
+  comparison   MusicGenerationSunoAndMusicGen prompt_comparison.json
+
+Keep one writer per log file.
+
+Usage:
+  python -m aimusic.results_log tail results.jsonl [-f]
+  python -m aimusic.results_log compact results.jsonl results.json
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import uuid
+import argparse
+import datetime
+import threading
+
+FSYNC_EVERY = 32
+FSYNC_INTERVAL_S = 1.0
+ROTATE_BYTES = 64 * 1024 ** 2
+TAIL_POLL_S = 0.5
+
+
+def _musicgen_document(header: dict, results: list[dict]) -> dict:
+    return {
+        "api": "MusicGen (Local)",
+        "model": header.get("model"),
+        "device": header.get("device"),
+        "precision": header.get("precision"),
+        "total_generations": len(results),
+        "results": results,
+    }
+
+
+def _comparison_document(header: dict, results: list[dict]) -> dict:
+    prompts = header.get("prompts", [])
+    return {
+        "question": header.get("question"),
+        "timestamp": header.get("timestamp"),
+        "total_prompts": len(prompts),
+        "prompts": prompts,
+        "results": results,
+    }
+
+
+# Format name -> builder(header, results) of the aggregated JSON document
+FORMATS = {
+    "musicgen": _musicgen_document,
+    "comparison": _comparison_document,
+}
+
+
+def build_document(fmt: str, header: dict, results: list[dict]) -> dict:
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)} (got {fmt!r}).")
+    return FORMATS[fmt](header, results)
+
+
+def write_json(document: dict, path: str) -> None:
+    """Write `document` as indented JSON, atomically (a reader never sees half a file)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _rotated(path: str) -> list[tuple[int, str]]:
+    """(number, path) of the rotated segments of the log at `path`, oldest first."""
+    found = []
+    for segment in glob.glob(glob.escape(path) + ".*"):
+        suffix = segment[len(path) + 1:]
+        if suffix.isdigit():
+            found.append((int(suffix), segment))
+    return sorted(found)
+
+
+def segments(path: str) -> list[str]:
+    """Rotated segments of the log at `path`, oldest first, followed by the active file."""
+    return [segment for _, segment in _rotated(path)] + ([path] if os.path.exists(path) else [])
+
+
+class ResultsLog:
+    """JSON-lines results sink with batched fsync and size-based rotation."""
+
+    def __init__(
+        self,
+        path: str,
+        fsync_every: int = FSYNC_EVERY,
+        fsync_interval_s: float = FSYNC_INTERVAL_S,
+        rotate_bytes: int = ROTATE_BYTES,
+    ):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval_s = fsync_interval_s
+        self.rotate_bytes = rotate_bytes
+        self.run_id = None
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "ab")
+
+    def _write(self, record: dict) -> None:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if self._file.tell() and self._file.tell() + len(line) > self.rotate_bytes:
+                self._rotate()
+            self._file.write(line)
+            self._file.flush()  # visible to readers now; durable at the next fsync
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval_s:
+                self._sync()
+
+    def _sync(self) -> None:
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _rotate(self) -> None:
+        self._sync()
+        self._file.close()
+        rotated = _rotated(self.path)
+        number = rotated[-1][0] + 1 if rotated else 1
+        os.replace(self.path, f"{self.path}.{number:06d}")
+        self._file = open(self.path, "ab")
+
+    def start(self, fmt: str, header: dict) -> str:
+        """Begin a run: `header` holds the document fields of format `fmt` other than the results."""
+        if fmt not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)} (got {fmt!r}).")
+        self.run_id = uuid.uuid4().hex[:12]
+        self._write({"type": "header", "run": self.run_id, "format": fmt, "header": header,
+                     "ts": datetime.datetime.now().isoformat()})
+        return self.run_id
+
+    def append(self, result: dict, key=None) -> None:
+        """Log one result; a later result with the same `key` in the run replaces it when compacted."""
+        self._write({"type": "result", "run": self.run_id, "key": key, "result": result,
+                     "ts": datetime.datetime.now().isoformat()})
+
+    def flush(self) -> None:
+        """fsync everything written so far."""
+        with self._lock:
+            self._sync()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_records(path: str):
+    """Every record in the log, across rotated segments, in write order (a torn last line is skipped)."""
+    for segment in segments(path):
+        with open(segment, "rb") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def last_run(path: str, run: str | None = None) -> tuple[str, dict, list[dict]]:
+    """
+    (format, header, results) of the last run in the log (or of `run`).
+    Results are in key order, the last line per key winning; results
+    without a key keep their order after the keyed ones.
+    """
+    fmt, header, current = None, None, None
+    keyed, unkeyed = {}, []
+    for record in read_records(path):
+        if record.get("type") == "header" and (run is None or record["run"] == run):
+            fmt, header, current = record["format"], record["header"], record["run"]
+            keyed, unkeyed = {}, []
+        elif record.get("type") == "result" and current is not None and record.get("run") == current:
+            if record.get("key") is None:
+                unkeyed.append(record["result"])
+            else:
+                keyed[record["key"]] = record["result"]
+    if header is None:
+        raise ValueError(f"{path} has no run" + (f" {run!r}" if run else "") + ".")
+    ordered = [keyed[key] for key in sorted(keyed, key=lambda k: (isinstance(k, str), k))]
+    return fmt, header, ordered + unkeyed
+
+
+def compact(path: str, output: str, run: str | None = None) -> dict:
+    """Build the aggregated JSON document of the last run (or `run`) and write it to `output`."""
+    fmt, header, results = last_run(path, run)
+    document = build_document(fmt, header, results)
+    write_json(document, output)
+    return document
+
+
+def tail(path: str, follow: bool = False, poll_s: float = TAIL_POLL_S):
+    """
+    Yield the log's records from the start; with `follow`, keep waiting for
+    new ones, carrying on through every segment rotated away meanwhile.
+    """
+    next_number = 0  # first rotated segment not read yet
+    f, pending = None, b""
+    try:
+        while True:
+            if f is None:
+                unread = [(n, segment) for n, segment in _rotated(path) if n >= next_number]
+                if unread:
+                    number, segment = unread[0]
+                    with open(segment, "rb") as rotated_file:
+                        yield from _parse_lines(rotated_file.read().split(b"\n"))
+                    next_number = number + 1
+                    continue
+                try:
+                    f = open(path, "rb")
+                except FileNotFoundError:
+                    if not follow:
+                        return
+                    time.sleep(poll_s)
+                    continue
+                if any(n >= next_number for n, _ in _rotated(path)):
+                    f.close()  # rotated while opening; read the segments in order first
+                    f = None
+                    continue
+            chunk = f.read()
+            if chunk:
+                *lines, pending = (pending + chunk).split(b"\n")
+                yield from _parse_lines(lines)
+                continue
+            if not follow:
+                return
+            try:
+                moved = os.stat(path).st_ino != os.fstat(f.fileno()).st_ino
+            except FileNotFoundError:
+                moved = True
+            if not moved:
+                time.sleep(poll_s)
+                continue
+            # The writer closed this file and renamed it to a segment: finish
+            # it, then go on with the segments after it and the new file
+            *lines, _ = (pending + f.read()).split(b"\n")
+            yield from _parse_lines(lines)
+            inode = os.fstat(f.fileno()).st_ino
+            f.close()
+            f, pending = None, b""
+            for number, segment in _rotated(path):
+                if number >= next_number and os.stat(segment).st_ino == inode:
+                    next_number = number + 1
+                    break
+    finally:
+        if f is not None:
+            f.close()
+
+
+def _parse_lines(lines: list[bytes]):
+    for line in lines:
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
+
+
+def _describe(record: dict) -> str:
+    if record.get("type") == "header":
+        return f"{record['ts']}  run {record['run']} started ({record['format']})"
+    result = record.get("result") or {}
+    name = result.get("prompt_name") or result.get("prompt", "")[:50]
+    status = f"FAILED: {str(result['error'])[:50]}" if result.get("error") else "OK"
+    api = result.get("api", "")
+    return f"{record.get('ts', '')}  {api:<17s} {str(name):<50s} {status}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tail or compact an append-only results log")
+    sub = parser.add_subparsers(dest="command", required=True)
+    tail_parser = sub.add_parser("tail", help="print the results in a log")
+    tail_parser.add_argument("log_file")
+    tail_parser.add_argument("-f", "--follow", action="store_true", help="keep printing new results as they arrive")
+    tail_parser.add_argument("--json", action="store_true", help="print raw JSON lines")
+    compact_parser = sub.add_parser("compact", help="write the aggregated results JSON of a run")
+    compact_parser.add_argument("log_file")
+    compact_parser.add_argument("output", help="e.g. results.json or prompt_comparison.json")
+    compact_parser.add_argument("--run", default=None, help="run id (default: the last run)")
+    args = parser.parse_args()
+
+    if args.command == "tail":
+        try:
+            for record in tail(args.log_file, follow=args.follow):
+                print(json.dumps(record, ensure_ascii=False) if args.json else _describe(record), flush=True)
+        except KeyboardInterrupt:
+            pass
+    else:
+        try:
+            document = compact(args.log_file, args.output, args.run)
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        print(f"Wrote {len(document['results'])} result(s) to {args.output}")
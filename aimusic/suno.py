@@ -0,0 +1,27 @@
+"""
+Suno cloud backend (lazy facade over SunoAPI/).
+
+Importing this module is cheap; httpx and the client modules are only
+imported when one of the names below is first used.
+"""
+
+from aimusic._lazy import lazy_exports
+
+_EXPORTS = {
+    "generate_music": "suno_generate",
+    "get_task_status": "suno_generate",
+    "wait_for_completion": "suno_generate",
+    "print_results": "suno_generate",
+    "download_tracks": "suno_download",
+    "download_task_audio": "suno_download",
+    "run_tasks": "suno_async",
+    "create_client": "suno_async",
+    "TaskTracker": "suno_tracker",
+    "SubmissionScheduler": "suno_scheduler",
+    "TokenBucket": "suno_scheduler",
+    "CallbackReceiver": "suno_callback",
+    "run_tasks_with_callbacks": "suno_callback",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
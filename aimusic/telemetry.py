@@ -0,0 +1,253 @@
+"""
+Hot-path telemetry
+===================
+Named timing spans shared by both pipelines:
+
+  from aimusic import telemetry
+
+  with telemetry.span("musicgen.tokenize", precision="int8"):
+      inputs = processor(...)
+
+  telemetry.observe("suno.first_status", elapsed)   # an already measured duration
+  telemetry.count("suno.download_bytes", n)         # a plain counter
+
+Every span updates in-process counters and a latency histogram (labelled
+by stage), which prometheus_text() renders in the Prometheus text
+exposition format. When AIMUSIC_TELEMETRY_FILE is set (or configure() is
+called), each finished span is also appended to that file as one JSON
+line, so several worker processes can share a file.
+
+Spans nest per thread / asyncio task; each JSON line records its parent.
+
+Usage:
+  python -m aimusic.telemetry telemetry.jsonl    # per-stage summary of a span log
+"""
+
+import os
+import sys
+import json
+import time
+import bisect
+import argparse
+import threading
+import contextlib
+import contextvars
+
+TELEMETRY_FILE = os.environ.get("AIMUSIC_TELEMETRY_FILE", "")
+METRIC_PREFIX = "aimusic"
+
+# Histogram bucket upper bounds, in seconds
+SPAN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_lock = threading.Lock()
+_histograms = {}  # (stage, labels) -> [bucket counts..., +Inf count, sum]
+_counters = {}    # (name, labels) -> value
+_errors = {}      # (stage, labels) -> failed span count
+_current = contextvars.ContextVar("aimusic_span", default=None)
+_sink = None
+_sink_path = TELEMETRY_FILE
+
+
+def configure(jsonl_path: str | None) -> None:
+    """Send span records to `jsonl_path` (None or "" turns the log off)."""
+    global _sink, _sink_path
+    with _lock:
+        if _sink is not None:
+            _sink.close()
+        _sink = None
+        _sink_path = jsonl_path or ""
+
+
+def _write_record(record: dict) -> None:
+    global _sink
+    if not _sink_path:
+        return
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _lock:
+        if _sink is None:
+            os.makedirs(os.path.dirname(os.path.abspath(_sink_path)), exist_ok=True)
+            _sink = open(_sink_path, "a", encoding="utf-8", buffering=1)
+        _sink.write(line)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _emit(stage: str, started_at: float, seconds: float, parent: str | None, error: str | None, labels: dict) -> None:
+    key = (stage, _label_key(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(SPAN_BUCKETS) + 1) + [0.0]
+        histogram[bisect.bisect_left(SPAN_BUCKETS, seconds)] += 1
+        histogram[-1] += seconds
+        if error:
+            _errors[key] = _errors.get(key, 0) + 1
+
+    if _sink_path:
+        _write_record({
+            "ts": round(started_at, 6),
+            "span": stage,
+            "duration_s": round(seconds, 6),
+            "parent": parent,
+            "pid": os.getpid(),
+            "labels": {k: v for k, v in labels.items() if v is not None},
+            "error": error,
+        })
+
+
+def observe(stage: str, seconds: float, error: bool = False, **labels) -> None:
+    """Record one duration for `stage` that was measured elsewhere (ending now)."""
+    _emit(stage, time.time() - seconds, seconds, _current.get(), "error" if error else None, labels)
+
+
+def count(name: str, value: float = 1, **labels) -> None:
+    """Add `value` to the counter `name`."""
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+@contextlib.contextmanager
+def span(stage: str, **labels):
+    """Time the enclosed block as `stage`; exceptions are counted and re-raised."""
+    parent = _current.get()
+    token = _current.set(stage)
+    start_wall = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        _emit(stage, start_wall, time.perf_counter() - start, parent, error, labels)
+
+
+def reset() -> None:
+    """Drop all recorded metrics (the span log file is left alone)."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _errors.clear()
+
+
+def _format_labels(labels: tuple, **extra) -> str:
+    pairs = [*labels, *((k, str(v)) for k, v in extra.items())]
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _metric_name(name: str) -> str:
+    return f"{METRIC_PREFIX}_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def prometheus_text() -> str:
+    """All spans and counters in the Prometheus text exposition format."""
+    with _lock:
+        histograms = {key: list(values) for key, values in _histograms.items()}
+        counters = dict(_counters)
+        errors = dict(_errors)
+
+    lines = []
+    if histograms:
+        name = f"{METRIC_PREFIX}_span_seconds"
+        lines += [f"# HELP {name} Wall-clock time spent in each pipeline stage.", f"# TYPE {name} histogram"]
+        for (stage, labels), values in sorted(histograms.items()):
+            labels = (("stage", stage), *labels)
+            cumulative = 0
+            for bound, bucket in zip((*SPAN_BUCKETS, "+Inf"), values[:-1]):
+                cumulative += bucket
+                lines.append(f"{name}_bucket{_format_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {values[-1]:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+        name = f"{METRIC_PREFIX}_span_errors_total"
+        lines += [f"# HELP {name} Stages that ended with an exception.", f"# TYPE {name} counter"]
+        for (stage, labels) in sorted(histograms):
+            lines.append(f"{name}{_format_labels((('stage', stage), *labels))} {errors.get((stage, labels), 0)}")
+
+    for metric in sorted({name for name, _ in counters}):
+        name = _metric_name(metric) + "_total"
+        lines += [f"# TYPE {name} counter"]
+        for (counter, labels), value in sorted(counters.items()):
+            if counter == metric:
+                lines.append(f"{name}{_format_labels(labels)} {value:.15g}")
+
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def snapshot() -> dict:
+    """Per-stage count / total / mean seconds and counter values, as a dict."""
+    with _lock:
+        stages = {}
+        for (stage, labels), values in _histograms.items():
+            entry = stages.setdefault(stage, {"count": 0, "errors": 0, "total_s": 0.0})
+            entry["count"] += sum(values[:-1])
+            entry["errors"] += _errors.get((stage, labels), 0)
+            entry["total_s"] += values[-1]
+        counters = {}
+        for (name, _), value in _counters.items():
+            counters[name] = counters.get(name, 0) + value
+    for entry in stages.values():
+        entry["mean_s"] = round(entry["total_s"] / entry["count"], 6) if entry["count"] else None
+        entry["total_s"] = round(entry["total_s"], 6)
+    return {"stages": stages, "counters": counters}
+
+
+def summarize_log(path: str) -> dict:
+    """Per-stage count, total, p50, p95 and max seconds from a span JSONL file."""
+    durations = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by a crashed writer
+            durations.setdefault(record["span"], []).append(record["duration_s"])
+
+    summary = {}
+    for stage, values in durations.items():
+        values.sort()
+        summary[stage] = {
+            "count": len(values),
+            "total_s": round(sum(values), 3),
+            "p50_s": round(values[len(values) // 2], 4),
+            "p95_s": round(values[min(len(values) - 1, int(0.95 * len(values)))], 4),
+            "max_s": round(values[-1], 4),
+        }
+    return summary
+
+
+def print_summary(summary: dict) -> None:
+    total = sum(s["total_s"] for s in summary.values()) or 1
+    print()
+    print("=" * 84)
+    print(f"  {'Stage':<28s} {'Count':>7s} {'Total':>10s} {'Share':>7s} {'p50':>9s} {'p95':>9s} {'Max':>9s}")
+    print(f"  {'─' * 28} {'─' * 7} {'─' * 10} {'─' * 7} {'─' * 9} {'─' * 9} {'─' * 9}")
+    for stage, s in sorted(summary.items(), key=lambda item: -item[1]["total_s"]):
+        print(f"  {stage:<28s} {s['count']:>7d} {s['total_s']:>9.2f}s {s['total_s'] / total:>6.1%} "
+              f"{s['p50_s']:>8.3f}s {s['p95_s']:>8.3f}s {s['max_s']:>8.3f}s")
+    print("=" * 84)
+    print("  Share is of all recorded span time; nested spans are counted in their parents too.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a span log written via AIMUSIC_TELEMETRY_FILE")
+    parser.add_argument("log_file", nargs="?", default=TELEMETRY_FILE or None)
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    if not args.log_file:
+        parser.error("no log file given and AIMUSIC_TELEMETRY_FILE is not set")
+    summary = summarize_log(args.log_file)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+    sys.exit(0 if summary else 1)
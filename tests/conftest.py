@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "SunoAPI"))
+sys.path.insert(0, ROOT_DIR)
+
+import suno_utils
+from fake_suno_server import start_fake_server
+
+FAKE_TASK_SECONDS = 0.6  # tasks reach SUCCESS quickly so the suite stays fast
+API_KEY = "test"
+
+
+def _serve(monkeypatch, rate_limit: float | None = None):
+    """Start a fake Suno server on a free port and point the client modules at it."""
+    server = start_fake_server(port=0, task_seconds=FAKE_TASK_SECONDS, rate_limit=rate_limit)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+    # ENDPOINTS is shared by reference with every module that imported it
+    monkeypatch.setitem(suno_utils.ENDPOINTS, "generate", f"{base_url}/generate")
+    monkeypatch.setitem(suno_utils.ENDPOINTS, "record_info", f"{base_url}/generate/record-info")
+    monkeypatch.setattr(suno_utils, "API_KEY", API_KEY)
+    return server
+
+
+@pytest.fixture
+def fake_suno(monkeypatch):
+    server = _serve(monkeypatch)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def throttled_suno(monkeypatch):
+    """Fake server that answers HTTP 429 beyond 2 API requests per second."""
+    server = _serve(monkeypatch, rate_limit=2)
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,19 @@
+import pytest
+
+from aimusic.importtime import CASES, run_checks
+
+
+@pytest.fixture(scope="module")
+def results():
+    return {r["case"]: r for r in run_checks()}
+
+
+@pytest.mark.parametrize("case", ["import aimusic", "from aimusic import suno, musicgen", "python -m aimusic --help"])
+def test_startup_skips_heavy_modules(results, case):
+    assert results[case]["forbidden_imports"] == [], f"{case} imports {results[case]['forbidden_imports']}"
+
+
+def test_every_case_within_budget(results):
+    assert set(results) == {label for label, *_ in CASES}
+    failed = {case: (r["import_ms"], r["budget_ms"], r["slowest"]) for case, r in results.items() if not r["ok"]}
+    assert not failed, failed
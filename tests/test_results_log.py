@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+
+import pytest
+
+from aimusic.results_log import ResultsLog, compact, last_run, read_records, segments, tail
+
+HEADER = {"model": "facebook/musicgen-small", "device": "cpu", "precision": "fp32"}
+
+
+def _write(path, results, rotate_bytes=512, **kwargs):
+    with ResultsLog(str(path), rotate_bytes=rotate_bytes, **kwargs) as log:
+        log.start("musicgen", HEADER)
+        for i, result in enumerate(results):
+            log.append(result, key=i)
+
+
+def test_rotation_splits_log_into_segments(tmp_path):
+    path = tmp_path / "results.jsonl"
+    _write(path, [{"prompt": f"Song {i}", "n": i} for i in range(40)])
+
+    parts = segments(str(path))
+    assert len(parts) > 3
+    assert parts[-1] == str(path)
+    assert [p.rsplit(".", 1)[1] for p in parts[:-1]] == [f"{n:06d}" for n in range(1, len(parts))]
+    for part in parts:
+        assert (tmp_path / part).stat().st_size <= 512
+
+    records = list(read_records(str(path)))
+    assert records[0]["type"] == "header"
+    assert [r["result"]["n"] for r in records[1:]] == list(range(40))
+
+
+def test_last_run_replaces_keys_and_keeps_unkeyed_order(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    with ResultsLog(path) as log:
+        first = log.start("musicgen", HEADER)
+        log.append({"n": "old run"}, key=0)
+        log.start("comparison", {"question": "q", "prompts": ["a", "b"]})
+        log.append({"n": "unkeyed 1"})
+        log.append({"n": "key 1"}, key=1)
+        log.append({"n": "key 0 first"}, key=0)
+        log.append({"n": "unkeyed 2"})
+        log.append({"n": "key 0 retry"}, key=0)
+
+    fmt, header, results = last_run(path)
+    assert fmt == "comparison"
+    assert header["prompts"] == ["a", "b"]
+    assert [r["n"] for r in results] == ["key 0 retry", "key 1", "unkeyed 1", "unkeyed 2"]
+    assert last_run(path, first)[2] == [{"n": "old run"}]
+    with pytest.raises(ValueError):
+        last_run(path, "no-such-run")
+
+    document = compact(path, str(tmp_path / "prompt_comparison.json"))
+    assert document["total_prompts"] == 2
+    assert json.loads((tmp_path / "prompt_comparison.json").read_text()) == document
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / "results.jsonl"
+    _write(path, [{"n": 0}, {"n": 1}], rotate_bytes=1024 ** 2)
+    with open(path, "ab") as f:
+        f.write(b'{"type": "result", "run": "x", "key": 2, "res')  # writer crashed mid-line
+
+    assert [r["result"]["n"] for r in read_records(str(path)) if r["type"] == "result"] == [0, 1]
+    assert [r["n"] for r in last_run(str(path))[2]] == [0, 1]
+    assert len(list(tail(str(path)))) == 3
+
+
+def test_tail_follows_across_rotation(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    count = 300
+    log = ResultsLog(path, rotate_bytes=600, fsync_every=1000, fsync_interval_s=60)
+    log.start("musicgen", HEADER)
+    log.append({"n": 0}, key=0)  # one record in place before the reader starts
+
+    seen = []
+
+    def follow():
+        for record in tail(path, follow=True, poll_s=0.001):
+            if record["type"] == "result":
+                seen.append(record["result"]["n"])
+                if record["result"]["n"] == count - 1:
+                    return
+
+    reader = threading.Thread(target=follow, daemon=True)
+    reader.start()
+    for n in range(1, count):
+        log.append({"n": n}, key=n)
+        if n % 7 == 0:
+            time.sleep(0.002)  # let the reader catch up now and then
+    log.close()
+    reader.join(timeout=30)
+
+    assert not reader.is_alive()
+    assert len(segments(path)) > 10
+    assert seen == list(range(count))
+
+
+def test_tail_joins_a_line_written_in_two_parts(tmp_path):
+    path = tmp_path / "results.jsonl"
+    _write(path, [{"n": 0}], rotate_bytes=1024 ** 2)
+    seen = []
+    reader = threading.Thread(
+        target=lambda: seen.extend(r for _, r in zip(range(3), tail(str(path), follow=True, poll_s=0.001))),
+        daemon=True,
+    )
+    reader.start()
+    line = json.dumps({"type": "result", "run": "x", "key": 1, "result": {"n": 1}}).encode() + b"\n"
+    with open(path, "ab") as f:
+        for part in (line[:20], line[20:]):
+            time.sleep(0.05)
+            f.write(part)
+            f.flush()
+    reader.join(timeout=10)
+
+    assert [r.get("result", {}).get("n") for r in seen] == [None, 0, 1]
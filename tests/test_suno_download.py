@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+
+import httpx
+
+from suno_download import download_file
+
+AUDIO = bytes(range(256)) * 4096  # 1 MB
+
+
+def _unsized_transport(audio: bytes) -> httpx.MockTransport:
+    """A server that never reports the size: no Content-Length, no Range support."""
+    async def chunks():
+        for i in range(0, len(audio), 65536):
+            yield audio[i:i + 65536]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "HEAD":
+            return httpx.Response(200)
+        return httpx.Response(200, content=chunks())
+    return httpx.MockTransport(handler)
+
+
+def _download(transport: httpx.MockTransport, path: str) -> dict:
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await download_file(client, "http://audio.test/track.mp3", str(path))
+    return asyncio.run(run())
+
+
+def test_truncated_file_is_redownloaded_without_content_length(tmp_path):
+    path = tmp_path / "track.mp3"
+    path.write_bytes(AUDIO[:1000])  # left behind by an earlier crash
+
+    result = _download(_unsized_transport(AUDIO), path)
+
+    assert result["status"] == "downloaded"
+    assert path.read_bytes() == AUDIO
+    assert result["sha256"] == hashlib.sha256(AUDIO).hexdigest()
+
+
+def test_complete_file_with_known_size_is_skipped(tmp_path):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=b"" if request.method == "HEAD" else AUDIO,
+                              headers={"Content-Length": str(len(AUDIO))})
+
+    path = tmp_path / "track.mp3"
+    path.write_bytes(AUDIO)
+
+    assert _download(httpx.MockTransport(handler), path)["status"] == "skipped"
+
+
+def test_partial_download_resumes_from_fake_server(fake_suno, tmp_path):
+    base_url = f"http://127.0.0.1:{fake_suno.server_address[1]}"
+    url = f"{base_url}/audio/track1.mp3"
+    full = httpx.get(url).content
+    path = tmp_path / "track.mp3"
+    (tmp_path / "track.mp3.part").write_bytes(full[:1000])
+
+    async def run():
+        async with httpx.AsyncClient() as client:
+            return await download_file(client, url, str(path))
+
+    result = asyncio.run(run())
+    assert result["status"] == "resumed"
+    assert path.read_bytes() == full
+
+
+def _range_transport(audio: bytes, head_size: bool) -> httpx.MockTransport:
+    """A server that honours Range and answers 416 past the end; HEAD reports the size if `head_size`."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        size = {"Content-Length": str(len(audio))}
+        if request.method == "HEAD":
+            return httpx.Response(200, headers=size if head_size else {})
+        start = int(request.headers.get("Range", "bytes=0-")[6:-1])
+        if start >= len(audio):
+            return httpx.Response(416, headers={"Content-Range": f"bytes */{len(audio)}"})
+        return httpx.Response(206, content=audio[start:],
+                              headers={"Content-Range": f"bytes {start}-{len(audio) - 1}/{len(audio)}"})
+    return httpx.MockTransport(handler)
+
+
+def test_whole_part_file_is_finished_without_refetching(tmp_path):
+    path = tmp_path / "track.mp3"
+    for head_size in (True, False):
+        (tmp_path / "track.mp3.part").write_bytes(AUDIO)  # crashed before the rename
+
+        result = _download(_range_transport(AUDIO, head_size), path)
+
+        assert result["status"] == "resumed"
+        assert result["sha256"] == hashlib.sha256(AUDIO).hexdigest()
+        assert path.read_bytes() == AUDIO
+        assert not (tmp_path / "track.mp3.part").exists()
+        path.unlink()
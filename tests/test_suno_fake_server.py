@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+import suno_async
+import suno_generate
+from suno_callback import CallbackReceiver, run_tasks_with_callbacks
+from suno_scheduler import SubmissionScheduler
+from suno_tracker import TaskTracker
+from suno_utils import STATUS_SUCCESS
+
+POLL_S = 0.05
+
+
+def _submit(prompt: str = "A calm piano piece") -> str:
+    return suno_generate.generate_music(prompt)["data"]["taskId"]
+
+
+def test_async_generate_and_wait(fake_suno):
+    async def run():
+        result = await suno_async.generate_music("A calm piano piece")
+        task_id = result["data"]["taskId"]
+        return task_id, await suno_async.wait_for_completion(task_id, poll_interval=POLL_S, max_wait=10)
+
+    task_id, data = asyncio.run(run())
+    assert data["status"] == STATUS_SUCCESS
+    assert data["taskId"] == task_id
+    assert fake_suno.state.request_counts["generate"] == 1
+
+
+def test_async_wait_adaptive_schedule(fake_suno):
+    task_id = _submit()
+    data = asyncio.run(suno_async.wait_for_completion(task_id, max_wait=15))
+    assert data["status"] == STATUS_SUCCESS
+
+
+def test_wait_times_out(fake_suno):
+    task_id = _submit()
+    with pytest.raises(RuntimeError, match="Timed out"):
+        asyncio.run(suno_async.wait_for_completion(task_id, poll_interval=POLL_S, max_wait=0.1))
+
+
+def test_sync_wrappers(fake_suno):
+    task_id = _submit()
+    assert suno_generate.get_task_status(task_id)["code"] == 200
+    data = suno_generate.wait_for_completion(task_id, poll_interval=POLL_S, max_wait=10)
+    assert data["status"] == STATUS_SUCCESS
+    assert len(data["response"]["sunoData"]) == 2
+
+
+def test_generate_rejects_invalid_params(fake_suno):
+    with pytest.raises(ValueError):
+        suno_generate.generate_music("", custom_mode=False)
+    assert fake_suno.state.request_counts["generate"] == 0
+
+
+def test_run_tasks(fake_suno):
+    jobs = [{"prompt": f"Song {i}"} for i in range(3)]
+    results = asyncio.run(suno_async.run_tasks(jobs, poll_interval=POLL_S, max_wait=10))
+    assert [r["status"] for r in results] == [STATUS_SUCCESS] * 3
+    assert len({r["taskId"] for r in results}) == 3
+
+
+def test_task_tracker_sync(fake_suno):
+    task_ids = {_submit(f"Song {i}") for i in range(3)}
+    tracker = TaskTracker(task_ids, poll_interval=POLL_S, max_wait=10)
+    finished = dict(tracker)
+    assert set(finished) == task_ids
+    assert all(data["status"] == STATUS_SUCCESS for data in finished.values())
+    assert not tracker.pending
+    # One sweep polls every pending task, so requests grow with sweeps x tasks
+    assert tracker.requests <= tracker.sweeps * len(task_ids)
+
+
+def test_task_tracker_async(fake_suno):
+    task_ids = {_submit(f"Song {i}") for i in range(2)}
+
+    async def run():
+        return [(task_id, data) async for task_id, data in TaskTracker(task_ids, poll_interval=POLL_S, max_wait=10)]
+
+    finished = asyncio.run(run())
+    assert {task_id for task_id, _ in finished} == task_ids
+
+
+def test_task_tracker_times_out(fake_suno):
+    tracker = TaskTracker({_submit()}, poll_interval=POLL_S, max_wait=0.1)
+    with pytest.raises(RuntimeError, match="still pending"):
+        list(tracker)
+
+
+def test_callbacks_resolve_waiters(fake_suno):
+    async def run():
+        async with CallbackReceiver(port=0) as receiver:
+            results = await run_tasks_with_callbacks(
+                [{"prompt": "Song A"}, {"prompt": "Song B"}], receiver=receiver, deadline=10,
+            )
+            return results, receiver.callbacks_received
+
+    results, callbacks = asyncio.run(run())
+    assert [r["status"] for r in results] == [STATUS_SUCCESS] * 2
+    # text, first and complete for each task
+    assert callbacks == 6
+    assert fake_suno.state.request_counts["callbacks_sent"] == 6
+
+
+def test_scheduler_retries_throttled_requests(throttled_suno):
+    async def run():
+        async with SubmissionScheduler(rate=50, burst=50, max_retries=10, max_wait=20) as scheduler:
+            results = await scheduler.run([{"prompt": f"Song {i}"} for i in range(4)])
+            return results, scheduler.stats()
+
+    results, stats = asyncio.run(run())
+    assert [r["status"] for r in results] == [STATUS_SUCCESS] * 4
+    assert stats["throttled"] > 0
+    assert stats["retries"] >= stats["throttled"]
+    assert stats["submitted"] == throttled_suno.state.request_counts["generate"] == 4
+
+
+def test_scheduler_fails_unknown_task(fake_suno):
+    async def run():
+        async with SubmissionScheduler(max_wait=20) as scheduler:
+            await scheduler.wait("no-such-task")
+
+    with pytest.raises(RuntimeError, match="unknown taskId"):
+        asyncio.run(run())